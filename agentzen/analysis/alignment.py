@@ -0,0 +1,210 @@
+import json
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+# ---------------------------------------------------------------------
+# SEQUENCE ALIGNMENT
+#
+# Myers' O(ND) difference algorithm, linear-space variant: find the
+# middle snake of the edit graph, recurse on both halves. Memory is
+# O(N + M) and the time is O((N + M) * D), D being the edit distance,
+# so two long traces that differ by a few decisions align quickly.
+#
+# Past max_cost edits per subproblem the search stops at the furthest
+# reaching diagonal (as GNU diff does), so unrelated sequences still
+# align in bounded time, just not minimally.
+# ---------------------------------------------------------------------
+
+EQUAL = "equal"
+INSERT = "insert"
+DELETE = "delete"
+
+Edit = Tuple[str, Optional[int], Optional[int]]
+
+
+def intern_keys(a: Sequence[Any], b: Sequence[Any]) -> Tuple[List[int], List[int]]:
+    """
+    Map the items of a and b to small ints, equal items to equal ints.
+    Unhashable items (lists, dicts from JSON) compare by their JSON form.
+    """
+    table: Dict[Hashable, int] = {}
+
+    def key(item):
+        try:
+            hash(item)
+            return item
+        except TypeError:
+            return json.dumps(item, sort_keys=True, default=str)
+
+    def ids(items):
+        out = []
+        for item in items:
+            k = key(item)
+            i = table.get(k)
+            if i is None:
+                i = table[k] = len(table)
+            out.append(i)
+        return out
+
+    return ids(a), ids(b)
+
+
+def align(a: Sequence[Any], b: Sequence[Any], max_cost: int = 64) -> List[Edit]:
+    """
+    Shortest edit script turning a into b, as (op, i, j) tuples:
+
+        ("equal",  i, j)     a[i] == b[j]
+        ("delete", i, None)  a[i] is not in b
+        ("insert", None, j)  b[j] is not in a
+
+    in order. Items are compared with ==; see intern_keys.
+
+    The result is minimal whenever each half of every subproblem
+    needs at most max_cost edits (so up to ~2 * max_cost in total);
+    time grows linearly with max_cost on very different inputs.
+    """
+    x, y = intern_keys(a, b)
+    n, m = len(x), len(y)
+
+    # Common prefix and suffix never need the edit graph.
+    lo = 0
+    while lo < n and lo < m and x[lo] == y[lo]:
+        lo += 1
+    hi_a, hi_b = n, m
+    while hi_a > lo and hi_b > lo and x[hi_a - 1] == y[hi_b - 1]:
+        hi_a -= 1
+        hi_b -= 1
+
+    edits: List[Edit] = [(EQUAL, i, i) for i in range(lo)]
+    _diff(x, y, lo, lo, hi_a, hi_b, max_cost, edits)
+    edits.extend((EQUAL, hi_a + k, hi_b + k) for k in range(n - hi_a))
+    return edits
+
+
+def _diff(x, y, left, top, right, bottom, max_cost, edits):
+    # Iterative over the right half, recursive over the left, so the
+    # stack depth stays logarithmic in practice.
+    while True:
+        if left == right:
+            edits.extend((INSERT, None, j) for j in range(top, bottom))
+            return
+        if top == bottom:
+            edits.extend((DELETE, i, None) for i in range(left, right))
+            return
+
+        (sx, sy), (ex, ey), forward = _middle_snake(
+            x, y, left, top, right, bottom, max_cost
+        )
+
+        _diff(x, y, left, top, sx, sy, max_cost, edits)
+        _walk(sx, sy, ex, ey, forward, edits)
+        left, top = ex, ey
+
+
+def _walk(sx, sy, ex, ey, forward, edits):
+    """
+    Emit the middle snake: at most one edit plus a diagonal run,
+    the edit first on forward snakes and last on backward ones.
+    """
+    dx, dy = ex - sx, ey - sy
+    step = None
+    if dx > dy:
+        step = (DELETE, sx + dx - dy - 1 if not forward else sx, None)
+    elif dy > dx:
+        step = (INSERT, None, sy + dy - dx - 1 if not forward else sy)
+
+    if step is not None and forward:
+        edits.append(step)
+        if step[0] == DELETE:
+            sx += 1
+        else:
+            sy += 1
+
+    run = min(ex - sx, ey - sy)
+    edits.extend((EQUAL, sx + k, sy + k) for k in range(run))
+
+    if step is not None and not forward:
+        edits.append((step[0], ex - 1 if step[0] == DELETE else None,
+                      ey - 1 if step[0] == INSERT else None))
+
+
+def _middle_snake(x, y, left, top, right, bottom, max_cost):
+    """
+    ((start_x, start_y), (end_x, end_y), forward) for a segment of
+    a shortest path through the box: at most one edit plus a
+    diagonal run, splitting the box's edits roughly in half.
+    """
+    width = right - left
+    height = bottom - top
+    delta = width - height
+    odd = delta & 1
+    limit = (width + height + 1) // 2
+
+    # Python's negative indexing maps diagonals -limit..limit onto
+    # one list of size 2 * limit + 3.
+    size = 2 * limit + 3
+    vf = [0] * size
+    vb = [0] * size
+    vf[1] = left
+    vb[1] = bottom
+
+    for d in range(limit + 1):
+        if d > max_cost:
+            split = _best_split(vf, d - 1, left, top, right, bottom)
+            return split, split, True
+
+        # Forward search from (left, top).
+        for k in range(d, -d - 1, -2):
+            if k == -d or (k != d and vf[k - 1] < vf[k + 1]):
+                px = xk = vf[k + 1]
+            else:
+                px = vf[k - 1]
+                xk = px + 1
+            yk = top + (xk - left) - k
+            py = yk if (d == 0 or xk != px) else yk - 1
+            while xk < right and yk < bottom and x[xk] == y[yk]:
+                xk += 1
+                yk += 1
+            vf[k] = xk
+            c = k - delta
+            if odd and -(d - 1) <= c <= d - 1 and yk >= vb[c]:
+                return (px, py), (xk, yk), True
+
+        # Backward search from (right, bottom).
+        for c in range(d, -d - 1, -2):
+            k = c + delta
+            if c == -d or (c != d and vb[c - 1] > vb[c + 1]):
+                py = yk = vb[c + 1]
+            else:
+                py = vb[c - 1]
+                yk = py - 1
+            xk = left + (yk - top) + k
+            px = xk if (d == 0 or yk != py) else xk + 1
+            while xk > left and yk > top and x[xk - 1] == y[yk - 1]:
+                xk -= 1
+                yk -= 1
+            vb[c] = yk
+            if not odd and -d <= k <= d and xk <= vf[k]:
+                return (xk, yk), (px, py), False
+
+    # Unreachable: the searches always meet by d == limit.
+    raise AssertionError("middle snake not found")
+
+
+def _best_split(vf, d, left, top, right, bottom):
+    """
+    Cost limit hit: split at the point inside the box that the
+    forward search got furthest to. Any interior point is a valid
+    split; this one keeps the alignment close to minimal.
+    """
+    best = None
+    best_score = -1
+    for k in range(d, -d - 1, -2):
+        xk = min(vf[k], right)
+        yk = top + (xk - left) - k
+        if top <= yk <= bottom and xk + yk > best_score:
+            if (xk, yk) not in ((left, top), (right, bottom)):
+                best, best_score = (xk, yk), xk + yk
+    if best is None:
+        best = (left + 1, top) if right > left else (left, top + 1)
+    return best
@@ -1,95 +1,45 @@
-from collections import defaultdict
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional
 
 
 class Finding:
-    def __init__(self, message: str, suggestion: str):
+    def __init__(self, message: str, suggestion: str, rule: Optional[str] = None):
         self.message = message
         self.suggestion = suggestion
+        self.rule = rule
 
 
 class AntiPatternResult:
     def __init__(self):
         self.findings: List[Finding] = []
 
-    def add(self, message: str, suggestion: str):
-        self.findings.append(Finding(message, suggestion))
+    def add(self, message: str, suggestion: str, rule: Optional[str] = None):
+        self.findings.append(Finding(message, suggestion, rule))
 
     def is_empty(self) -> bool:
         return len(self.findings) == 0
 
 
 class AntiPatternAnalyzer:
-    def __init__(self, spans: List[Dict[str, Any]]):
+    """
+    Runs the registered detectors (see analysis.detectors) over one
+    trace in a single pass. spans may be any iterable of span records
+    or TraceSpan objects, including a streaming loader.
+
+    config overrides per-rule thresholds, e.g.
+        AntiPatternAnalyzer(spans, {"decision_loop": {"threshold": 4}})
+    """
+
+    def __init__(
+        self,
+        spans: Iterable[Any],
+        config: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
         self.spans = spans
+        self.config = config
 
     def analyze(self) -> AntiPatternResult:
-        result = AntiPatternResult()
+        from .detectors import DetectorEngine
 
-        decisions = [
-            s for s in self.spans
-            if s["name"].startswith("agent:decision:")
-        ]
-
-        if not decisions:
-            return result
-
-        # --------------------------------------------------
-        # Decision Loop
-        # --------------------------------------------------
-        counts = defaultdict(int)
-        for d in decisions:
-            counts[d["name"]] += 1
-
-        for name, count in counts.items():
-            if count >= 3:
-                result.add(
-                    f"Decision loop detected: '{name}' repeated {count} times",
-                    "Add a stopping condition or max_iterations guard",
-                )
-
-        # --------------------------------------------------
-        # Low Confidence
-        # --------------------------------------------------
-        confidences = [
-            d["attributes"].get("confidence")
-            for d in decisions
-            if d["attributes"].get("confidence") is not None
-        ]
-
-        if confidences:
-            avg = sum(confidences) / len(confidences)
-            if avg < 0.5:
-                result.add(
-                    f"Low confidence decisions: average = {avg:.2f}",
-                    "Improve prompt clarity or add more context",
-                )
-
-        # --------------------------------------------------
-        # Oscillation
-        # --------------------------------------------------
-        last = None
-        flips = 0
-
-        for d in decisions:
-            choice = d["attributes"].get("chosen")
-            if last is not None and choice != last:
-                flips += 1
-            last = choice
-
-        if flips >= 2:
-            result.add(
-                f"Decision oscillation detected: {flips} flips",
-                "Introduce a preference bias or memory of past decisions",
-            )
-
-        # --------------------------------------------------
-        # Excessive Decisions
-        # --------------------------------------------------
-        if len(decisions) > 5:
-            result.add(
-                f"Excessive decisions: {len(decisions)} in one trace",
-                "Reduce planning depth or merge decisions",
-            )
-
-        return result
+        engine = DetectorEngine(self.config)
+        engine.feed_all(self.spans)
+        return engine.result()
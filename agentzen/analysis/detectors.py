@@ -0,0 +1,367 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from .antipatterns import AntiPatternResult, Finding
+
+
+DECISION_PREFIX = "agent:decision:"
+PLUGIN_GROUP = "agentzen.detectors"
+
+
+# ---------------------------------------------------------------------
+# DETECTOR BASE + REGISTRY
+# ---------------------------------------------------------------------
+
+class Detector(ABC):
+    """
+    One anti-pattern rule, run as an incremental state machine.
+
+    The engine feeds spans one at a time (only decision spans when
+    decisions_only is True). feed() may return a Finding the moment
+    a threshold is crossed, which lets live exporters react early;
+    finish() returns the findings for the whole trace.
+
+    One instance is created per trace, so __init__ should take no
+    arguments and only set up state. Thresholds are class-level
+    defaults that can be overridden per rule through the engine's
+    config, e.g.
+        {"decision_loop": {"threshold": 4}}
+    State must stay O(1) per trace (or per distinct decision name).
+    """
+
+    name = ""
+    decisions_only = True
+    defaults: Dict[str, Any] = {}
+
+    def configure(self, **options) -> "Detector":
+        # Defaults live on the class (see register_detector), so a
+        # detector with no overrides costs nothing to set up.
+        for key, value in options.items():
+            if key not in self.defaults:
+                raise ValueError(f"unknown option {key!r} for {self.name}")
+            setattr(self, key, value)
+        return self
+
+    @abstractmethod
+    def feed(self, name: str, attributes: Dict[str, Any], span: Any) -> Optional[Finding]:
+        ...
+
+    @abstractmethod
+    def finish(self) -> List[Finding]:
+        ...
+
+
+_REGISTRY: Dict[str, Type[Detector]] = {}
+_plugins_loaded = False
+
+
+def register_detector(cls: Type[Detector]) -> Type[Detector]:
+    """
+    Class decorator adding a detector to the registry.
+
+    Third-party packages can also expose detectors through the
+    "agentzen.detectors" entry point group.
+    """
+    if not cls.name:
+        raise ValueError("detectors must define a name")
+    for key, value in cls.defaults.items():
+        setattr(cls, key, value)
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def registered_detectors() -> Dict[str, Type[Detector]]:
+    _load_plugins()
+    return dict(_REGISTRY)
+
+
+def _load_plugins():
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+
+    try:
+        eps = entry_points()
+        group = (
+            eps.select(group=PLUGIN_GROUP)
+            if hasattr(eps, "select")
+            else eps.get(PLUGIN_GROUP, [])
+        )
+        for ep in group:
+            cls = ep.load()
+            if cls.name not in _REGISTRY:
+                register_detector(cls)
+    except Exception:
+        # A broken plugin must not take the built-in rules down with it.
+        pass
+
+
+# ---------------------------------------------------------------------
+# BUILT-IN RULES
+# ---------------------------------------------------------------------
+
+@register_detector
+class DecisionLoopDetector(Detector):
+    name = "decision_loop"
+    defaults = {"threshold": 3}
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def feed(self, name, attributes, span):
+        count = self.counts.get(name, 0) + 1
+        self.counts[name] = count
+        if count == self.threshold:
+            return self._finding(name, count)
+        return None
+
+    def finish(self):
+        return [
+            self._finding(name, count)
+            for name, count in self.counts.items()
+            if count >= self.threshold
+        ]
+
+    def _finding(self, name, count):
+        return Finding(
+            f"Decision loop detected: '{name}' repeated {count} times",
+            "Add a stopping condition or max_iterations guard",
+            self.name,
+        )
+
+
+@register_detector
+class LowConfidenceDetector(Detector):
+    name = "low_confidence"
+    defaults = {"threshold": 0.5}
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def feed(self, name, attributes, span):
+        confidence = attributes.get("confidence")
+        if confidence is not None:
+            self.total += confidence
+            self.count += 1
+        # An average can only be judged once the trace is complete.
+        return None
+
+    def finish(self):
+        if not self.count:
+            return []
+        avg = self.total / self.count
+        if avg >= self.threshold:
+            return []
+        return [
+            Finding(
+                f"Low confidence decisions: average = {avg:.2f}",
+                "Improve prompt clarity or add more context",
+                self.name,
+            )
+        ]
+
+
+@register_detector
+class OscillationDetector(Detector):
+    name = "oscillation"
+    defaults = {"min_flips": 2}
+
+    def __init__(self):
+        self.last = None
+        self.flips = 0
+
+    def feed(self, name, attributes, span):
+        choice = attributes.get("chosen")
+        crossed = False
+        if self.last is not None and choice != self.last:
+            self.flips += 1
+            crossed = self.flips == self.min_flips
+        self.last = choice
+        return self._finding() if crossed else None
+
+    def finish(self):
+        return [self._finding()] if self.flips >= self.min_flips else []
+
+    def _finding(self):
+        return Finding(
+            f"Decision oscillation detected: {self.flips} flips",
+            "Introduce a preference bias or memory of past decisions",
+            self.name,
+        )
+
+
+@register_detector
+class ExcessiveDecisionsDetector(Detector):
+    name = "excessive_decisions"
+    defaults = {"max_decisions": 5}
+
+    def __init__(self):
+        self.count = 0
+
+    def feed(self, name, attributes, span):
+        self.count += 1
+        return self._finding() if self.count == self.max_decisions + 1 else None
+
+    def finish(self):
+        return [self._finding()] if self.count > self.max_decisions else []
+
+    def _finding(self):
+        return Finding(
+            f"Excessive decisions: {self.count} in one trace",
+            "Reduce planning depth or merge decisions",
+            self.name,
+        )
+
+
+# ---------------------------------------------------------------------
+# ENGINE
+# ---------------------------------------------------------------------
+
+class DetectorEngine:
+    """
+    Runs every enabled detector over one trace in a single pass.
+
+    config maps rule names to option overrides; {"enabled": False}
+    switches a rule off. Spans may be record dicts (as loaded from
+    disk) or live TraceSpan objects.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Dict[str, Any]]] = None):
+        config = config or {}
+        plan = []
+
+        _load_plugins()
+        for name, cls in _REGISTRY.items():
+            options = dict(config.get(name) or {})
+            if not options.pop("enabled", True):
+                continue
+            plan.append((cls, options))
+
+        self._setup(plan)
+
+    def _setup(self, plan):
+        self._plan = plan
+        self.detectors: List[Detector] = []
+        self._decisions: List[Detector] = []
+        self._all_spans: List[Detector] = []
+
+        for cls, options in plan:
+            detector = cls().configure(**options) if options else cls()
+            self.detectors.append(detector)
+            if detector.decisions_only:
+                self._decisions.append(detector)
+            else:
+                self._all_spans.append(detector)
+
+    @property
+    def decisions_only(self) -> bool:
+        """
+        True when no enabled detector needs to see non-decision spans.
+        """
+        return not self._all_spans
+
+    def spawn(self) -> "DetectorEngine":
+        """
+        A fresh engine with the same rules and config, for the next
+        trace. Cheaper than resolving the config again.
+        """
+        engine = DetectorEngine.__new__(DetectorEngine)
+        engine._setup(self._plan)
+        return engine
+
+    def feed(self, span: Any) -> List[Finding]:
+        """
+        Feed one finished span. Returns findings whose threshold
+        was crossed by this span (usually an empty list).
+        """
+        if type(span) is dict:
+            name = span["name"]
+        else:
+            name = span.name
+
+        is_decision = name.startswith(DECISION_PREFIX)
+        if not (is_decision or self._all_spans):
+            return []
+
+        if type(span) is dict:
+            attributes = span.get("attributes") or {}
+        else:
+            attributes = span.attributes
+
+        crossed: List[Finding] = []
+        for detector in self._all_spans:
+            finding = detector.feed(name, attributes, span)
+            if finding is not None:
+                crossed.append(finding)
+
+        if is_decision:
+            for detector in self._decisions:
+                finding = detector.feed(name, attributes, span)
+                if finding is not None:
+                    crossed.append(finding)
+
+        return crossed
+
+    def feed_all(self, spans: Iterable[Any]):
+        """
+        Feed a whole trace (a list or any iterable). Same as calling
+        feed() per span, minus the per-span call overhead.
+        """
+        if self._all_spans:
+            for span in spans:
+                self.feed(span)
+            return
+
+        decisions = self._decisions
+        for span in spans:
+            if type(span) is dict:
+                name = span["name"]
+                if not name.startswith(DECISION_PREFIX):
+                    continue
+                attributes = span.get("attributes") or {}
+            else:
+                name = span.name
+                if not name.startswith(DECISION_PREFIX):
+                    continue
+                attributes = span.attributes
+            for detector in decisions:
+                detector.feed(name, attributes, span)
+
+    def result(self) -> AntiPatternResult:
+        result = AntiPatternResult()
+        for detector in self.detectors:
+            result.findings.extend(detector.finish())
+        return result
+
+
+def iter_findings(
+    records: Iterable[Dict[str, Any]],
+    config: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Iterator[Tuple[Any, AntiPatternResult]]:
+    """
+    Analyze a stream of span records (e.g. replay.iter_records)
+    without holding any trace in memory: one engine per open trace,
+    finished when the trace's root span arrives.
+    """
+    prototype = DetectorEngine(config)
+    engines: Dict[Any, DetectorEngine] = {}
+
+    for record in records:
+        trace_id = record.get("trace_id")
+        engine = engines.get(trace_id)
+        if engine is None:
+            engine = engines[trace_id] = prototype.spawn()
+        engine.feed(record)
+
+        if record.get("parent_id") is None:
+            yield trace_id, engines.pop(trace_id).result()
+
+    for trace_id, engine in engines.items():
+        yield trace_id, engine.result()
@@ -0,0 +1,222 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# ---------------------------------------------------------------------
+# TRACE PROFILING
+#
+# For every span of a trace:
+#
+#   self time      its duration minus the union of its children's
+#                  intervals (children may run concurrently, so
+#                  their durations cannot simply be subtracted)
+#   gaps           time between its first child starting and its
+#                  last child ending during which no child ran
+#   critical time  how much of the trace's wall-clock time the span
+#                  itself (not a child) was the thing being waited on
+#
+# Critical path: start at the root's end and walk backwards. The
+# child that finished last before the cursor is on the path; the
+# parent owns the time between that child's end and the cursor. The
+# walk recurses into the child, then moves the cursor to its start.
+# Critical times therefore add up to the root's duration.
+#
+# Each span's children are sorted once, so a trace costs
+# O(n log k) for n spans and at most k children per span.
+# ---------------------------------------------------------------------
+
+# Per-name aggregate slots.
+COUNT, TOTAL, SELF, CRITICAL, GAPS = range(5)
+
+
+class TraceProfiler:
+    """
+    Aggregates profiles of any number of traces, fed one at a time.
+    Memory is O(spans of the largest trace + distinct span names +
+    distinct stacks).
+    """
+
+    def __init__(self, max_stack_depth: int = 256):
+        self.max_stack_depth = max_stack_depth
+        self.by_name: Dict[str, List[float]] = {}
+        self.traces = 0
+        self.spans = 0
+        self.wall_time = 0.0
+
+        # Collapsed stacks, interned: (parent stack id, name) -> id.
+        # Frames below max_stack_depth are folded into their ancestor,
+        # which keeps folded output linear even for very deep traces.
+        self._stack_ids: Dict[Tuple[int, str], int] = {}
+        self._stack_self: List[float] = []
+        self._stack_depth: List[int] = []
+
+        self.slowest: Optional[Tuple[float, Any, List[Tuple[float, str, float]]]] = None
+
+    def add_trace(self, trace_id: Any, spans: Iterable[Dict[str, Any]]):
+        nodes = [
+            s for s in spans
+            if s.get("start_time") is not None and s.get("end_time") is not None
+        ]
+        if not nodes:
+            return
+
+        self.traces += 1
+        self.spans += len(nodes)
+
+        index = {s["span_id"]: i for i, s in enumerate(nodes)}
+        children: List[List[int]] = [[] for _ in nodes]
+        roots = []
+        for i, s in enumerate(nodes):
+            parent = index.get(s.get("parent_id"))
+            if parent is None or parent == i:
+                roots.append(i)
+            else:
+                children[parent].append(i)
+
+        start = [s["start_time"] for s in nodes]
+        end = [max(s["end_time"], s["start_time"]) for s in nodes]
+
+        self_time = [0.0] * len(nodes)
+        for i, kids in enumerate(children):
+            self_time[i] = self._self_and_gaps(nodes[i], start, end, i, kids)
+
+        # Pre-order walk: stack ids for collapsed output.
+        stack = [(r, -1) for r in roots]
+        while stack:
+            i, parent_stack = stack.pop()
+            depth = self._stack_depth[parent_stack] + 1 if parent_stack >= 0 else 1
+            if depth > self.max_stack_depth:
+                sid = parent_stack
+            else:
+                key = (parent_stack, nodes[i]["name"])
+                sid = self._stack_ids.get(key)
+                if sid is None:
+                    sid = self._stack_ids[key] = len(self._stack_self)
+                    self._stack_self.append(0.0)
+                    self._stack_depth.append(depth)
+            self._stack_self[sid] += self_time[i]
+            stack.extend((k, sid) for k in children[i])
+
+        # Critical path of each root.
+        path: List[Tuple[float, str, float]] = []
+        wall = 0.0
+        for r in roots:
+            wall += end[r] - start[r]
+            self._critical(nodes, start, end, children, r, path)
+        self.wall_time += wall
+
+        if self.slowest is None or wall > self.slowest[0]:
+            path.sort(key=lambda seg: seg[0])
+            self.slowest = (wall, trace_id, path)
+
+    def _stats(self, name: str) -> List[float]:
+        stats = self.by_name.get(name)
+        if stats is None:
+            stats = self.by_name[name] = [0, 0.0, 0.0, 0.0, 0.0]
+        return stats
+
+    def _self_and_gaps(self, span, start, end, i, kids) -> float:
+        s, e = start[i], end[i]
+        stats = self._stats(span["name"])
+        stats[COUNT] += 1
+        stats[TOTAL] += e - s
+        if not kids:
+            stats[SELF] += e - s
+            return e - s
+
+        kids.sort(key=start.__getitem__)
+        covered = 0.0
+        gaps = 0.0
+        run_s = run_e = None
+        for k in kids:
+            ks, ke = max(start[k], s), min(end[k], e)
+            if ke <= ks:
+                continue
+            if run_e is None:
+                run_s, run_e = ks, ke
+            elif ks > run_e:
+                covered += run_e - run_s
+                gaps += ks - run_e
+                run_s, run_e = ks, ke
+            elif ke > run_e:
+                run_e = ke
+        if run_e is not None:
+            covered += run_e - run_s
+
+        own = max(0.0, (e - s) - covered)
+        stats[SELF] += own
+        stats[GAPS] += gaps
+        return own
+
+    def _critical(self, nodes, start, end, children, root, path):
+        # (span index, cursor): the span is on the path up to cursor.
+        stack = [(root, end[root])]
+        while stack:
+            i, t = stack.pop()
+            name = nodes[i]["name"]
+            stats = self._stats(name)
+            floor = start[i]
+
+            kids = sorted(children[i], key=end.__getitem__, reverse=True)
+            for k in kids:
+                if t <= floor:
+                    break
+                if start[k] >= t or end[k] <= floor:
+                    continue
+                k_end = min(end[k], t)
+                if t > k_end:
+                    stats[CRITICAL] += t - k_end
+                    path.append((k_end, name, t - k_end))
+                stack.append((k, k_end))
+                t = max(start[k], floor)
+
+            if t > floor:
+                stats[CRITICAL] += t - floor
+                path.append((floor, name, t - floor))
+
+    # --------------------------------------------------
+    # RESULTS
+    # --------------------------------------------------
+
+    def hot_spans(self, top: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = [
+            {
+                "name": name,
+                "count": int(st[COUNT]),
+                "total": st[TOTAL],
+                "self": st[SELF],
+                "critical": st[CRITICAL],
+                "gaps": st[GAPS],
+            }
+            for name, st in self.by_name.items()
+        ]
+        rows.sort(key=lambda r: (-r["self"], r["name"]))
+        return rows[:top] if top else rows
+
+    def critical_path(self) -> List[Tuple[str, float]]:
+        """
+        Critical path of the slowest trace in time order, with
+        consecutive segments of the same span name merged.
+        """
+        if self.slowest is None:
+            return []
+        merged: List[Tuple[str, float]] = []
+        for _, name, amount in self.slowest[2]:
+            if merged and merged[-1][0] == name:
+                merged[-1] = (name, merged[-1][1] + amount)
+            else:
+                merged.append((name, amount))
+        return merged
+
+    def collapsed(self) -> Iterable[str]:
+        """
+        Folded stacks ("root;child;leaf <self microseconds>") for
+        flamegraph.pl, speedscope, inferno and friends.
+        """
+        names: List[str] = [""] * len(self._stack_self)
+        for (parent, name), sid in self._stack_ids.items():
+            # Parents are always interned before their children.
+            names[sid] = name if parent < 0 else names[parent] + ";" + name
+        for sid, value in enumerate(self._stack_self):
+            micros = int(round(value * 1e6))
+            if micros > 0:
+                yield f"{names[sid]} {micros}"
@@ -0,0 +1,163 @@
+import math
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees
+    (DDSketch-style logarithmic buckets).
+
+    Any quantile is answered within relative_accuracy of the true
+    value. Memory is bounded by max_buckets whatever the number of
+    values added; past it the lowest buckets are collapsed, which
+    only costs accuracy at the low end, not at p95/p99. Sketches
+    with the same relative_accuracy merge exactly.
+
+    Values <= 0 are counted in a dedicated zero bucket. While every
+    value added is integral, quantiles are rounded to integers.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError(
+                f"relative_accuracy must be within (0, 1), got {relative_accuracy}"
+            )
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.integral = True
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.integral and value != int(value):
+            self.integral = False
+
+        if value <= 0:
+            self.zero_count += 1
+            return
+
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        self.integral = self.integral and other.integral
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets + 1
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of bucket (gamma^(k-1), gamma^k].
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"q must be within [0, 1], got {q}")
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0 if self.min >= 0 else self.min
+
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = min(max(self._value(key), self.min), self.max)
+                # Counts (calls, tokens) read better as counts.
+                return float(round(value)) if self.integral else value
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def cdf_points(self) -> Iterator[Tuple[float, float]]:
+        """
+        (upper bound, cumulative fraction) for every non-empty bucket,
+        in increasing order.
+        """
+        if not self.count:
+            return
+        seen = self.zero_count
+        if seen:
+            yield 0.0, seen / self.count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            yield self.gamma ** key, seen / self.count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+def ks_greater(baseline: QuantileSketch, candidate: QuantileSketch) -> Tuple[float, float]:
+    """
+    One-sided two-sample Kolmogorov-Smirnov test that candidate
+    values are stochastically larger than baseline values, computed
+    on the sketches' bucket boundaries.
+
+    Returns (D+, p-value) with the asymptotic p = exp(-2 n D^2),
+    n = n1 * n2 / (n1 + n2).
+    """
+    if not baseline.count or not candidate.count:
+        return 0.0, 1.0
+    if baseline.gamma != candidate.gamma:
+        raise ValueError("cannot compare sketches with different accuracy")
+
+    points: Dict[float, list] = {}
+    for x, f in baseline.cdf_points():
+        points.setdefault(x, [None, None])[0] = f
+    for x, f in candidate.cdf_points():
+        points.setdefault(x, [None, None])[1] = f
+
+    d = 0.0
+    fb = fc = 0.0
+    for x in sorted(points):
+        b, c = points[x]
+        if b is not None:
+            fb = b
+        if c is not None:
+            fc = c
+        d = max(d, fb - fc)
+
+    n = baseline.count * candidate.count / (baseline.count + candidate.count)
+    return d, min(1.0, math.exp(-2.0 * n * d * d))
@@ -0,0 +1,74 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from agentzen.replay.loader import iter_records
+
+from .suite import _write_trace
+
+
+# ---------------------------------------------------------------------
+# BINARY FORMAT BENCHMARK
+#
+#   python -m agentzen.bench.binary [--spans N]
+#
+# Writes the same synthetic agent run (see suite.synthetic_trace) as
+# JSONL and as .azb (replay.binary) and compares file size and how
+# fast iter_records reads each back: all records, and only the
+# llm: spans (a name_prefix filter, which .azb applies before
+# decoding the rest of a span).
+# ---------------------------------------------------------------------
+
+
+def _load(path: Path, **filters) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in iter_records(path, **filters):
+            pass
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(spans: int = 100_000) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        for fmt, suffix in (("jsonl", ".jsonl"), ("azb", ".azb")):
+            path = _write_trace(Path(tmp), spans, suffix)
+            full = _load(path)
+            filtered = _load(path, name_prefix="llm:")
+            results.append(
+                {
+                    "format": fmt,
+                    "spans": spans,
+                    "bytes": path.stat().st_size,
+                    "load_spans_per_s": spans / full,
+                    "load_mb_per_s": path.stat().st_size / full / 1e6,
+                    "filtered_spans_per_s": spans / filtered,
+                }
+            )
+    return results
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    spans = int(get_option(argv, "--spans", "100000"))
+
+    print(
+        f"{'format':<7} {'spans':>8} {'bytes':>12} {'bytes/span':>11}"
+        f" {'load spans/s':>13} {'MB/s':>7} {'llm: only':>12}"
+    )
+    for r in run(spans):
+        print(
+            f"{r['format']:<7} {r['spans']:>8} {r['bytes']:>12,} {r['bytes'] / r['spans']:>11.1f}"
+            f" {r['load_spans_per_s']:>13,.0f} {r['load_mb_per_s']:>7.1f}"
+            f" {r['filtered_spans_per_s']:>12,.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
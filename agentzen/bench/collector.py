@@ -0,0 +1,133 @@
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from agentzen.replay.loader import LoadStats, iter_records
+
+
+# ---------------------------------------------------------------------
+# COLLECTOR THROUGHPUT BENCHMARK
+#
+#   python -m agentzen.bench.collector [--producers N] [--spans N] [--tcp]
+#
+# N producer processes trace the same synthetic workload into one
+# JSONL store, either through an in-process collector ("collector")
+# or by appending to the shared file directly ("shared-file"). Time
+# runs from the moment all producers are released until every span
+# is on disk; the store is then read back and its corrupt lines
+# (interleaved partial writes) are counted.
+# ---------------------------------------------------------------------
+
+_SPANS_PER_TRACE = 4
+
+
+def _produce(mode: str, target: str, spans: int, start: Any):
+    from agentzen.tracing.tracer import Tracer
+
+    if mode == "collector":
+        from agentzen.exporters.collector import CollectorExporter
+
+        exporter = CollectorExporter(target)
+    else:
+        from agentzen.exporters.jsonl import JSONLExporter
+
+        exporter = JSONLExporter(target)
+
+    tracer = Tracer(exporter)
+    prompt = "Summarize the search results for the user. " * 8
+    start.wait()
+    for i in range(spans // _SPANS_PER_TRACE):
+        with tracer.trace("agent:run", {"request": i}):
+            with tracer.trace("llm:call", {"prompt": prompt}) as span:
+                span.output = {"text": "calling search", "token_usage": {"total": 120}}
+            with tracer.trace("tool:search", {"query": "revenue by region"}) as span:
+                span.output = {"results": [{"id": n, "score": 1 / (n + 1)} for n in range(5)]}
+            with tracer.decision("route", options=["search", "answer"], chosen="answer"):
+                pass
+    if hasattr(exporter, "shutdown"):
+        exporter.shutdown()
+    if hasattr(exporter, "stats") and exporter.stats().get("dropped_spans"):
+        print(exporter.stats(), file=sys.stderr)
+
+
+def run(producers: int = 4, spans: int = 20_000, tcp: bool = False) -> List[Dict[str, Any]]:
+    from agentzen.cli.collect import Collector, make_exporter
+
+    spans -= spans % _SPANS_PER_TRACE
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+
+    for mode in ("collector", "shared-file"):
+        with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+            store = Path(tmp) / "trace.jsonl"
+            collector = None
+            target = str(store)
+            if mode == "collector":
+                target = "tcp://127.0.0.1:0" if tcp else f"unix:{tmp}/collector.sock"
+                exporter = make_exporter(store)
+                collector = Collector(exporter, [target])
+                collector.start()
+                if tcp:
+                    port = collector._servers[0].server_address[1]
+                    target = f"tcp://127.0.0.1:{port}"
+
+            start = ctx.Event()
+            procs = [
+                ctx.Process(target=_produce, args=(mode, target, spans, start))
+                for _ in range(producers)
+            ]
+            for p in procs:
+                p.start()
+            # Let the producers finish importing before the clock starts.
+            time.sleep(1.0)
+
+            t0 = time.perf_counter()
+            start.set()
+            for p in procs:
+                p.join()
+            if collector is not None:
+                collector.stop()
+                exporter.shutdown()
+            elapsed = time.perf_counter() - t0
+
+            stats = LoadStats()
+            for _ in iter_records(store, stats=stats):
+                pass
+            total = producers * spans
+            results.append(
+                {
+                    "mode": mode,
+                    "producers": producers,
+                    "spans": total,
+                    "stored": stats.records,
+                    "corrupt": stats.corrupt,
+                    "seconds": elapsed,
+                    "spans_per_s": total / elapsed,
+                }
+            )
+    return results
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    producers = int(get_option(argv, "--producers", "4"))
+    spans = int(get_option(argv, "--spans", "20000"))
+
+    print(
+        f"{'mode':<12} {'producers':>9} {'spans':>9} {'stored':>9}"
+        f" {'corrupt':>8} {'seconds':>8} {'spans/s':>10}"
+    )
+    for r in run(producers, spans, tcp="--tcp" in argv):
+        print(
+            f"{r['mode']:<12} {r['producers']:>9} {r['spans']:>9} {r['stored']:>9}"
+            f" {r['corrupt']:>8} {r['seconds']:>8.2f} {r['spans_per_s']:>10,.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
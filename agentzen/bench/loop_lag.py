@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agentzen.analysis.sketch import QuantileSketch
+
+
+# ---------------------------------------------------------------------
+# EVENT-LOOP LAG BENCHMARK
+#
+#   python -m agentzen.bench.loop_lag [--rate N] [--seconds S] [--disk-latency S]
+#
+# An asyncio agent runs N traced steps per second (an agent:step
+# span with an llm:call under it, carrying a 2KB attribute) while a
+# ticker task asks to wake up every millisecond; how late it wakes
+# up is the loop lag. The same workload runs without tracing, with a
+# JSONLExporter called inline, and with Tracer(nonblocking=True)
+# (see exporters.aio). --disk-latency makes the exporter sleep that
+# long per root span, to stand in for a slow or contended disk.
+# ---------------------------------------------------------------------
+
+_TICK = 0.001
+
+
+class _SlowDisk:
+    def __init__(self, exporter: Any, latency: float):
+        self.exporter = exporter
+        self.latency = latency
+
+    def export(self, span: Any):
+        if self.latency and span.parent_id is None:
+            time.sleep(self.latency)
+        self.exporter.export(span)
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+
+async def _ticker(lags: QuantileSketch, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(_TICK)
+        lags.add(max(0.0, loop.time() - t0 - _TICK))
+
+
+async def _agent(tracer: Any, rate: int, seconds: float):
+    payload = "x" * 2048
+    interval = 1.0 / rate
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for i in range(int(rate * seconds)):
+        if tracer is None:
+            await asyncio.sleep(0)
+        else:
+            with tracer.trace("agent:step", {"i": i}):
+                with tracer.trace("llm:call", {"prompt": payload}):
+                    await asyncio.sleep(0)
+        delay = start + (i + 1) * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _measure(mode: str, rate: int, seconds: float, path: Optional[Path], latency: float):
+    from agentzen.exporters.jsonl import JSONLExporter
+    from agentzen.tracing.tracer import Tracer
+
+    tracer = None
+    if mode != "no tracing":
+        exporter = _SlowDisk(JSONLExporter(str(path)), latency)
+        tracer = Tracer(exporter, nonblocking=mode == "nonblocking")
+
+    lags = QuantileSketch(0.01)
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(lags, stop))
+    await _agent(tracer, rate, seconds)
+    stop.set()
+    await ticker
+
+    if tracer is not None:
+        if mode == "nonblocking":
+            await tracer.exporter.aclose()
+        else:
+            exporter.shutdown()
+    return lags
+
+
+def run(rate: int = 1000, seconds: float = 3.0, latency: float = 0.0005) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        for mode in ("no tracing", "inline", "nonblocking"):
+            path = Path(tmp) / f"{mode.replace(' ', '-')}.jsonl"
+            lags = asyncio.run(_measure(mode, rate, seconds, path, latency))
+            results.append(
+                {
+                    "mode": mode,
+                    "ticks": lags.count,
+                    "p50_ms": lags.quantile(0.5) * 1e3,
+                    "p99_ms": lags.quantile(0.99) * 1e3,
+                    "max_ms": lags.max * 1e3,
+                }
+            )
+    return results
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    rate = int(get_option(argv, "--rate", "1000"))
+    seconds = float(get_option(argv, "--seconds", "3"))
+    latency = float(get_option(argv, "--disk-latency", "0.0005"))
+
+    print(f"{'mode':<12} {'ticks':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in run(rate, seconds, latency):
+        print(
+            f"{r['mode']:<12} {r['ticks']:>7} {r['p50_ms']:>8.2f}"
+            f" {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,222 @@
+import gzip
+import json
+import multiprocessing
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ---------------------------------------------------------------------
+# OTLP EXPORTER BENCHMARK
+#
+#   python -m agentzen.bench.otlp [--spans N] [--fail-every N] [--latency S]
+#
+# Traces a synthetic workload into an OTLPExporter pointed at a local
+# stand-in OTLP/HTTP receiver (in a child process, as a real backend
+# would be) and reports throughput, bytes on the wire, connections
+# opened, retries, and the Python memory held by the exporter
+# (tracemalloc peak, per span). --fail-every makes the receiver
+# answer every Nth request with 503, --latency delays every answer,
+# to exercise retries and the non-blocking queue.
+# ---------------------------------------------------------------------
+
+
+class OTLPReceiver:
+    """
+    Minimal OTLP/HTTP JSON receiver for tests and benchmarks.
+
+    Decodes (and gunzips) every POST, keeps the spans, and counts
+    requests and connections. fail_every=N answers every Nth
+    request with 503 instead.
+    """
+
+    def __init__(self, fail_every: int = 0, latency: float = 0.0, keep: bool = True):
+        self.fail_every = fail_every
+        self.latency = latency
+        self.keep = keep
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self.connections = 0
+        self.span_count = 0
+        self.spans: List[Dict[str, Any]] = []
+        self.resources: List[Dict[str, Any]] = []
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; with Nagle on,
+            # every answer would wait out the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with receiver.lock:
+                    receiver.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                if receiver.latency:
+                    time.sleep(receiver.latency)
+
+                with receiver.lock:
+                    receiver.requests += 1
+                    fail = receiver.fail_every and receiver.requests % receiver.fail_every == 0
+                    if fail:
+                        receiver.rejected += 1
+                    else:
+                        receiver._accept(json.loads(body))
+
+                status, reply = (503, b"{}") if fail else (200, b"{}")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                if fail:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}/v1/traces"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _accept(self, request: Dict[str, Any]):
+        for resource_spans in request.get("resourceSpans", []):
+            if self.keep:
+                self.resources.append(resource_spans.get("resource", {}))
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                spans = scope_spans.get("spans", [])
+                self.span_count += len(spans)
+                if self.keep:
+                    self.spans.extend(spans)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _serve(conn: Any, fail_every: int, latency: float):
+    receiver = OTLPReceiver(fail_every=fail_every, latency=latency, keep=False)
+    conn.send(receiver.endpoint)
+    while conn.recv() == "count":
+        conn.send(receiver.span_count)
+    receiver.close()
+
+
+def _workload(tracer: Any, traces: int):
+    prompt = "Summarize the search results for the user. " * 8
+    for i in range(traces):
+        with tracer.trace("agent:run", {"request": i}):
+            with tracer.trace("llm:call", {"prompt": prompt, "model": "gpt-4o"}) as span:
+                span.output = {"text": "calling search", "token_usage": {"total": 120}}
+            with tracer.trace("tool:search", {"query": "revenue by region"}) as span:
+                span.output = {"results": [{"id": n, "score": 1 / (n + 1)} for n in range(5)]}
+            with tracer.decision("route", options=["search", "answer"], chosen="answer", confidence=0.8):
+                pass
+
+
+def _export(
+    endpoint: str,
+    traces: int,
+    compression: Optional[str],
+) -> Tuple[float, float, Dict[str, Any]]:
+    from agentzen.exporters.otlp import OTLPExporter
+    from agentzen.tracing.tracer import Tracer
+
+    exporter = OTLPExporter(
+        endpoint,
+        compression=compression,
+        max_queue_size=traces * 4,
+        initial_backoff=0.01,
+    )
+    tracer = Tracer(exporter)
+
+    t0 = time.perf_counter()
+    _workload(tracer, traces)
+    traced = time.perf_counter() - t0
+    exporter.flush()
+    total = time.perf_counter() - t0
+
+    stats = exporter.stats()
+    exporter.shutdown()
+    return traced, total, stats
+
+
+def run(
+    spans: int = 100_000,
+    fail_every: int = 0,
+    latency: float = 0.0,
+    compression: Optional[str] = "gzip",
+) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    conn, child_conn = ctx.Pipe()
+    server = ctx.Process(target=_serve, args=(child_conn, fail_every, latency), daemon=True)
+    server.start()
+    traces = spans // 4
+    try:
+        endpoint = conn.recv()
+        traced, total, stats = _export(endpoint, traces, compression)
+        conn.send("count")
+        received = conn.recv()
+
+        # Memory is measured in a second pass: tracemalloc slows
+        # everything down too much to time the same run.
+        tracemalloc.start()
+        _export(endpoint, traces, compression)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        conn.send("close")
+        server.join()
+
+    return {
+        "spans": traces * 4,
+        "received": received,
+        "compression": compression or "none",
+        "traced_spans_per_s": traces * 4 / traced,
+        "exported_spans_per_s": traces * 4 / total,
+        "bytes_per_span": stats["bytes_sent"] / max(1, stats["spans_sent"]),
+        "peak_bytes_per_span": peak / (traces * 4),
+        "requests": stats["requests"],
+        "retries": stats["retries"],
+        "connections": stats["connections"],
+        "dropped": stats["dropped_oldest"] + stats["dropped_newest"],
+    }
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    spans = int(get_option(argv, "--spans", "100000"))
+    fail_every = int(get_option(argv, "--fail-every", "0"))
+    latency = float(get_option(argv, "--latency", "0"))
+
+    for compression in ("gzip", None):
+        r = run(spans, fail_every=fail_every, latency=latency, compression=compression)
+        print(f"compression={r['compression']}")
+        print(f"  spans          {r['spans']:>10,}  received {r['received']:,}")
+        print(f"  traced         {r['traced_spans_per_s']:>10,.0f} spans/s (caller side)")
+        print(f"  exported       {r['exported_spans_per_s']:>10,.0f} spans/s (until flushed)")
+        print(f"  wire           {r['bytes_per_span']:>10.1f} bytes/span")
+        print(f"  memory peak    {r['peak_bytes_per_span']:>10.1f} bytes/span")
+        print(
+            f"  requests       {r['requests']:>10}  retries {r['retries']}"
+            f"  connections {r['connections']}  dropped {r['dropped']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
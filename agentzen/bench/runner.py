@@ -0,0 +1,193 @@
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .suite import Case, SkipBenchmark
+
+FORMAT = "agentzen-bench"
+VERSION = 1
+
+
+# ---------------------------------------------------------------------
+# TIMING
+#
+# Like timeit: the number of calls per round is raised (1, 2, 5, 10,
+# 20, ...) until a round takes at least min_time, then the best and
+# median per-unit times of several rounds are kept. Rounds run with
+# the cyclic GC off, after a collection, so one benchmark's garbage
+# is not billed to the next. Slow cases (a round over a second) get
+# fewer rounds to keep the whole suite runnable.
+# ---------------------------------------------------------------------
+
+def _time(run: Callable[[], Any], loops: int) -> float:
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            run()
+        return time.perf_counter() - t0
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure(
+    run: Callable[[], Any],
+    ops: int,
+    min_time: float = 0.2,
+    rounds: int = 5,
+) -> Dict[str, Any]:
+    loops = 1
+    while True:
+        elapsed = _time(run, loops)
+        if elapsed >= min_time:
+            break
+        for factor in (2, 5, 10):
+            if elapsed * factor >= min_time or factor == 10:
+                loops *= factor
+                break
+
+    if elapsed > 1.0:
+        rounds = min(rounds, 3)
+    samples = [_time(run, loops) / (loops * ops) for _ in range(rounds)]
+    return {
+        "ops": ops,
+        "loops": loops,
+        "rounds": samples,
+        "best": min(samples),
+        "median": statistics.median(samples),
+    }
+
+
+def run_cases(
+    selected: List[Case],
+    min_time: float = 0.2,
+    rounds: int = 5,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, unit, fn, kwargs in selected:
+        gen = fn(**kwargs)
+        try:
+            run, ops = next(gen)
+            result = measure(run, ops, min_time=min_time, rounds=rounds)
+        except SkipBenchmark as e:
+            result = {"skipped": str(e)}
+        finally:
+            gen.close()
+        result["unit"] = unit
+        results[name] = result
+        if progress is not None:
+            progress(name, result)
+
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "created": time.time(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------
+# BASELINES
+# ---------------------------------------------------------------------
+
+def save(report: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("format") != FORMAT:
+        raise ValueError(f"{path} is not an agentzen bench report")
+    return report
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.15,
+) -> List[Dict[str, Any]]:
+    """
+    One row per benchmark of current. A benchmark regresses when its
+    best time is more than threshold (relative) slower than the
+    baseline's; best-of-rounds is the least noisy statistic for
+    micro-benchmarks.
+    """
+    rows = []
+    old_results = baseline.get("results", {})
+    for name, new in current.get("results", {}).items():
+        old = old_results.get(name)
+        row = {"name": name, "baseline": None, "current": new.get("best"), "change": None}
+        if "skipped" in new:
+            row["status"] = "skipped"
+        elif old is None or "best" not in old:
+            row["status"] = "new"
+        else:
+            row["baseline"] = old["best"]
+            row["change"] = new["best"] / old["best"] - 1.0 if old["best"] > 0 else 0.0
+            if row["change"] > threshold:
+                row["status"] = "regression"
+            elif row["change"] < -threshold:
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def fmt_time(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1.0:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f}µs"
+    return f"{seconds * 1e9:.0f}ns"
+
+
+def print_result(name: str, result: Dict[str, Any]):
+    if "skipped" in result:
+        print(f"{name:<40} skipped: {result['skipped']}")
+        return
+    per_sec = 1.0 / result["best"] if result["best"] > 0 else float("inf")
+    print(
+        f"{name:<40} {fmt_time(result['best']):>10} {fmt_time(result['median']):>10}"
+        f" {per_sec:>12,.0f} {result['unit']}/s"
+    )
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    print(f"\n{'benchmark':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for r in rows:
+        change = f"{r['change'] * 100:+.1f}%" if r["change"] is not None else "-"
+        mark = {"regression": "  ✖", "improved": "  ✓"}.get(r["status"], "")
+        if r["status"] in ("new", "skipped"):
+            mark = f"  ({r['status']})"
+        print(
+            f"{r['name']:<40} {fmt_time(r['baseline']):>10} {fmt_time(r['current']):>10}"
+            f" {change:>8}{mark}"
+        )
+
+    regressions = [r for r in rows if r["status"] == "regression"]
+    print()
+    if regressions:
+        print(f"REGRESSIONS DETECTED ({len(regressions)} over {threshold * 100:.0f}%)")
+    else:
+        print(f"NO REGRESSIONS (threshold {threshold * 100:.0f}%)")
+    sys.stdout.flush()
@@ -0,0 +1,139 @@
+import datetime
+import json
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from agentzen.exporters.jsonl import span_record
+from agentzen.exporters.serialize import SpanSerializer, orjson
+from agentzen.tracing.span import TraceSpan
+
+
+# ---------------------------------------------------------------------
+# SERIALIZATION MICRO-BENCHMARK
+#
+#   python -m agentzen.bench.serialization [--iterations N]
+#
+# Encodes typical span records with each available strategy and
+# reports time per record and throughput. "stdlib" is what exporters
+# did before SpanSerializer (json.dumps, which rejects most of the
+# objects below; it gets default=str here so it can be measured).
+# ---------------------------------------------------------------------
+
+
+class _Usage:
+    # Stand-in for an SDK response object (pydantic-style).
+    def __init__(self, prompt: int, completion: int):
+        self.prompt_tokens = prompt
+        self.completion_tokens = completion
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+def _span(name: str, attributes: Dict[str, Any], output: Any) -> Dict[str, Any]:
+    span = TraceSpan(name=name, trace_id=uuid.uuid4().hex, attributes=attributes)
+    span.finish()
+    span.output = output
+    return span_record(span)
+
+
+def payloads() -> Dict[str, Dict[str, Any]]:
+    system = "You are a careful assistant. Follow the tool schema exactly. " * 40
+    messages = [{"role": "system", "content": system}] + [
+        {"role": "user" if i % 2 else "assistant", "content": f"step {i}: " + "lorem ipsum " * 30}
+        for i in range(12)
+    ]
+    return {
+        "llm_call": _span(
+            "llm:call",
+            {"model": "gpt-4o", "temperature": 0.2, "messages": messages},
+            {
+                "text": "Calling search with the refined query. " * 20,
+                "token_usage": {"prompt_tokens": 2311, "completion_tokens": 188},
+                "finish_reason": "tool_calls",
+            },
+        ),
+        "llm_call_objects": _span(
+            "llm:call",
+            {"model": "gpt-4o", "request_id": uuid.uuid4(), "sent_at": datetime.datetime.now()},
+            {"text": "ok " * 200, "usage": _Usage(2311, 188), "stop": {"tool_calls"}},
+        ),
+        "tool_result": _span(
+            "tool:search",
+            {"query": "quarterly revenue by region", "top_k": 20},
+            {
+                "results": [
+                    {"id": i, "title": f"Result {i}", "score": 1.0 / (i + 1), "snippet": "text " * 40}
+                    for i in range(20)
+                ]
+            },
+        ),
+        "decision": _span(
+            "agent:decision:route",
+            {
+                "type": "decision",
+                "options": ["search", "answer", "ask_user"],
+                "chosen": "search",
+                "confidence": 0.82,
+            },
+            None,
+        ),
+    }
+
+
+def _strategies() -> Dict[str, Callable[[Any], bytes]]:
+    strategies = {
+        "stdlib": lambda r: (json.dumps(r, default=str) + "\n").encode("utf-8"),
+        "serializer (json)": lambda r, s=SpanSerializer(fast=False): s.dumps(r, newline=True),
+    }
+    if orjson is not None:
+        strategies["serializer (orjson)"] = lambda r, s=SpanSerializer(): s.dumps(r, newline=True)
+    return strategies
+
+
+def run(iterations: int = 2000) -> List[Dict[str, Any]]:
+    results = []
+    for payload, record in payloads().items():
+        for strategy, encode in _strategies().items():
+            size = len(encode(record))
+            best = float("inf")
+            # Best of 5 rounds: the least disturbed by the rest of the machine.
+            for _ in range(5):
+                t0 = time.perf_counter()
+                for _ in range(iterations):
+                    encode(record)
+                best = min(best, time.perf_counter() - t0)
+            per_op = best / iterations
+            results.append(
+                {
+                    "payload": payload,
+                    "strategy": strategy,
+                    "bytes": size,
+                    "us_per_op": per_op * 1e6,
+                    "mb_per_s": size / per_op / 1e6,
+                }
+            )
+    return results
+
+
+def main(argv: List[str]) -> int:
+    iterations = 2000
+    if "--iterations" in argv:
+        iterations = int(argv[argv.index("--iterations") + 1])
+
+    print(f"{'payload':<18} {'strategy':<20} {'bytes':>8} {'µs/op':>9} {'MB/s':>8}")
+    for r in run(iterations):
+        print(
+            f"{r['payload']:<18} {r['strategy']:<20} {r['bytes']:>8}"
+            f" {r['us_per_op']:>9.1f} {r['mb_per_s']:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
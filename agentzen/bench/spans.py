@@ -0,0 +1,143 @@
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List
+
+from agentzen.tracing.ids import new_span_id, new_trace_id
+from agentzen.tracing.span import TraceSpan
+
+
+# ---------------------------------------------------------------------
+# SPAN COST BENCHMARK
+#
+#   python -m agentzen.bench.spans [--spans N]
+#
+# What one span costs to hold and to create:
+#
+#   memory     bytes per finished span kept alive (tracemalloc over
+#              N spans), without and with an attributes dict
+#   create     TraceSpan construction + finish(), spans per second
+#   tracer     Tracer.trace() round trip into a no-op exporter
+#   ids        new_span_id() / new_trace_id() next to uuid4().hex,
+#              which every span used to call
+#
+# A plain object with a __dict__ holding the same fields is measured
+# alongside as the reference for what __slots__ saves.
+# ---------------------------------------------------------------------
+
+
+class _DictSpan:
+    # The layout spans had before __slots__: every field in an
+    # instance __dict__, attributes created eagerly.
+    def __init__(self, name: str, trace_id: str, parent_id: Any = None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex
+        self.parent_id = parent_id
+        self.trace_id = trace_id
+        self.start_time = time.time()
+        self.end_time = None
+        self.input = None
+        self.output = None
+        self.error = None
+        self.attributes: Dict[str, Any] = {}
+
+
+def _memory_per_span(make: Callable[[int], Any], spans: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [make(i) for i in range(spans)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list itself is not the span's cost.
+    return (after - before - sys.getsizeof(kept)) / spans
+
+
+def _rate(fn: Callable[[], Any], ops: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(ops):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return ops / best
+
+
+def run(spans: int = 100_000) -> List[Dict[str, Any]]:
+    from agentzen.tracing.tracer import Tracer
+
+    trace_id = new_trace_id()
+
+    def slots_span(i: int) -> TraceSpan:
+        span = TraceSpan(name="llm:call", trace_id=trace_id)
+        span.finish()
+        return span
+
+    def slots_span_attrs(i: int) -> TraceSpan:
+        span = TraceSpan(name="llm:call", trace_id=trace_id, attributes={"model": "gpt-4o"})
+        span.finish()
+        return span
+
+    def dict_span(i: int) -> _DictSpan:
+        span = _DictSpan("llm:call", trace_id)
+        span.end_time = time.time()
+        return span
+
+    def dict_span_attrs(i: int) -> _DictSpan:
+        span = dict_span(i)
+        span.attributes["model"] = "gpt-4o"
+        return span
+
+    results = []
+    for label, make in (
+        ("TraceSpan", slots_span),
+        ("TraceSpan + attributes", slots_span_attrs),
+        ("__dict__ span", dict_span),
+        ("__dict__ span + attributes", dict_span_attrs),
+    ):
+        results.append(
+            {
+                "case": label,
+                "bytes_per_span": _memory_per_span(make, spans),
+                "per_s": _rate(lambda: make(0), spans // 10),
+            }
+        )
+
+    class _Null:
+        def export(self, span: Any):
+            pass
+
+    tracer = Tracer(_Null())
+
+    def traced():
+        with tracer.trace("agent:run"):
+            pass
+
+    results.append({"case": "Tracer.trace()", "bytes_per_span": None, "per_s": _rate(traced, spans // 10)})
+    for label, fn in (
+        ("new_span_id()", new_span_id),
+        ("new_trace_id()", new_trace_id),
+        ("uuid4().hex", lambda: uuid.uuid4().hex),
+    ):
+        results.append({"case": label, "bytes_per_span": None, "per_s": _rate(fn, spans)})
+    return results
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    spans = int(get_option(argv, "--spans", "100000"))
+
+    print(f"{'case':<28} {'bytes/span':>11} {'per second':>12}")
+    for r in run(spans):
+        size = "-" if r["bytes_per_span"] is None else f"{r['bytes_per_span']:.0f}"
+        print(f"{r['case']:<28} {size:>11} {r['per_s']:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
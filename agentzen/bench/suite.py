@@ -0,0 +1,441 @@
+import asyncio
+import contextlib
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agentzen.tracing.span import TraceSpan
+from agentzen.tracing.tracer import Tracer
+
+
+# ---------------------------------------------------------------------
+# BENCHMARK REGISTRY
+#
+# A benchmark is a generator function. It sets up, yields
+# (run, ops) once, and cleans up when closed:
+#
+#   @benchmark("tracer.trace", unit="span", depth=(1, 4, 16))
+#   def bench_trace(depth):
+#       tracer = Tracer(NullExporter())
+#       yield (lambda: ...), depth
+#
+# run() is timed; ops is how many units one call processes, so
+# results are reported per span / per record. Keyword ranges expand
+# into one case per value: tracer.trace[depth=4]. Cases with a
+# "size" parameter are limited by the runner's size cap.
+# ---------------------------------------------------------------------
+
+Case = Tuple[str, str, Callable[..., Iterator], Dict[str, Any]]
+
+_BENCHMARKS: List[Case] = []
+
+
+class SkipBenchmark(Exception):
+    """
+    Raised by a benchmark's setup when it cannot run here.
+    """
+
+
+def benchmark(name: str, unit: str = "op", **params):
+    def decorator(fn):
+        if not params:
+            _BENCHMARKS.append((name, unit, fn, {}))
+            return fn
+        (key, values), = params.items()
+        for value in values:
+            _BENCHMARKS.append((f"{name}[{key}={value}]", unit, fn, {key: value}))
+        return fn
+
+    return decorator
+
+
+def cases(pattern: Optional[str] = None, max_size: Optional[int] = None) -> List[Case]:
+    selected = []
+    for case in _BENCHMARKS:
+        name, _, _, kwargs = case
+        if pattern and pattern not in name:
+            continue
+        if max_size is not None and kwargs.get("size", 0) > max_size:
+            continue
+        selected.append(case)
+    return selected
+
+
+# ---------------------------------------------------------------------
+# FIXTURES
+# ---------------------------------------------------------------------
+
+SIZES = (10, 1_000, 100_000, 1_000_000)
+
+
+class NullExporter:
+    def export(self, span: Any):
+        pass
+
+
+def synthetic_trace(spans: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Records of one agent run of (about) the given number of spans,
+    in export order: each step is an agent:step span with an LLM
+    call, a tool call and a routing decision under it, and the
+    agent:run root comes last.
+    """
+    rng = random.Random(seed)
+    trace_id = "%032x" % rng.getrandbits(128)
+    root_id = "%016x" % rng.getrandbits(64)
+    records = []
+    t = 1_700_000_000.0
+    next_id = 1
+
+    def record(name, parent, start, end, attributes=None, output=None):
+        nonlocal next_id
+        next_id += 1
+        records.append({
+            "name": name,
+            "span_id": "%016x" % next_id,
+            "parent_id": parent,
+            "trace_id": trace_id,
+            "start_time": start,
+            "end_time": end,
+            "output": output,
+            "error": None,
+            "attributes": attributes or {},
+        })
+        return records[-1]["span_id"]
+
+    for _ in range(max(0, (spans - 1) // 4)):
+        step_id = "%016x" % (next_id + 4)
+        start = t
+        record(
+            "llm:call", step_id, t, t + 0.8,
+            {"model": "gpt-4o"},
+            {"token_usage": {"prompt_tokens": rng.randint(500, 3000), "completion_tokens": 120}},
+        )
+        record("tool:search", step_id, t + 0.8, t + 1.1, {"query": "status"})
+        chosen = rng.choice(["search", "answer", "ask_user"])
+        record(
+            "agent:decision:route", step_id, t + 1.1, t + 1.11,
+            {
+                "type": "decision",
+                "options": ["search", "answer", "ask_user"],
+                "chosen": chosen,
+                "confidence": round(rng.uniform(0.3, 1.0), 2),
+            },
+        )
+        t += 1.2
+        records.append({
+            "name": "agent:step",
+            "span_id": step_id,
+            "parent_id": root_id,
+            "trace_id": trace_id,
+            "start_time": start,
+            "end_time": t,
+            "output": None,
+            "error": None,
+            "attributes": {},
+        })
+        next_id += 1
+
+    records.append({
+        "name": "agent:run",
+        "span_id": root_id,
+        "parent_id": None,
+        "trace_id": trace_id,
+        "start_time": 1_700_000_000.0,
+        "end_time": t,
+        "output": None,
+        "error": None,
+        "attributes": {"agent": "bench"},
+    })
+    return records
+
+
+def finished_spans(count: int) -> List[TraceSpan]:
+    spans = []
+    for record in synthetic_trace(count)[:count]:
+        spans.append(TraceSpan(**record))
+    return spans
+
+
+def _write_trace(directory: Path, size: int, suffix: str) -> Path:
+    from agentzen.exporters.binary import BinaryExporter
+    from agentzen.exporters.serialize import dumps
+
+    path = directory / f"trace-{size}{suffix}"
+    records = synthetic_trace(size)
+    if suffix == ".azb":
+        exporter = BinaryExporter(str(path))
+        for record in records:
+            exporter.write_record(record)
+        exporter.shutdown()
+    else:
+        with path.open("wb") as f:
+            for record in records:
+                f.write(dumps(record, newline=True))
+    return path
+
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+# ---------------------------------------------------------------------
+# TRACER
+# ---------------------------------------------------------------------
+
+@benchmark("tracer.trace", unit="span", depth=(1, 4, 16))
+def bench_trace(depth: int):
+    tracer = Tracer(NullExporter())
+
+    def run():
+        with contextlib.ExitStack() as stack:
+            for _ in range(depth):
+                stack.enter_context(tracer.trace("step", {"i": 1}))
+
+    yield run, depth
+
+
+@benchmark("tracer.trace.unsampled", unit="span")
+def bench_trace_unsampled():
+    from agentzen.tracing.sampling import TraceIdRatioSampler
+
+    tracer = Tracer(NullExporter(), sampler=TraceIdRatioSampler(0.0))
+
+    def run():
+        with tracer.trace("root"):
+            with tracer.trace("child"):
+                pass
+
+    yield run, 2
+
+
+@benchmark("tracer.decision", unit="decision", depth=(1, 4, 16))
+def bench_decision(depth: int):
+    tracer = Tracer(NullExporter())
+    with contextlib.ExitStack() as stack:
+        # The decision is recorded under depth - 1 open spans.
+        for _ in range(depth - 1):
+            stack.enter_context(tracer.trace("parent"))
+
+        def run():
+            with tracer.decision("route", options=["a", "b", "c"], chosen="b", confidence=0.9):
+                pass
+
+        yield run, 1
+
+
+@benchmark("decorators.trace_async_step", unit="call")
+def bench_async_step():
+    from agentzen.tracing.decorators import trace_async_step
+
+    tracer = Tracer(NullExporter())
+
+    @trace_async_step(tracer, "step")
+    async def step(x):
+        return x
+
+    async def batch():
+        for i in range(100):
+            await step(i)
+
+    loop = asyncio.new_event_loop()
+    try:
+        yield (lambda: loop.run_until_complete(batch())), 100
+    finally:
+        loop.close()
+
+
+@benchmark("integrations.langchain", unit="callback")
+def bench_langchain():
+    # One chain run around an LLM call streaming 20 tokens: 24
+    # callbacks, 2 spans.
+    try:
+        from agentzen.integrations.langchain import AgentZenLangChainCallback
+    except ImportError:
+        raise SkipBenchmark("langchain is not installed")
+
+    from types import SimpleNamespace
+
+    handler = AgentZenLangChainCallback(Tracer(NullExporter()))
+    response = SimpleNamespace(
+        generations=[[SimpleNamespace(text="", message=SimpleNamespace(content=""))]],
+        llm_output={"model_name": "bench"},
+    )
+    tokens = ["tok"] * 20
+
+    async def run_chain():
+        await handler.on_chain_start({"name": "chain"}, {"q": "?"}, run_id="chain")
+        await handler.on_chat_model_start(
+            {"name": "chat"},
+            [[SimpleNamespace(type="human", content="?")]],
+            run_id="llm",
+            parent_run_id="chain",
+        )
+        for token in tokens:
+            await handler.on_llm_new_token(token, run_id="llm")
+        await handler.on_llm_end(response, run_id="llm")
+        await handler.on_chain_end({"a": "!"}, run_id="chain")
+
+    loop = asyncio.new_event_loop()
+    try:
+        yield (lambda: loop.run_until_complete(run_chain())), 4 + len(tokens)
+    finally:
+        loop.close()
+
+
+# ---------------------------------------------------------------------
+# EXPORTERS
+# ---------------------------------------------------------------------
+
+def _exporter_bench(make: Callable[[Path], Any], batch: int = 1000):
+    spans = finished_spans(batch)
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        exporter = make(Path(tmp))
+
+        def run():
+            for span in spans:
+                exporter.export(span)
+            if hasattr(exporter, "flush"):
+                exporter.flush()
+
+        try:
+            yield run, len(spans)
+        finally:
+            if hasattr(exporter, "shutdown"):
+                exporter.shutdown()
+
+
+@benchmark("exporter.jsonl", unit="span")
+def bench_jsonl():
+    from agentzen.exporters.jsonl import JSONLExporter
+
+    yield from _exporter_bench(lambda d: JSONLExporter(str(d / "t.jsonl")))
+
+
+@benchmark("exporter.jsonl.batch", unit="span")
+def bench_jsonl_batch():
+    from agentzen.exporters.jsonl import JSONLExporter
+
+    yield from _exporter_bench(lambda d: JSONLExporter(str(d / "t.jsonl"), batch=True))
+
+
+@benchmark("exporter.jsonl.index", unit="span")
+def bench_jsonl_index():
+    from agentzen.exporters.jsonl import JSONLExporter
+
+    yield from _exporter_bench(
+        lambda d: JSONLExporter(str(d / "t.jsonl"), batch=True, index=True)
+    )
+
+
+@benchmark("exporter.binary", unit="span")
+def bench_binary():
+    from agentzen.exporters.binary import BinaryExporter
+
+    yield from _exporter_bench(lambda d: BinaryExporter(str(d / "t.azb")))
+
+
+@benchmark("exporter.binary.batch", unit="span")
+def bench_binary_batch():
+    from agentzen.exporters.binary import BinaryExporter
+
+    yield from _exporter_bench(lambda d: BinaryExporter(str(d / "t.azb"), batch=True))
+
+
+@benchmark("exporter.memory", unit="span")
+def bench_memory():
+    from agentzen.exporters.memory import MemoryExporter
+
+    yield from _exporter_bench(lambda _: MemoryExporter())
+
+
+@benchmark("exporter.live", unit="span")
+def bench_live():
+    from agentzen.exporters.live import LiveAnalysisExporter
+
+    yield from _exporter_bench(lambda _: LiveAnalysisExporter(NullExporter()))
+
+
+@benchmark("exporter.tail_sampler", unit="span")
+def bench_tail_sampler():
+    from agentzen.tracing.sampling import TailSampler
+
+    yield from _exporter_bench(lambda _: TailSampler(NullExporter()))
+
+
+# ---------------------------------------------------------------------
+# SERIALIZATION
+# ---------------------------------------------------------------------
+
+@benchmark("serialize", unit="record", payload=("llm_call", "llm_call_objects", "tool_result", "decision"))
+def bench_serialize(payload: str):
+    from agentzen.bench.serialization import payloads
+    from agentzen.exporters.serialize import DEFAULT_SERIALIZER
+
+    record = payloads()[payload]
+    yield (lambda: DEFAULT_SERIALIZER.dumps(record, newline=True)), 1
+
+
+# ---------------------------------------------------------------------
+# LOADING + ANALYSIS
+# ---------------------------------------------------------------------
+
+@benchmark("load_trace.jsonl", unit="span", size=SIZES)
+def bench_load_trace(size: int):
+    from agentzen.replay.loader import load_trace
+
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        path = _write_trace(Path(tmp), size, ".jsonl")
+        yield (lambda: load_trace(str(path))), size
+
+
+@benchmark("load_spans.jsonl", unit="span", size=SIZES)
+def bench_load_spans(size: int):
+    from agentzen.cli.trace import load_spans
+
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        path = _write_trace(Path(tmp), size, ".jsonl")
+        yield (lambda: load_spans(path)), size
+
+
+@benchmark("load_spans.azb", unit="span", size=SIZES)
+def bench_load_spans_binary(size: int):
+    from agentzen.cli.trace import load_spans
+
+    with tempfile.TemporaryDirectory(prefix="agentzen-bench-") as tmp:
+        path = _write_trace(Path(tmp), size, ".azb")
+        yield (lambda: load_spans(path)), size
+
+
+@benchmark("analyze", unit="span", size=SIZES)
+def bench_analyze(size: int):
+    from agentzen.analysis.antipatterns import AntiPatternAnalyzer
+
+    records = synthetic_trace(size)
+    yield (lambda: AntiPatternAnalyzer(records).analyze()), len(records)
+
+
+@benchmark("print_trace", unit="span", size=SIZES)
+def bench_print_trace(size: int):
+    from agentzen.cli.trace import print_trace
+
+    records = synthetic_trace(size)
+
+    def run():
+        with contextlib.redirect_stdout(_Discard()):
+            print_trace(records[-1]["trace_id"], records)
+
+    yield run, len(records)
+
+
+@benchmark("profile", unit="span", size=SIZES)
+def bench_profile(size: int):
+    from agentzen.analysis.profile import TraceProfiler
+
+    records = synthetic_trace(size)
+    yield (lambda: TraceProfiler().add_trace(records[-1]["trace_id"], records)), len(records)
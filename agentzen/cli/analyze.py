@@ -0,0 +1,254 @@
+import heapq
+import os
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple
+
+from agentzen.replay.loader import LoadStats, group_traces, iter_records
+from agentzen.replay.segments import parse_segment, resolve_paths
+
+
+# ---------------------------------------------------------------------
+# PARALLEL TRACE ANALYSIS
+#
+# Work is split into tasks that run in a ProcessPoolExecutor:
+#
+#   shard="file"   one task per logical stream (a file, or all the
+#                  rotated segments of one file, so no trace is split)
+#   shard="trace"  one task per worker, each reading every stream but
+#                  keeping only the traces that hash to its shard
+#
+# Each task renders its traces into a spool file as it goes and
+# returns, per trace, only where its text sits in the spool and
+# which rules fired. The parent copies each trace's text to stdout
+# in input order, so the report is the same whatever the job count
+# and no task's output is held in memory or sent through the pool.
+# ---------------------------------------------------------------------
+
+# (order, offset, length, rules, exit code)
+TraceReport = Tuple[Tuple[int, int], int, int, List[str], int]
+
+# Round-trips any str print_trace can be given.
+_SPOOL_ERRORS = "surrogatepass"
+
+
+class _Spool:
+    """
+    Stand-in for stdout that writes a task's output to a file and
+    tracks how many bytes have been written.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self.offset = 0
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8", _SPOOL_ERRORS)
+        self._file.write(data)
+        self.offset += len(data)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._file.close()
+
+
+def stream_units(source) -> List[List[str]]:
+    """
+    Group the files behind source into logical streams.
+    """
+    units: Dict[Tuple[str, str], List[str]] = {}
+    for path in resolve_paths(source):
+        parsed = parse_segment(path)
+        key = (str(path.parent), parsed[0] if parsed else path.name)
+        units.setdefault(key, []).append(str(path))
+    return list(units.values())
+
+
+def in_time_range(spans, since: Optional[float], until: Optional[float]) -> bool:
+    if since is not None:
+        ends = [s["end_time"] for s in spans if s.get("end_time") is not None]
+        if not ends or max(ends) < since:
+            return False
+    if until is not None:
+        starts = [s["start_time"] for s in spans if s.get("start_time") is not None]
+        if not starts or min(starts) > until:
+            return False
+    return True
+
+
+def run_task(task: Dict[str, Any]) -> Tuple[List[TraceReport], int]:
+    """
+    Render and analyze every selected trace of one task into its
+    spool file.
+
+    Runs in a worker process; everything it touches is picklable.
+    Returns the per-trace reports and the number of corrupt lines.
+    """
+    from agentzen.cli.trace import analyze, print_trace
+
+    stats = LoadStats()
+    first_seen: Dict[Any, int] = {}
+
+    def records():
+        for record in iter_records(
+            task["paths"],
+            trace_id=task["trace_id"],
+            stats=stats,
+            shard=task["shard"],
+            payloads=task["payloads"],
+        ):
+            first_seen.setdefault(record.get("trace_id"), stats.lines)
+            yield record
+
+    reports: List[TraceReport] = []
+    out = _Spool(task["spool"])
+    try:
+        with redirect_stdout(out):
+            for trace_id, spans in group_traces(records()):
+                order = (task["unit"], first_seen.pop(trace_id, 0))
+                if not in_time_range(spans, task["since"], task["until"]):
+                    continue
+
+                findings: list = []
+                start = out.offset
+                print_trace(trace_id, spans)
+                code = 0
+                if task["analyze"]:
+                    code = analyze(spans, task["fail"], findings, task["rules"])
+                reports.append((
+                    order,
+                    start,
+                    out.offset - start,
+                    [f.rule or f.message for f in findings],
+                    code,
+                ))
+    finally:
+        out.close()
+
+    return reports, stats.corrupt
+
+
+def run_parallel(
+    source,
+    jobs: int,
+    shard: str = "file",
+    analyze: bool = False,
+    fail: bool = False,
+    trace_id: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    rules: Optional[Dict[str, Dict[str, Any]]] = None,
+    payloads: bool = False,
+) -> int:
+    """
+    Print every trace behind source, analyzed across jobs processes,
+    followed by a combined report. Returns the CLI exit code.
+    """
+    units = stream_units(source)
+    base = {
+        "trace_id": trace_id,
+        "since": since,
+        "until": until,
+        "analyze": analyze,
+        "fail": fail,
+        "rules": rules,
+        "payloads": payloads,
+    }
+
+    spool_dir = tempfile.TemporaryDirectory(prefix="agentzen-analyze-")
+    if shard == "trace":
+        paths = [p for unit in units for p in unit]
+        tasks = [
+            dict(base, paths=paths, unit=0, shard=(k, jobs)) for k in range(jobs)
+        ]
+    else:
+        tasks = [
+            dict(base, paths=unit, unit=i, shard=None) for i, unit in enumerate(units)
+        ]
+    for i, task in enumerate(tasks):
+        task["spool"] = os.path.join(spool_dir.name, f"task-{i}.out")
+
+    exit_code = 0
+    corrupt = 0
+    analyzed = 0
+    flagged = 0
+    rule_counts: Counter = Counter()
+
+    pool = None
+    if jobs > 1 and len(tasks) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(jobs, len(tasks)))
+    spools: Dict[int, Any] = {}
+    try:
+        results = pool.map(run_task, tasks) if pool else map(run_task, tasks)
+
+        def tagged(i, task_reports):
+            return ((order, i, offset, length, rules, code)
+                    for order, offset, length, rules, code in task_reports)
+
+        if shard == "trace":
+            # Every task covers the whole input: merge by stream
+            # position. Each task counted the corrupt lines of the
+            # traces it owns (see replay.loader.counts_unowned).
+            results = list(results)
+            corrupt = sum(task_corrupt for _, task_corrupt in results)
+            ordered = heapq.merge(
+                *(tagged(i, r) for i, (r, _) in enumerate(results)), key=lambda r: r[0]
+            )
+        else:
+            # Tasks come back in input order and each is already ordered.
+            def chained():
+                nonlocal corrupt
+                for i, (task_reports, task_corrupt) in enumerate(results):
+                    corrupt += task_corrupt
+                    yield from tagged(i, task_reports)
+                    _close_spool(spools, i)
+
+            ordered = chained()
+
+        for _, i, offset, length, rules, code in ordered:
+            spool = spools.get(i)
+            if spool is None:
+                spool = spools[i] = open(tasks[i]["spool"], "rb")
+            spool.seek(offset)
+            sys.stdout.write(spool.read(length).decode("utf-8", _SPOOL_ERRORS))
+            analyzed += 1
+            exit_code = max(exit_code, code)
+            if rules:
+                flagged += 1
+                rule_counts.update(set(rules))
+    finally:
+        for i in list(spools):
+            _close_spool(spools, i)
+        if pool is not None:
+            pool.shutdown()
+        spool_dir.cleanup()
+
+    if analyze:
+        print("\nCOMBINED REPORT")
+        print("---------------")
+        print(f"Files:                {sum(len(u) for u in units)}")
+        print(f"Traces analyzed:      {analyzed}")
+        print(f"Traces with findings: {flagged}")
+        for rule, count in sorted(rule_counts.items(), key=lambda kv: (-kv[1], kv[0])):
+            print(f"• {rule}: {count} trace(s)")
+
+    if corrupt:
+        print(f"\nSkipped {corrupt} corrupt line(s)", file=sys.stderr)
+
+    return exit_code
+
+
+def _close_spool(spools: Dict[int, Any], i: int):
+    spool = spools.pop(i, None)
+    if spool is not None:
+        spool.close()
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
@@ -0,0 +1,59 @@
+import sys
+from typing import List
+
+from agentzen.bench.runner import (
+    compare,
+    load,
+    print_comparison,
+    print_result,
+    run_cases,
+    save,
+)
+from agentzen.bench.suite import cases
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    if "--help" in argv or "-h" in argv:
+        print("Usage:")
+        print("  agentzen bench [--filter NAME] [--max-size N] [--quick]")
+        print("                 [--save results.json]")
+        print("                 [--compare baseline.json] [--threshold 0.15]")
+        print("                 [--input results.json]")
+        return 0
+
+    threshold = float(get_option(argv, "--threshold", "0.15"))
+    baseline_path = get_option(argv, "--compare")
+    input_path = get_option(argv, "--input")
+
+    if input_path is not None:
+        # Compare a saved run instead of running the suite.
+        report = load(input_path)
+    else:
+        quick = "--quick" in argv
+        max_size = int(get_option(argv, "--max-size", "10000" if quick else "100000"))
+        selected = cases(get_option(argv, "--filter"), max_size=max_size)
+        if not selected:
+            print("No benchmarks match", file=sys.stderr)
+            return 2
+
+        print(f"{'benchmark':<40} {'best':>10} {'median':>10} {'throughput':>12}")
+        report = run_cases(
+            selected,
+            min_time=0.05 if quick else 0.2,
+            rounds=3 if quick else 5,
+            progress=print_result,
+        )
+
+        output = get_option(argv, "--save")
+        if output is not None:
+            save(report, output)
+            print(f"\nResults written to {output}")
+
+    if baseline_path is None:
+        return 0
+
+    rows = compare(load(baseline_path), report, threshold=threshold)
+    print_comparison(rows, threshold)
+    return 1 if any(r["status"] == "regression" for r in rows) else 0
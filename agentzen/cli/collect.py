@@ -0,0 +1,308 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agentzen.exporters.collector import (
+    DEFAULT_ADDRESS,
+    HELLO,
+    parse_address,
+    private_dir,
+    read_exactly,
+    read_frame,
+)
+from agentzen.exporters.serialize import orjson
+from agentzen.tracing.span import TraceSpan
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+# ---------------------------------------------------------------------
+# COLLECTOR DAEMON
+#
+# Accepts span frames from CollectorExporter clients (see
+# exporters.collector for the protocol) on a Unix domain socket
+# and/or localhost TCP, one thread per connection, and hands every
+# span to a single exporter. With a batching exporter in "block"
+# mode, a full write queue stalls the connection threads, which
+# stop reading; that pushes back on the clients through the socket.
+# ---------------------------------------------------------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.collector._serve(self.connection, self.rfile)
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class _Connection:
+    __slots__ = ("sock", "busy", "last_active")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.busy = False
+        self.last_active = time.monotonic()
+
+
+class Collector:
+    """
+    Span collector writing everything it receives through exporter.
+
+    addresses are "unix:PATH" / "tcp://HOST:PORT" strings as for
+    CollectorExporter. start() binds and serves on background
+    threads; stop() closes the listeners and open connections and
+    waits for their in-flight spans to reach the exporter (which
+    the caller still has to flush or shut down).
+    """
+
+    # A connection with nothing received for this long is assumed
+    # to have sent everything it had when stop() was called.
+    IDLE_GRACE = 0.5
+
+    def __init__(self, exporter: Any, addresses: Optional[List[str]] = None):
+        self.exporter = exporter
+        self.addresses = addresses or [DEFAULT_ADDRESS]
+
+        self._servers: List[socketserver.BaseServer] = []
+        self._threads: List[threading.Thread] = []
+        self._unix_paths: List[str] = []
+
+        self._cond = threading.Condition()
+        self._connections: Dict[int, _Connection] = {}
+
+        self.connections = 0
+        self.frames = 0
+        self.spans = 0
+        self.corrupt = 0
+        self.rejected = 0
+        self.broken = 0
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+
+    def start(self):
+        for address in self.addresses:
+            family, addr = parse_address(address)
+            if family == socket.AF_UNIX:
+                private_dir(addr, create=True)
+                _remove_stale_socket(addr)
+                server = _UnixServer(addr, _Handler)
+                self._unix_paths.append(addr)
+                # Only this user's workers may send (or read) spans.
+                os.chmod(addr, 0o600)
+            else:
+                server = _TCPServer(addr, _Handler)
+            server.collector = self
+            self._servers.append(server)
+
+            thread = threading.Thread(
+                target=server.serve_forever,
+                name=f"agentzen-collect-{address}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop accepting, then wait (up to timeout seconds) until every
+        connection is closed or idle, and close the rest.
+        """
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        for path in self._unix_paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._connections and time.monotonic() < deadline:
+                if all(
+                    not c.busy and time.monotonic() - c.last_active >= self.IDLE_GRACE
+                    for c in self._connections.values()
+                ):
+                    break
+                self._cond.wait(0.05)
+            for connection in self._connections.values():
+                try:
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self._cond.wait_for(lambda: not self._connections, 1.0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "connections": self.connections,
+                "open_connections": len(self._connections),
+                "frames": self.frames,
+                "spans": self.spans,
+                "corrupt": self.corrupt,
+                "rejected": self.rejected,
+                "broken": self.broken,
+            }
+
+    # --------------------------------------------------
+    # CONNECTIONS
+    # --------------------------------------------------
+
+    def _serve(self, sock: socket.socket, f: Any):
+        key = id(sock)
+        connection = _Connection(sock)
+        with self._cond:
+            self._connections[key] = connection
+            self.connections += 1
+        try:
+            try:
+                if read_exactly(f, len(HELLO)) != HELLO:
+                    self._count("rejected")
+                    return
+                while True:
+                    payload = read_frame(f)
+                    if payload is None:
+                        return
+                    connection.busy = True
+                    self._ingest(payload)
+                    connection.last_active = time.monotonic()
+                    connection.busy = False
+            except (EOFError, ValueError, OSError):
+                self._count("broken")
+        finally:
+            with self._cond:
+                del self._connections[key]
+                self._cond.notify_all()
+
+    def _ingest(self, payload: bytes):
+        spans = corrupt = 0
+        for line in payload.splitlines():
+            try:
+                span = TraceSpan(**_loads(line))
+            except Exception:
+                corrupt += 1
+                continue
+            self.exporter.export(span)
+            spans += 1
+        with self._cond:
+            self.frames += 1
+            self.spans += spans
+            self.corrupt += corrupt
+
+    def _count(self, name: str):
+        with self._cond:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _remove_stale_socket(path: str):
+    """
+    Remove a socket file left behind by a collector that is gone;
+    refuse to take over one that is still accepting connections.
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f"a collector is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def make_exporter(path: Path, index: bool = False, blobs: bool = False) -> Any:
+    """
+    The collector's store: a batching exporter in "block" mode, so
+    a slow disk pushes back on clients instead of dropping spans.
+    """
+    from agentzen.replay.binary import SUFFIX as BINARY_SUFFIX
+    from agentzen.replay.sqlite import SUFFIXES as SQLITE_SUFFIXES
+
+    if path.suffix in SQLITE_SUFFIXES:
+        from agentzen.exporters.sqlite import SQLiteExporter
+
+        return SQLiteExporter(str(path), batch=True, overflow="block")
+
+    if path.suffix == BINARY_SUFFIX:
+        from agentzen.exporters.binary import BinaryExporter
+
+        return BinaryExporter(str(path), batch=True, overflow="block", blobs=blobs or None)
+
+    from agentzen.exporters.jsonl import JSONLExporter
+
+    return JSONLExporter(
+        str(path), batch=True, overflow="block", index=index, blobs=blobs or None
+    )
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    if not argv or argv[0].startswith("-"):
+        print("Usage:")
+        print("  agentzen collect <out.jsonl|out.azb|out.db> [--socket PATH] [--tcp [HOST:]PORT]")
+        print("                   [--index] [--blobs]")
+        return 1
+
+    path = Path(argv[0])
+    addresses = []
+    socket_path = get_option(argv, "--socket")
+    tcp = get_option(argv, "--tcp")
+    if socket_path is not None or tcp is None:
+        addresses.append("unix:" + (socket_path or parse_address(DEFAULT_ADDRESS)[1]))
+    if tcp is not None:
+        addresses.append("tcp://" + (tcp if ":" in tcp else f"127.0.0.1:{tcp}"))
+
+    exporter = make_exporter(path, index="--index" in argv, blobs="--blobs" in argv)
+    collector = Collector(exporter, addresses)
+    try:
+        collector.start()
+    except OSError as e:
+        print(f"Cannot listen: {e}", file=sys.stderr)
+        exporter.shutdown()
+        return 1
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    print(f"Collecting into {path} on {', '.join(addresses)} (Ctrl-C to stop)")
+    while not stopping.wait(1.0):
+        pass
+
+    collector.stop()
+    exporter.shutdown()
+
+    stats = collector.stats()
+    print(f"\nCOLLECTED {path}")
+    print(f"Spans:       {stats['spans']}")
+    print(f"Frames:      {stats['frames']}")
+    print(f"Connections: {stats['connections']}")
+    if stats["corrupt"]:
+        print(f"Skipped:     {stats['corrupt']} corrupt record(s)")
+    if stats["rejected"] or stats["broken"]:
+        print(f"Rejected:    {stats['rejected']} connection(s), {stats['broken']} broken")
+    return 0
@@ -0,0 +1,107 @@
+import os
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+from agentzen.exporters.binary import BinaryExporter
+from agentzen.exporters.serialize import dumps
+from agentzen.exporters.sqlite import SQLiteExporter
+from agentzen.replay.binary import SUFFIX as BINARY_SUFFIX
+from agentzen.replay.sqlite import SUFFIXES as SQLITE_SUFFIXES
+from agentzen.replay.loader import LoadStats, iter_records
+
+
+def convert(src: Path, dst: Path, overwrite: bool = False) -> LoadStats:
+    """
+    Copy every span record of src into dst.
+
+    The input format is detected from the file contents, the output
+    format from dst's suffix (.azb for binary, .db / .sqlite for a
+    trace database, JSONL otherwise). Blob references are resolved,
+    so dst does not depend on src's blob store.
+
+    dst is built next to itself under a temporary name and moved
+    into place at the end, so it only ever holds one complete copy.
+    An existing dst raises FileExistsError unless overwrite is True.
+
+    Records are streamed: a database import commits every 10,000
+    spans and never holds more than that in memory.
+    """
+    if dst.exists():
+        if not overwrite:
+            raise FileExistsError(f"{dst} already exists")
+        if dst.resolve() == src.resolve():
+            raise ValueError("input and output are the same file")
+
+    stats = LoadStats()
+    records = iter_records(src, stats=stats, payloads=True)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    _remove(tmp, *_journals(tmp))
+    try:
+        if dst.suffix in SQLITE_SUFFIXES:
+            exporter = SQLiteExporter(str(tmp))
+            try:
+                exporter.write_records(records)
+            finally:
+                exporter.shutdown()
+        elif dst.suffix == BINARY_SUFFIX:
+            exporter = BinaryExporter(str(tmp))
+            try:
+                for record in records:
+                    exporter.write_record(record)
+            finally:
+                exporter.shutdown()
+        else:
+            with tmp.open("wb") as f:
+                for record in records:
+                    f.write(dumps(record, newline=True))
+
+        # Journal files of the database being replaced would be
+        # applied to the new one.
+        _remove(*_journals(dst))
+        os.replace(tmp, dst)
+    finally:
+        _remove(tmp, *_journals(tmp))
+
+    return stats
+
+
+def _journals(path: Path) -> Tuple[Path, Path]:
+    return path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")
+
+
+def _remove(*paths: Path):
+    for p in paths:
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def main(argv: List[str]) -> int:
+    paths = [a for a in argv if not a.startswith("-")]
+    if len(paths) < 2:
+        print("Usage:")
+        print("  agentzen convert <in.jsonl|in.azb|in.db> <out.jsonl|out.azb|out.db> [--force]")
+        return 1
+
+    src, dst = Path(paths[0]), Path(paths[1])
+    if not src.exists():
+        print(f"No such file: {src}", file=sys.stderr)
+        return 1
+
+    try:
+        stats = convert(src, dst, overwrite="--force" in argv)
+    except FileExistsError:
+        print(f"{dst} already exists; pass --force to replace it", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"\nCONVERTED {src} → {dst}")
+    print(f"Spans:    {stats.records}")
+    if stats.corrupt:
+        print(f"Skipped:  {stats.corrupt} corrupt record(s)")
+    return 0
@@ -0,0 +1,265 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from agentzen.analysis.sketch import QuantileSketch, ks_greater
+from agentzen.replay.loader import LoadStats, iter_records
+
+
+# ---------------------------------------------------------------------
+# FLEET DIFF
+#
+# Compares two sets of runs (every trace is one run) through per-run
+# metric distributions. Each side is streamed once; a run's counters
+# live only until its root span arrives and then go into one
+# QuantileSketch per metric, so memory does not grow with the
+# number of runs.
+#
+# A metric regresses when the candidate distribution is significantly
+# shifted up (one-sided KS test, p < alpha) AND its p50 or p95 moved
+# by at least min_effect, so huge fleets do not flag noise-sized
+# shifts. Higher is worse for every metric below.
+# ---------------------------------------------------------------------
+
+METRICS = (
+    "latency",
+    "prompt_tokens",
+    "completion_tokens",
+    "llm_calls",
+    "tool_calls",
+    "decisions",
+    "errors",
+)
+
+# Per-run accumulator slots.
+_START, _END, _ROOT, _PROMPT, _COMPLETION, _LLM, _TOOL, _DECISIONS, _ERRORS = range(9)
+
+
+def _new_run() -> list:
+    return [None, None, None, 0, 0, 0, 0, 0, 0]
+
+
+def _add_span(run: list, s: Dict[str, Any]):
+    start, end = s.get("start_time"), s.get("end_time")
+    if start is not None and (run[_START] is None or start < run[_START]):
+        run[_START] = start
+    if end is not None and (run[_END] is None or end > run[_END]):
+        run[_END] = end
+
+    name = s["name"]
+    if name == "llm:call":
+        run[_LLM] += 1
+        usage = (s.get("output") or {}).get("token_usage") or {}
+        run[_PROMPT] += usage.get("prompt_tokens", 0)
+        run[_COMPLETION] += usage.get("completion_tokens", 0)
+    elif name.startswith("tool:"):
+        run[_TOOL] += 1
+    elif name.startswith("agent:decision"):
+        run[_DECISIONS] += 1
+
+    if s.get("error"):
+        run[_ERRORS] += 1
+
+    if s.get("parent_id") is None and start is not None and end is not None:
+        run[_ROOT] = end - start
+
+
+class FleetSummary:
+    """
+    Per-metric sketches over the runs of one side.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.sketches = {m: QuantileSketch(relative_accuracy) for m in METRICS}
+        self.runs = 0
+        self.incomplete = 0
+
+    def add_run(self, run: list, complete: bool = True):
+        latency = run[_ROOT]
+        if latency is None:
+            # No root span: fall back to the extent of what we saw.
+            latency = (run[_END] or 0) - (run[_START] or 0)
+
+        values = (
+            latency,
+            run[_PROMPT],
+            run[_COMPLETION],
+            run[_LLM],
+            run[_TOOL],
+            run[_DECISIONS],
+            run[_ERRORS],
+        )
+        for metric, value in zip(METRICS, values):
+            self.sketches[metric].add(value)
+
+        self.runs += 1
+        if not complete:
+            self.incomplete += 1
+
+    def merge(self, other: "FleetSummary"):
+        for m in METRICS:
+            self.sketches[m].merge(other.sketches[m])
+        self.runs += other.runs
+        self.incomplete += other.incomplete
+
+
+def summarize_fleet(
+    records: Iterable[Dict[str, Any]], relative_accuracy: float = 0.01
+) -> FleetSummary:
+    fleet = FleetSummary(relative_accuracy)
+    open_runs: Dict[Any, list] = {}
+
+    for s in records:
+        trace_id = s.get("trace_id")
+        run = open_runs.get(trace_id)
+        if run is None:
+            run = open_runs[trace_id] = _new_run()
+        _add_span(run, s)
+        if s.get("parent_id") is None:
+            fleet.add_run(open_runs.pop(trace_id))
+
+    for run in open_runs.values():
+        fleet.add_run(run, complete=False)
+
+    return fleet
+
+
+def compare(
+    baseline: FleetSummary,
+    candidate: FleetSummary,
+    alpha: float = 0.01,
+    min_effect: float = 0.05,
+) -> List[Dict[str, Any]]:
+    rows = []
+    for m in METRICS:
+        b, c = baseline.sketches[m], candidate.sketches[m]
+        d, p = ks_greater(b, c)
+
+        shifts = {}
+        for q in ("p50", "p95"):
+            vb = b.quantile(0.5 if q == "p50" else 0.95)
+            vc = c.quantile(0.5 if q == "p50" else 0.95)
+            if vb is None or vc is None:
+                shifts[q] = None
+            elif vb == 0:
+                shifts[q] = 0.0 if vc == 0 else float("inf")
+            else:
+                shifts[q] = (vc - vb) / vb
+
+        effect = max((s for s in shifts.values() if s is not None), default=0.0)
+        rows.append(
+            {
+                "metric": m,
+                "baseline": b.to_dict(),
+                "candidate": c.to_dict(),
+                "shift": shifts,
+                "ks_d": round(d, 6),
+                "p_value": p,
+                "regression": p < alpha and effect >= min_effect,
+            }
+        )
+    return rows
+
+
+# ---------------------------------------------------------------------
+# OUTPUT
+# ---------------------------------------------------------------------
+
+def _fmt(v: Optional[float]) -> str:
+    if v is None:
+        return "-"
+    if abs(v) >= 100 or float(v).is_integer():
+        return f"{v:.0f}"
+    return f"{v:.3g}"
+
+
+def _pct(v: Optional[float]) -> str:
+    if v is None:
+        return "-"
+    if v == float("inf"):
+        return "+inf"
+    return f"{v * 100:+.1f}%"
+
+
+def print_report(baseline: FleetSummary, candidate: FleetSummary, rows):
+    print("\nFLEET DIFF")
+    print("----------")
+    print(f"Runs: baseline {baseline.runs}, candidate {candidate.runs}")
+    if baseline.incomplete or candidate.incomplete:
+        print(
+            f"      (without root span: baseline {baseline.incomplete}, "
+            f"candidate {candidate.incomplete})"
+        )
+    print()
+    print(
+        f"{'metric':<18} {'baseline p50/p95/p99':>22} {'candidate p50/p95/p99':>22}"
+        f" {'Δp50':>8} {'Δp95':>8} {'p-value':>8}"
+    )
+    for r in rows:
+        b, c = r["baseline"], r["candidate"]
+        mark = "  ✖" if r["regression"] else ""
+        print(
+            f"{r['metric']:<18}"
+            f" {'/'.join(_fmt(b[q]) for q in ('p50', 'p95', 'p99')):>22}"
+            f" {'/'.join(_fmt(c[q]) for q in ('p50', 'p95', 'p99')):>22}"
+            f" {_pct(r['shift']['p50']):>8} {_pct(r['shift']['p95']):>8}"
+            f" {r['p_value']:>8.3g}{mark}"
+        )
+
+    regressions = [r for r in rows if r["regression"]]
+    print()
+    if not regressions:
+        print("NO SIGNIFICANT REGRESSIONS")
+    else:
+        print("REGRESSIONS DETECTED")
+        for r in regressions:
+            print(
+                f"• {r['metric']}: p50 {_pct(r['shift']['p50'])}, "
+                f"p95 {_pct(r['shift']['p95'])} (p={r['p_value']:.3g})"
+            )
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option
+
+    baseline_src = get_option(argv, "--baseline")
+    candidate_src = get_option(argv, "--candidate")
+    if baseline_src is None or candidate_src is None:
+        print(
+            "Usage: agentzen trace diff --baseline <dir|glob> --candidate <dir|glob>"
+            " [--alpha 0.01] [--min-effect 0.05] [--json]"
+        )
+        return 2
+
+    alpha = float(get_option(argv, "--alpha", "0.01"))
+    min_effect = float(get_option(argv, "--min-effect", "0.05"))
+
+    stats = LoadStats()
+    baseline = summarize_fleet(iter_records(baseline_src, stats=stats))
+    candidate = summarize_fleet(iter_records(candidate_src, stats=stats))
+    rows = compare(baseline, candidate, alpha=alpha, min_effect=min_effect)
+
+    if "--json" in argv:
+        for r in rows:
+            # JSON has no infinity: a shift away from zero is "+inf".
+            r["shift"] = {q: _pct(v) if v == float("inf") else v for q, v in r["shift"].items()}
+        json.dump(
+            {
+                "baseline_runs": baseline.runs,
+                "candidate_runs": candidate.runs,
+                "alpha": alpha,
+                "min_effect": min_effect,
+                "metrics": rows,
+            },
+            sys.stdout,
+            indent=2,
+            default=str,
+        )
+        print()
+    else:
+        print_report(baseline, candidate, rows)
+
+    if stats.corrupt:
+        print(f"\nSkipped {stats.corrupt} corrupt line(s)", file=sys.stderr)
+
+    return 1 if any(r["regression"] for r in rows) else 0
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from agentzen.replay.binary import is_binary
+from agentzen.replay.follow import TraceFollower
+from agentzen.replay.loader import LoadStats, group_traces
+from agentzen.replay.sqlite import is_sqlite
+
+
+def run_follow(
+    path: Path,
+    analyze_flag: bool = False,
+    fail: bool = False,
+    trace_id: Optional[str] = None,
+    rules: Optional[Dict[str, Dict[str, Any]]] = None,
+    from_start: bool = False,
+    max_pending: int = 1000,
+    poll_interval: float = 0.25,
+) -> int:
+    """
+    Print (and analyze) each trace of a JSONL file that is still
+    being written, as soon as its root span is appended. Runs until
+    interrupted.
+
+    At most max_pending traces wait for their root span; beyond
+    that the oldest is printed as it is, marked incomplete.
+    """
+    from agentzen.cli.trace import analyze, print_trace
+
+    if path.is_dir() or (path.exists() and (is_binary(path) or is_sqlite(path))):
+        print("--follow needs a single JSONL trace file", file=sys.stderr)
+        return 1
+
+    stats = LoadStats()
+    follower = TraceFollower(path, from_start=from_start, poll_interval=poll_interval, stats=stats)
+    records = follower.follow()
+    if trace_id is not None:
+        records = (r for r in records if r.get("trace_id") == trace_id)
+
+    print(f"Following {path} (Ctrl-C to stop)", file=sys.stderr)
+    exit_code = 0
+    traces = 0
+    incomplete = 0
+    try:
+        for tid, spans in group_traces(records, max_pending=max_pending):
+            traces += 1
+            print_trace(tid, spans)
+            if not any(s.get("parent_id") is None for s in spans):
+                incomplete += 1
+                print(f"(incomplete: root span not seen; more than {max_pending} traces open)")
+            if analyze_flag:
+                exit_code = max(exit_code, analyze(spans, fail, config=rules))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+
+    print(
+        f"\nFollowed {traces} trace(s), {incomplete} incomplete;"
+        f" {follower.rotations} rotation(s), {follower.truncations} truncation(s)",
+        file=sys.stderr,
+    )
+    if follower.skipped_segments:
+        print(
+            f"Missed {follower.skipped_segments} rotated segment(s) removed before they were read",
+            file=sys.stderr,
+        )
+    if stats.corrupt:
+        print(f"Skipped {stats.corrupt} corrupt line(s)", file=sys.stderr)
+    return exit_code
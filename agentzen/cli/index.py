@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+from typing import List
+
+from agentzen.replay.binary import is_binary
+from agentzen.replay.index import build_index
+from agentzen.replay.sqlite import is_sqlite
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print("Usage:")
+        print("  agentzen index <trace.jsonl> [--rebuild]")
+        return 1
+
+    path = Path(argv[0])
+    if not path.exists():
+        print(f"No such file: {path}", file=sys.stderr)
+        return 1
+    if is_sqlite(path):
+        print("Trace databases are indexed already; see 'agentzen query'", file=sys.stderr)
+        return 1
+    if is_binary(path):
+        print("Indexes are only supported for JSONL trace files", file=sys.stderr)
+        return 1
+
+    index = build_index(path, rebuild="--rebuild" in argv)
+    errors = sum(1 for e in index.entries.values() if e.error)
+
+    print(f"\nINDEXED {path}")
+    print(f"Traces:       {len(index.entries)}")
+    print(f"With errors:  {errors}")
+    print(f"Bytes:        {index.indexed}")
+    return 0
@@ -0,0 +1,91 @@
+import sys
+from typing import Optional
+
+from agentzen.analysis.profile import TraceProfiler
+from agentzen.replay.loader import LoadStats
+
+
+def fmt_duration(seconds: float) -> str:
+    if seconds >= 1.0:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.0f}µs"
+
+
+def print_profile(profiler: TraceProfiler, top: int = 20):
+    wall = profiler.wall_time
+
+    def pct(v):
+        return f"{100 * v / wall:5.1f}%" if wall > 0 else "    -"
+
+    print("\nPROFILE")
+    print("-------")
+    print(
+        f"Traces: {profiler.traces}   Spans: {profiler.spans}"
+        f"   Wall time: {fmt_duration(wall)}"
+    )
+
+    print("\nHOT SPANS (by self time)")
+    print(
+        f"{'name':<32} {'count':>8} {'total':>10} {'self':>10} {'self%':>6}"
+        f" {'critical':>10} {'gaps':>9}"
+    )
+    for r in profiler.hot_spans(top):
+        print(
+            f"{r['name'][:32]:<32} {r['count']:>8} {fmt_duration(r['total']):>10}"
+            f" {fmt_duration(r['self']):>10} {pct(r['self']):>6}"
+            f" {fmt_duration(r['critical']):>10} {fmt_duration(r['gaps']):>9}"
+        )
+
+    gaps = sum(r["gaps"] for r in profiler.hot_spans())
+    print(
+        f"\nTime lost between sibling steps: {fmt_duration(gaps)}"
+        f" ({pct(gaps).strip()} of wall time)"
+    )
+
+    if profiler.slowest is not None:
+        wall_slowest, trace_id, _ = profiler.slowest
+        path = profiler.critical_path()
+        print(f"\nCRITICAL PATH (slowest trace {trace_id}, {fmt_duration(wall_slowest)})")
+        shown = sorted(path, key=lambda seg: -seg[1])[:top]
+        keep = {id(seg) for seg in shown}
+        skipped = 0.0
+        for seg in path:
+            if id(seg) in keep:
+                if skipped:
+                    print(f"  … {fmt_duration(skipped)} in smaller steps")
+                    skipped = 0.0
+                print(f"  {seg[0][:40]:<40} {fmt_duration(seg[1]):>10}")
+            else:
+                skipped += seg[1]
+        if skipped:
+            print(f"  … {fmt_duration(skipped)} in smaller steps")
+
+
+def run_profile(
+    traces,
+    top: int = 20,
+    collapsed: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+) -> int:
+    """
+    Profile (trace_id, spans) pairs and print the report. With
+    collapsed, folded stacks are also written to that file.
+    """
+    profiler = TraceProfiler()
+    for trace_id, spans in traces:
+        profiler.add_trace(trace_id, spans)
+
+    print_profile(profiler, top)
+
+    if collapsed is not None:
+        with open(collapsed, "w", encoding="utf-8") as f:
+            for line in profiler.collapsed():
+                f.write(line + "\n")
+        print(f"\nCollapsed stacks written to {collapsed}")
+
+    if stats is not None and stats.corrupt:
+        print(f"\nSkipped {stats.corrupt} corrupt line(s)", file=sys.stderr)
+
+    return 0
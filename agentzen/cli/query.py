@@ -0,0 +1,114 @@
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from agentzen.cli.profile import fmt_duration
+from agentzen.replay.sqlite import connect, is_sqlite, query_groups, query_spans, query_traces
+
+
+def fmt_time(epoch: Any) -> str:
+    if epoch is None:
+        return "-"
+    return datetime.fromtimestamp(epoch).isoformat(sep=" ", timespec="seconds")
+
+
+def print_spans(rows: List[Dict[str, Any]]):
+    print(f"{'start':<19} {'duration':>10}  {'name':<32} {'trace':<20} error")
+    for r in rows:
+        print(
+            f"{fmt_time(r['start_time']):<19} {fmt_duration(r['duration'] or 0.0):>10}"
+            f"  {str(r['name'])[:32]:<32} {str(r['trace_id'])[:20]:<20} {r['error'] or ''}"
+        )
+
+
+def print_traces(rows: List[Dict[str, Any]]):
+    print(f"{'start':<19} {'trace':<36} {'spans':>6} {'errors':>6}")
+    for r in rows:
+        print(
+            f"{fmt_time(r['start_time']):<19} {str(r['trace_id'])[:36]:<36}"
+            f" {r['spans']:>6} {r['errors']:>6}"
+        )
+
+
+def print_groups(rows: List[Dict[str, Any]], group_by: str):
+    print(f"{group_by[:32]:<32} {'spans':>7} {'errors':>7} {'avg':>10} {'max':>10}")
+    for r in rows:
+        print(
+            f"{str(r['group'])[:32]:<32} {r['spans']:>7} {r['errors']:>7}"
+            f" {fmt_duration(r['avg_duration'] or 0.0):>10}"
+            f" {fmt_duration(r['max_duration'] or 0.0):>10}"
+        )
+
+
+def main(argv: List[str]) -> int:
+    from agentzen.cli.trace import get_option, parse_time
+
+    if not argv or argv[0].startswith("-"):
+        print("Usage:")
+        print("  agentzen query <traces.db> [--name PREFIX] [--error] [--trace-id ID]")
+        print("                 [--since T] [--until T] [--attr KEY=VALUE]")
+        print("                 [--slowest | --traces | --group-by name|ATTR]")
+        print("                 [--limit N] [--json]")
+        print()
+        print("  T is epoch seconds, ISO 8601, or a time ago (30m, 2h, 7d).")
+        return 1
+
+    path = Path(argv[0])
+    if not path.exists():
+        print(f"No such file: {path}", file=sys.stderr)
+        return 1
+    if not is_sqlite(path):
+        print(
+            f"{path} is not a trace database; import it with"
+            f" 'agentzen convert {path} traces.db'",
+            file=sys.stderr,
+        )
+        return 1
+
+    attribute = None
+    attr = get_option(argv, "--attr")
+    if attr is not None:
+        key, sep, value = attr.partition("=")
+        if not sep:
+            print("--attr takes KEY=VALUE", file=sys.stderr)
+            return 1
+        attribute = (key, value)
+
+    filters = {
+        "trace_id": get_option(argv, "--trace-id"),
+        "name_prefix": get_option(argv, "--name"),
+        "error": True if "--error" in argv else None,
+        "since": parse_time(get_option(argv, "--since")),
+        "until": parse_time(get_option(argv, "--until")),
+        "attribute": attribute,
+    }
+    try:
+        limit = int(get_option(argv, "--limit", "20"))
+    except ValueError:
+        print("--limit takes a number", file=sys.stderr)
+        return 1
+    group_by = get_option(argv, "--group-by")
+
+    conn = connect(path, readonly=True)
+    try:
+        if group_by is not None:
+            rows = query_groups(conn, group_by, limit=limit, **filters)
+        elif "--traces" in argv:
+            rows = query_traces(conn, limit=limit, **filters)
+        else:
+            order = "slowest" if "--slowest" in argv else "recent"
+            rows = query_spans(conn, order=order, limit=limit, **filters)
+    finally:
+        conn.close()
+
+    if "--json" in argv:
+        print(json.dumps(rows, indent=2, default=str))
+    elif group_by is not None:
+        print_groups(rows, group_by)
+    elif "--traces" in argv:
+        print_traces(rows)
+    else:
+        print_spans(rows)
+    return 0
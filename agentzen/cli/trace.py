@@ -1,17 +1,28 @@
 import json
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from agentzen.analysis.antipatterns import AntiPatternAnalyzer
+from agentzen.cli.analyze import default_jobs, in_time_range, run_parallel, stream_units
+from agentzen.cli.trace_diff import run as diff_main
+from agentzen.replay.blobs import BlobStore, blob_dir, format_ref, is_ref
+from agentzen.replay.index import TraceIndex
+from agentzen.replay.loader import LoadStats, group_traces, iter_records
+from agentzen.replay.sqlite import is_sqlite, iter_sqlite_records
 
 
 def load_spans(path: Path) -> List[Dict[str, Any]]:
-    with path.open() as f:
-        return [json.loads(line) for line in f]
+    return list(iter_records(path))
 
 
 def group_by_trace(spans):
+    """
+    {trace_id: spans} for a list of spans. Holds every span in
+    memory; the CLI streams traces with replay.loader.group_traces.
+    """
     traces = {}
     for s in spans:
         traces.setdefault(s["trace_id"], []).append(s)
@@ -27,19 +38,31 @@ def print_trace(trace_id, spans):
         dur = span["end_time"] - span["start_time"]
         print("│  " * indent + f"{span['name']} ({dur:.2f}s)")
         for k, v in span["attributes"].items():
+            if is_ref(v):
+                v = format_ref(v)
             print("│  " * (indent + 1) + f"• {k}: {v}")
         for c in children.get(span["span_id"], []):
             render(c, indent + 1)
 
-    root = children[None][0]
+    roots = children.get(None)
+    if roots is None:
+        # Incomplete trace (its root never arrived): render every
+        # span whose parent is missing as a top-level span.
+        ids = {s["span_id"] for s in spans}
+        roots = [s for s in spans if s["parent_id"] not in ids]
+
     print(f"\nTRACE {trace_id}")
-    render(root)
+    for root in roots:
+        render(root)
 
 
-def analyze(spans, fail=False):
-    analyzer = AntiPatternAnalyzer(spans)
+def analyze(spans, fail=False, findings=None, config=None):
+    analyzer = AntiPatternAnalyzer(spans, config)
     result = analyzer.analyze()
 
+    if findings is not None:
+        findings.extend(result.findings)
+
     if result.is_empty():
         print("\nNO ANTI-PATTERNS DETECTED")
         return 0
@@ -53,59 +76,220 @@ def analyze(spans, fail=False):
     return 1 if fail else 0
 
 
-def diff(a: Path, b: Path):
-    a_spans = load_spans(a)
-    b_spans = load_spans(b)
+def diff(a: Path, b: Path, as_json: bool = False) -> int:
+    """
+    Align the decisions of two runs and print what changed, followed
+    by the summary diff. See cli/trace_diff.py.
+    """
+    argv = [str(a), str(b)] + (["--json"] if as_json else [])
+    return diff_main(argv)
+
+
+def get_option(argv: List[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Value following a --name option, or default.
+    """
+    if name in argv:
+        i = argv.index(name)
+        if i + 1 < len(argv):
+            return argv[i + 1]
+    return default
+
 
-    def decisions(spans):
-        return [
-            s for s in spans
-            if s["name"].startswith("agent:decision:")
-        ]
+_AGO = {"s": 1, "m": 60, "h": 3600, "d": 86400}
 
-    da, db = decisions(a_spans), decisions(b_spans)
 
-    print("\nTRACE DIFF")
-    print("----------")
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """
+    Epoch seconds, an ISO 8601 timestamp, or a time ago such as
+    "30m", "2h" or "7d".
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    unit = _AGO.get(value[-1:])
+    if unit is not None:
+        try:
+            return time.time() - float(value[:-1]) * unit
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value).timestamp()
 
-    if len(da) != len(db):
-        print(f"Decision count changed: {len(da)} → {len(db)}")
+
+def select_traces(path: Path, trace_id=None, since=None, until=None, stats=None, payloads=False):
+    """
+    Yield (trace_id, spans) for the requested traces.
+
+    A fresh index sidecar lets us seek straight to the matching
+    traces; otherwise the file is streamed and filtered. With
+    payloads=True blob references are resolved.
+    """
+    if trace_id is None and since is None and until is None:
+        yield from group_traces(iter_records(path, stats=stats, payloads=payloads))
         return
 
-    for i, (x, y) in enumerate(zip(da, db)):
-        if x["attributes"]["chosen"] != y["attributes"]["chosen"]:
-            print(f"Decision {i} changed:")
-            print(f"  chosen: {x['attributes']['chosen']} → {y['attributes']['chosen']}")
-            print(
-                f"  confidence: "
-                f"{x['attributes'].get('confidence')} → {y['attributes'].get('confidence')}"
-            )
+    if Path(path).is_file() and is_sqlite(path):
+        # The database answers all three filters from its indexes.
+        records = iter_sqlite_records(path, trace_id=trace_id, since=since, until=until, stats=stats)
+        yield from group_traces(records)
+        return
+
+    index = TraceIndex.load(path) if Path(path).is_file() else None
+    if index is not None and not index.is_stale():
+        store = BlobStore(blob_dir(path)) if payloads and blob_dir(path).is_dir() else None
+        for tid, spans in index.read(index.select(trace_id, since, until)):
+            if store is not None:
+                spans = [store.resolve_record(s) for s in spans]
+            yield tid, spans
+        return
+
+    if index is not None:
+        print(
+            f"Index for {path} is stale; scanning. Run 'agentzen index {path}' to refresh.",
+            file=sys.stderr,
+        )
+
+    records = iter_records(path, trace_id=trace_id, stats=stats, payloads=payloads)
+    for tid, spans in group_traces(records):
+        if in_time_range(spans, since, until):
+            yield tid, spans
+
+
+def load_rules(path):
+    """
+    Per-rule detector config from a JSON file, e.g.
+        {"decision_loop": {"threshold": 4}, "oscillation": {"enabled": false}}
+    """
+    if path is None:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        from agentzen.cli.bench import main as bench_main
+
+        sys.exit(bench_main(sys.argv[2:]))
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "collect":
+        from agentzen.cli.collect import main as collect_main
+
+        sys.exit(collect_main(sys.argv[2:]))
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "query":
+        from agentzen.cli.query import main as query_main
+
+        sys.exit(query_main(sys.argv[2:]))
+
     if len(sys.argv) < 3:
         print("Usage:")
-        print("  agentzen trace <trace.jsonl> [--analyze] [--fail]")
-        print("  agentzen trace diff <a.jsonl> <b.jsonl>")
+        print("  agentzen trace <trace.jsonl|dir|glob> [--analyze] [--fail]")
+        print("                 [--trace-id ID] [--since T] [--until T]")
+        print("                 [--jobs N] [--shard file|trace] [--rules rules.json]")
+        print("                 [--payloads]")
+        print("  agentzen trace <trace.jsonl> --follow [--analyze] [--from-start] [--max-pending N]")
+        print("  agentzen trace <trace.jsonl|dir|glob> --profile [--top N] [--collapsed out.folded]")
+        print("  agentzen trace diff <a.jsonl> <b.jsonl> [--json]")
+        print("  agentzen trace diff --baseline <dir|glob> --candidate <dir|glob> [--json]")
+        print("  agentzen index <trace.jsonl> [--rebuild]")
+        print("  agentzen convert <in.jsonl|in.azb|in.db> <out.jsonl|out.azb|out.db>")
+        print("  agentzen query <traces.db> [--name PREFIX] [--error] [--since T] [--until T]")
+        print("                 [--attr KEY=VALUE] [--slowest | --traces | --group-by name|ATTR]")
+        print("  agentzen bench [--filter NAME] [--save out.json] [--compare baseline.json]")
+        print("  agentzen collect <out.jsonl|out.azb|out.db> [--socket PATH] [--tcp [HOST:]PORT]")
         sys.exit(1)
 
+    if sys.argv[1] == "index":
+        from agentzen.cli.index import main as index_main
+
+        sys.exit(index_main(sys.argv[2:]))
+
+    if sys.argv[1] == "convert":
+        from agentzen.cli.convert import main as convert_main
+
+        sys.exit(convert_main(sys.argv[2:]))
+
     if sys.argv[2] == "diff":
-        diff(Path(sys.argv[3]), Path(sys.argv[4]))
-        return
+        sys.exit(diff_main(sys.argv[3:]))
+
+    path = sys.argv[2]
+    trace_id = get_option(sys.argv, "--trace-id")
+    since = parse_time(get_option(sys.argv, "--since"))
+    until = parse_time(get_option(sys.argv, "--until"))
+
+    if "--profile" in sys.argv:
+        from agentzen.cli.profile import run_profile
 
-    path = Path(sys.argv[2])
-    spans = load_spans(path)
-    traces = group_by_trace(spans)
+        stats = LoadStats()
+        traces = select_traces(path, trace_id=trace_id, since=since, until=until, stats=stats)
+        sys.exit(
+            run_profile(
+                traces,
+                top=int(get_option(sys.argv, "--top", "20")),
+                collapsed=get_option(sys.argv, "--collapsed"),
+                stats=stats,
+            )
+        )
 
     analyze_flag = "--analyze" in sys.argv
     fail_flag = "--fail" in sys.argv
+    payloads = "--payloads" in sys.argv
+    rules = load_rules(get_option(sys.argv, "--rules"))
+
+    if "--follow" in sys.argv:
+        from agentzen.cli.follow import run_follow
+
+        sys.exit(
+            run_follow(
+                Path(path),
+                analyze_flag=analyze_flag,
+                fail=fail_flag,
+                trace_id=trace_id,
+                rules=rules,
+                from_start="--from-start" in sys.argv,
+                max_pending=int(get_option(sys.argv, "--max-pending", "1000")),
+            )
+        )
+
+    jobs = int(get_option(sys.argv, "--jobs", "1"))
+    if jobs <= 0:
+        jobs = default_jobs()
+    shard = get_option(sys.argv, "--shard", "file")
+
+    if jobs > 1 or len(stream_units(path)) > 1:
+        sys.exit(
+            run_parallel(
+                path,
+                jobs,
+                shard=shard,
+                analyze=analyze_flag,
+                fail=fail_flag,
+                trace_id=trace_id,
+                since=since,
+                until=until,
+                rules=rules,
+                payloads=payloads,
+            )
+        )
+
+    stats = LoadStats()
+    traces = select_traces(
+        path, trace_id=trace_id, since=since, until=until, stats=stats, payloads=payloads
+    )
 
     exit_code = 0
 
-    for trace_id, trace_spans in traces.items():
+    for trace_id, trace_spans in traces:
         print_trace(trace_id, trace_spans)
         if analyze_flag:
-            exit_code = analyze(trace_spans, fail_flag)
+            exit_code = max(exit_code, analyze(trace_spans, fail_flag, config=rules))
+
+    if stats.corrupt:
+        print(f"\nSkipped {stats.corrupt} corrupt line(s)", file=sys.stderr)
 
     sys.exit(exit_code)
 
@@ -1,23 +1,37 @@
 import json
+import sys
 from pathlib import Path
 from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from agentzen.analysis.alignment import DELETE, EQUAL, INSERT, align
+from agentzen.replay.loader import iter_records
 
 
 def load_spans(path: Path):
-    with path.open() as f:
-        return [json.loads(l) for l in f if l.strip()]
+    return iter_records(path)
 
 
 def summarize(spans):
     summary = Counter()
     prompt_tokens = 0
     completion_tokens = 0
-    latency = 0.0
+    extents = {}
     decisions = []
 
     for s in spans:
         summary["spans"] += 1
-        latency += (s.get("end_time", 0) - s.get("start_time", 0))
+
+        # Wall-clock time per trace: nested spans overlap their
+        # parents, so their durations must not be added up.
+        start, end = s.get("start_time"), s.get("end_time")
+        if start is not None and end is not None:
+            extent = extents.get(s.get("trace_id"))
+            if extent is None:
+                extents[s.get("trace_id")] = [start, end]
+            else:
+                extent[0] = min(extent[0], start)
+                extent[1] = max(extent[1], end)
 
         if s["name"] == "llm:call":
             summary["llm_calls"] += 1
@@ -29,7 +43,9 @@ def summarize(spans):
             summary["tool_calls"] += 1
 
         if s["name"].startswith("agent:decision"):
-            decisions.append(s.get("attributes", {}))
+            decisions.append({"name": s["name"], "attributes": s.get("attributes") or {}})
+
+    latency = sum(end - start for start, end in extents.values())
 
     return {
         "summary": summary,
@@ -40,6 +56,110 @@ def summarize(spans):
     }
 
 
+# ---------------------------------------------------------------------
+# DECISION ALIGNMENT
+# ---------------------------------------------------------------------
+
+def decision_key(d: Dict[str, Any]):
+    return (d["name"], d["attributes"].get("chosen"))
+
+
+def _confidence(decision: Dict[str, Any]) -> Optional[float]:
+    # Missing or non-numeric confidences are never reported as a
+    # change.
+    value = decision["attributes"].get("confidence")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def diff_decisions(
+    da: List[Dict[str, Any]],
+    db: List[Dict[str, Any]],
+    confidence_threshold: float = 0.1,
+) -> List[Dict[str, Any]]:
+    """
+    Align two decision sequences on (name, chosen) and describe the
+    differences, in order:
+
+        removed     only in a
+        inserted    only in b
+        changed     same decision name, different chosen option
+        confidence  same decision, confidence moved by at least
+                    confidence_threshold
+
+    A removed and an inserted decision with the same name inside one
+    run of edits are reported together as changed.
+    """
+    edits = align([decision_key(d) for d in da], [decision_key(d) for d in db])
+    changes: List[Dict[str, Any]] = []
+
+    i = 0
+    while i < len(edits):
+        op, ia, jb = edits[i]
+        if op == EQUAL:
+            ca = _confidence(da[ia])
+            cb = _confidence(db[jb])
+            if (
+                ca is not None
+                and cb is not None
+                and abs(cb - ca) >= confidence_threshold
+            ):
+                changes.append(_change("confidence", da[ia], db[jb], ia, jb))
+            i += 1
+            continue
+
+        # One run of edits between two matches.
+        j = i
+        while j < len(edits) and edits[j][0] != EQUAL:
+            j += 1
+        run = edits[i:j]
+        i = j
+
+        inserts: Dict[str, List[int]] = {}
+        for op, _, jb in run:
+            if op == INSERT:
+                inserts.setdefault(db[jb]["name"], []).append(jb)
+
+        paired = set()
+        for op, ia, jb in run:
+            if op == DELETE:
+                candidates = inserts.get(da[ia]["name"])
+                if candidates:
+                    jb = candidates.pop(0)
+                    paired.add(jb)
+                    changes.append(_change("changed", da[ia], db[jb], ia, jb))
+                else:
+                    changes.append(_change("removed", da[ia], None, ia, None))
+            elif jb not in paired:
+                changes.append(_change("inserted", None, db[jb], None, jb))
+
+    return changes
+
+
+def _change(op, a, b, ia, jb):
+    def side(d):
+        if d is None:
+            return None
+        return {
+            "chosen": d["attributes"].get("chosen"),
+            "confidence": d["attributes"].get("confidence"),
+        }
+
+    return {
+        "op": op,
+        "name": (a or b)["name"],
+        "a_index": ia,
+        "b_index": jb,
+        "a": side(a),
+        "b": side(b),
+    }
+
+
+# ---------------------------------------------------------------------
+# OUTPUT
+# ---------------------------------------------------------------------
+
 def diff(a, b):
     print("\nTRACE DIFF")
     print("----------")
@@ -62,7 +182,95 @@ def diff(a, b):
     print(f"Efficiency:        {eff(a)} → {eff(b)}")
 
 
-def main(path_a: str, path_b: str):
-    a = summarize(load_spans(Path(path_a)))
-    b = summarize(load_spans(Path(path_b)))
+def print_decision_diff(a, b, changes):
+    counts = Counter(c["op"] for c in changes)
+    print("\nDECISIONS")
+    print("---------")
+    print(
+        f"{len(a['decisions'])} → {len(b['decisions'])}: "
+        f"{counts['inserted']} inserted, {counts['removed']} removed, "
+        f"{counts['changed']} changed"
+    )
+
+    def fmt(side):
+        if side["confidence"] is None:
+            return f"{side['chosen']}"
+        return f"{side['chosen']} ({side['confidence']})"
+
+    for c in changes:
+        if c["op"] == "inserted":
+            print(f"+ b[{c['b_index']}] {c['name']}: {fmt(c['b'])}")
+        elif c["op"] == "removed":
+            print(f"- a[{c['a_index']}] {c['name']}: {fmt(c['a'])}")
+        elif c["op"] == "changed":
+            print(
+                f"~ a[{c['a_index']}] → b[{c['b_index']}] {c['name']}: "
+                f"{fmt(c['a'])} → {fmt(c['b'])}"
+            )
+        else:
+            print(
+                f"≈ a[{c['a_index']}] → b[{c['b_index']}] {c['name']}: "
+                f"confidence {c['a']['confidence']} → {c['b']['confidence']}"
+            )
+
+
+def diff_json(a, b, changes) -> Dict[str, Any]:
+    def totals(x):
+        return {
+            "spans": x["summary"]["spans"],
+            "llm_calls": x["summary"]["llm_calls"],
+            "tool_calls": x["summary"]["tool_calls"],
+            "decisions": len(x["decisions"]),
+            "latency": x["latency"],
+            "prompt_tokens": x["prompt_tokens"],
+            "completion_tokens": x["completion_tokens"],
+        }
+
+    ta, tb = totals(a), totals(b)
+    counts = Counter(c["op"] for c in changes)
+    return {
+        "a": ta,
+        "b": tb,
+        "delta": {k: round(tb[k] - ta[k], 6) for k in ta},
+        "decisions": {
+            "inserted": counts["inserted"],
+            "removed": counts["removed"],
+            "changed": counts["changed"],
+            "confidence": counts["confidence"],
+            "changes": changes,
+        },
+    }
+
+
+def main(path_a: str, path_b: str) -> int:
+    """
+    Print the diff of two trace files (the original entry point;
+    the CLI goes through run()).
+    """
+    return run([str(path_a), str(path_b)])
+
+
+def run(argv: List[str]) -> int:
+    if "--baseline" in argv or "--candidate" in argv:
+        from agentzen.cli.fleet import main as fleet_main
+
+        return fleet_main(argv)
+
+    paths = [a for a in argv if not a.startswith("--")]
+    if len(paths) != 2:
+        print("Usage: agentzen trace diff <a.jsonl> <b.jsonl> [--json]")
+        print("       agentzen trace diff --baseline <dir|glob> --candidate <dir|glob>")
+        return 1
+
+    a = summarize(load_spans(Path(paths[0])))
+    b = summarize(load_spans(Path(paths[1])))
+    changes = diff_decisions(a["decisions"], b["decisions"])
+
+    if "--json" in argv:
+        json.dump(diff_json(a, b, changes), sys.stdout, indent=2, default=str)
+        print()
+        return 0
+
+    print_decision_diff(a, b, changes)
     diff(a, b)
+    return 0
@@ -0,0 +1,216 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+from agentzen.tracing.telemetry import TELEMETRY
+
+
+class AsyncExportPipeline:
+    """
+    Non-blocking export path for code running on an asyncio loop.
+
+    export() only puts the span on a bounded asyncio.Queue; a task
+    owned by the running loop drains it in batches. Synchronous
+    exporters run each batch in an executor so their file I/O never
+    touches the loop; async-only exporters are awaited directly.
+
+    Spans exported from outside the loop thread are handed over
+    with call_soon_threadsafe. If no loop has been seen yet the
+    span is exported synchronously, exactly as without the pipeline
+    (async-only exporters count it as dropped instead).
+
+    When the loop the pipeline was bound to has gone away (a later
+    asyncio.run(), say), the next loop to export, flush or close it
+    takes over the spans still queued.
+
+    A span the exporter fails on is counted in export_errors and
+    dropped; the rest of its batch is still exported.
+    """
+
+    def __init__(
+        self,
+        exporter: Any,
+        max_queue_size: int = 10000,
+        max_batch_size: int = 256,
+        executor: Optional[Executor] = None,
+    ):
+        if not hasattr(exporter, "export_async") and not hasattr(exporter, "export"):
+            raise RuntimeError(
+                "Exporter must implement export(span) or export_async(span)"
+            )
+
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+        TELEMETRY.register_queue(self)
+
+    # --------------------------------------------------
+    # PRODUCER SIDE
+    # --------------------------------------------------
+
+    def export(self, span: Any):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and (
+            self._loop is None or self._loop is loop or self._loop.is_closed()
+        ):
+            self._enqueue(loop, span)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._enqueue, self._loop, span)
+        elif hasattr(self.exporter, "export"):
+            self.exported += self._export_sync([span])
+        else:
+            self.dropped += 1
+            TELEMETRY.add("spans.dropped")
+
+    def _enqueue(self, loop: asyncio.AbstractEventLoop, span: Any):
+        if self._loop is not loop:
+            self._adopt(loop)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._drain())
+
+        try:
+            self._queue.put_nowait(span)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            TELEMETRY.add("spans.dropped")
+
+    def _adopt(self, loop: asyncio.AbstractEventLoop):
+        # Rebind to loop. The old queue's drain task went with its
+        # loop, so its spans move to the new queue (counted as
+        # dropped if they do not fit) instead of being lost.
+        old = self._queue
+        self._loop = loop
+        self._queue = asyncio.Queue(self.max_queue_size)
+        self._task = None
+        if old is None:
+            return
+        while True:
+            try:
+                span = old.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                self._queue.put_nowait(span)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                TELEMETRY.add("spans.dropped")
+        if not self._queue.empty():
+            self._task = loop.create_task(self._drain())
+
+    # --------------------------------------------------
+    # DRAIN TASK
+    # --------------------------------------------------
+
+    async def _drain(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                if hasattr(self.exporter, "export"):
+                    # One executor hop per batch rather than per span.
+                    self.exported += await self._loop.run_in_executor(
+                        self.executor, self._export_sync, batch
+                    )
+                else:
+                    for span in batch:
+                        try:
+                            await self.exporter.export_async(span)
+                        except Exception:
+                            self._export_failed()
+                        else:
+                            self.exported += 1
+            except Exception:
+                # The executor itself failed (e.g. shut down).
+                self.export_errors += 1
+                TELEMETRY.add("export.errors")
+                TELEMETRY.add("spans.dropped", len(batch))
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _export_sync(self, spans: List[Any]) -> int:
+        exported = 0
+        for span in spans:
+            try:
+                self.exporter.export(span)
+            except Exception:
+                self._export_failed()
+            else:
+                exported += 1
+        return exported
+
+    def _export_failed(self):
+        # Drop the one span, not the batch.
+        self.export_errors += 1
+        TELEMETRY.add("export.errors")
+        TELEMETRY.add("spans.dropped")
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+
+    async def aflush(self):
+        """
+        Wait until every span queued so far has been exported.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            if self._loop.is_running():
+                # Owned by a loop in another thread: flush it there.
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(self.aflush(), self._loop)
+                )
+                return
+            self._adopt(loop)
+        if self._queue is not None and self._task is not None:
+            await self._queue.join()
+
+    async def aclose(self):
+        """
+        Drain the queue, stop the drain task and close the exporter.
+        """
+        await self.aflush()
+
+        if self._task is not None:
+            if self._loop is asyncio.get_running_loop():
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            else:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            self._task = None
+
+        if hasattr(self.exporter, "aclose"):
+            await self.exporter.aclose()
+        elif hasattr(self.exporter, "shutdown"):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.exporter.shutdown)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "exported": self.exported,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors,
+        }
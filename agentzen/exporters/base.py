@@ -1,12 +1,43 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
 from agentzen.tracing.span import TraceSpan
 
 
 class SpanExporter(ABC):
+    """
+    Exporter protocol used by Tracer.
+
+    export() is called once per finished span, on the thread that
+    finished it, so it must be thread-safe and should be quick.
+    flush() and shutdown() are optional for exporters that buffer.
+    """
+
     @abstractmethod
-    def on_span_start(self, span: TraceSpan):
+    def export(self, span: TraceSpan):
         ...
 
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        pass
+
+
+class AsyncSpanExporter(ABC):
+    """
+    Exporter protocol for asyncio applications.
+
+    export_async() is awaited by AsyncExportPipeline on the
+    event loop, never by traced code, so implementations may
+    do network or disk I/O as long as they do not block the loop.
+    """
+
     @abstractmethod
-    def on_span_end(self, span: TraceSpan):
+    async def export_async(self, span: TraceSpan):
         ...
+
+    async def aclose(self):
+        """
+        Release resources. Called once, after the last export_async().
+        """
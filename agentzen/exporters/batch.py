@@ -0,0 +1,255 @@
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from agentzen.tracing.telemetry import TELEMETRY
+
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+_PROCESSORS: "weakref.WeakSet[BatchProcessor]" = weakref.WeakSet()
+
+
+def _reinit_after_fork():
+    for processor in list(_PROCESSORS):
+        processor._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+class BatchProcessor:
+    """
+    Bounded in-memory queue drained by a background writer thread.
+
+    Items are handed to write_batch(items) in chunks of at most
+    max_batch_size, either when that many are waiting or when
+    flush_interval seconds have passed since the last write.
+    write_batch may return how many of the items it wrote; None
+    means all of them, an exception none.
+
+    When the queue is full, overflow decides what happens:
+        block        wait for the writer to make room
+        drop_oldest  discard the oldest queued item
+        drop_newest  discard the item being added
+
+    Drops are counted, never raised, so a slow disk can not
+    turn into an exception inside traced code.
+
+    A forked child (gunicorn --preload, celery prefork) gets an
+    empty queue and its own writer thread; on_fork, if given, is
+    called in the child first to reset the owner's state. Spans
+    queued before the fork are the parent's to write.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any]], Optional[int]],
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        name: str = "agentzen-batch",
+        on_fork: Optional[Callable[[], None]] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}"
+            )
+        if max_queue_size < 1 or max_batch_size < 1:
+            raise ValueError("max_queue_size and max_batch_size must be >= 1")
+
+        self._write_batch = write_batch
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = min(max_batch_size, max_queue_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.name = name
+        self._on_fork = on_fork
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.write_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+        TELEMETRY.register_queue(self)
+        _PROCESSORS.add(self)
+
+    # --------------------------------------------------
+    # PRODUCER SIDE
+    # --------------------------------------------------
+
+    def put(self, item: Any) -> bool:
+        """
+        Queue an item for the writer. Returns False if it was dropped.
+        """
+        with self._cond:
+            if self._closed:
+                self.dropped_newest += 1
+                TELEMETRY.add("spans.dropped")
+                return False
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow == "drop_newest":
+                    self.dropped_newest += 1
+                    TELEMETRY.add("spans.dropped")
+                    return False
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped_oldest += 1
+                    TELEMETRY.add("spans.dropped")
+                else:
+                    while len(self._queue) >= self.max_queue_size and not self._closed:
+                        self._cond.notify_all()
+                        self._cond.wait()
+                    if self._closed:
+                        self.dropped_newest += 1
+                        TELEMETRY.add("spans.dropped")
+                        return False
+
+            self._queue.append(item)
+            self.enqueued += 1
+            if len(self._queue) >= self.max_batch_size:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything queued so far has been written.
+
+        Returns False if the timeout expired first.
+        """
+        start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                if not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        TELEMETRY.observe("flush", time.perf_counter() - start)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Drain the queue and stop the writer. Safe to call more than once.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        try:
+            atexit.unregister(self.shutdown)
+        except Exception:
+            pass
+
+    # --------------------------------------------------
+    # STATS
+    # --------------------------------------------------
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.dropped_newest
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "queued": len(self._queue),
+            "dropped_oldest": self.dropped_oldest,
+            "dropped_newest": self.dropped_newest,
+            "write_errors": self.write_errors,
+        }
+
+    # --------------------------------------------------
+    # FORK
+    # --------------------------------------------------
+
+    def _after_fork(self):
+        # Only the forking thread survives in the child: the writer
+        # is gone and the condition's lock may have been held.
+        self._cond = threading.Condition()
+        self._queue.clear()
+        self._in_flight = 0
+        self._flush_requested = False
+        self.enqueued = self.written = 0
+        self.dropped_oldest = self.dropped_newest = self.write_errors = 0
+        if self._on_fork is not None:
+            self._on_fork()
+        if not self._closed:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    # --------------------------------------------------
+    # WRITER THREAD
+    # --------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while (
+                    len(self._queue) < self.max_batch_size
+                    and not self._flush_requested
+                    and not self._closed
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                if not self._queue:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    continue
+
+                n = min(len(self._queue), self.max_batch_size)
+                batch = [self._queue.popleft() for _ in range(n)]
+                self._in_flight = n
+                # Wake producers blocked on a full queue.
+                self._cond.notify_all()
+
+            start = time.perf_counter()
+            try:
+                result = self._write_batch(batch)
+            except Exception:
+                written = 0
+                self.write_errors += 1
+                TELEMETRY.add("export.errors")
+            else:
+                written = n if result is None else result
+                TELEMETRY.add("batches.written")
+            TELEMETRY.observe("write_batch", time.perf_counter() - start)
+
+            with self._cond:
+                self.written += written
+                self._in_flight = 0
+                if not self._queue:
+                    self._flush_requested = False
+                self._cond.notify_all()
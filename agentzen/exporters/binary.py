@@ -0,0 +1,170 @@
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from agentzen.replay.binary import MAGIC, BinaryWriter, read_strings
+from agentzen.replay.blobs import BlobStore
+from agentzen.tracing.telemetry import TELEMETRY
+
+from .batch import BatchProcessor
+from .jsonl import resolve_blob_store, span_record
+from .serialize import DEFAULT_SERIALIZER, SpanSerializer
+
+
+# What BinaryWriter.write() raises for a record it can not encode
+# (nothing has been written then). OSError is left to the caller.
+_ENCODE_ERRORS = (ValueError, TypeError, OverflowError, RecursionError, struct.error)
+
+
+class BinaryExporter:
+    """
+    Append finished spans to a compact binary trace file (.azb).
+
+    The file keeps one handle open for its whole lifetime because
+    the string table is shared by every record in it. Appending to
+    an existing file reloads its string table first. batch=True,
+    blobs and serializer work as for JSONLExporter; the serializer
+    encodes values the binary format has no tag for.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch: bool = False,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        blobs: Union[bool, BlobStore, None] = None,
+        serializer: Optional[SpanSerializer] = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.serializer = serializer or DEFAULT_SERIALIZER
+        self.blobs = resolve_blob_store(self.path, blobs, self.serializer)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer: Optional[BinaryWriter] = None
+        self._batch: Optional[BatchProcessor] = None
+
+        self.encode_errors = 0
+        self.write_errors = 0
+
+        if batch:
+            self._batch = BatchProcessor(
+                self._write_batch,
+                max_queue_size=max_queue_size,
+                max_batch_size=max_batch_size,
+                flush_interval=flush_interval,
+                overflow=overflow,
+                name="agentzen-binary-writer",
+            )
+
+    def export(self, span: Any):
+        if self._batch is not None:
+            self._batch.put(span)
+            return
+        try:
+            self._write_batch([span])
+        except Exception:
+            self.write_errors += 1
+            TELEMETRY.add("export.errors")
+            TELEMETRY.add("spans.dropped")
+
+    def write_record(self, record: Dict[str, Any]) -> bool:
+        """
+        Append an already-serialized span record (used by convert).
+        Returns False if it could not be encoded.
+        """
+        with self._lock:
+            writer = self._open()
+            try:
+                writer.write(record)
+            except _ENCODE_ERRORS:
+                self.encode_errors += 1
+                return False
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if self._batch is not None and not self._batch.flush(timeout):
+            return False
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        if self._batch is not None:
+            self._batch.shutdown(timeout)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+    @property
+    def dropped(self) -> int:
+        return self._batch.dropped if self._batch is not None else 0
+
+    def stats(self) -> Dict[str, int]:
+        if self._batch is None:
+            return {"encode_errors": self.encode_errors, "write_errors": self.write_errors}
+        return {**self._batch.stats(), "encode_errors": self.encode_errors}
+
+    # --------------------------------------------------
+
+    def _open(self) -> BinaryWriter:
+        if self._writer is None:
+            if self.path.exists() and self.path.stat().st_size > 0:
+                self._file = self.path.open("r+b")
+                strings = read_strings(self._file)
+            else:
+                self._file = self.path.open("wb")
+                self._file.write(MAGIC)
+                strings = []
+            self._writer = BinaryWriter(self._file, strings, dumps=self.serializer.dumps)
+        return self._writer
+
+    def _write_batch(self, spans: List[Any]) -> int:
+        with self._lock:
+            writer = self._open()
+            written = count = 0
+            for span in spans:
+                try:
+                    record = self._record(span)
+                except Exception:
+                    # e.g. a failed blob store write
+                    self._encode_failed()
+                    continue
+                # Encoding and buffered writing are one step here. A
+                # record that fails to encode writes nothing; a failed
+                # file write fails the batch.
+                try:
+                    if TELEMETRY.sampled("serialize"):
+                        start = time.perf_counter()
+                        written += writer.write(record)
+                        TELEMETRY.observe("serialize", time.perf_counter() - start)
+                    else:
+                        written += writer.write(record)
+                except _ENCODE_ERRORS:
+                    self._encode_failed()
+                    continue
+                count += 1
+            self._file.flush()
+            TELEMETRY.add("bytes.written", written)
+        return count
+
+    def _encode_failed(self):
+        # Drop the one span, not the batch.
+        self.encode_errors += 1
+        TELEMETRY.add("export.errors")
+        TELEMETRY.add("spans.dropped")
+
+    def _record(self, span: Any) -> Dict[str, Any]:
+        record = span_record(span)
+        if self.blobs is not None:
+            self.blobs.externalize(record)
+        return record
@@ -0,0 +1,341 @@
+import os
+import select
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from agentzen.tracing.telemetry import TELEMETRY
+
+from .batch import BatchProcessor
+from .jsonl import span_record
+from .serialize import DEFAULT_SERIALIZER, SpanSerializer
+
+
+# ---------------------------------------------------------------------
+# COLLECTOR WIRE PROTOCOL
+#
+# A client opens a stream (Unix domain socket, or TCP on localhost),
+# sends HELLO once, then any number of frames:
+#
+#   u32 big-endian payload length | payload
+#
+# A payload is a batch of span records, JSONL-encoded (one record
+# per line, as in a trace file). There are no replies: backpressure
+# is the stream's own flow control. A collector that falls behind
+# stops reading, the client's send blocks, its queue fills and its
+# overflow policy applies.
+# ---------------------------------------------------------------------
+
+HELLO = b"AZC1"
+MAX_FRAME = 64 * 1024 * 1024
+
+
+def _runtime_dir() -> str:
+    # Spans carry prompts and outputs: the default socket lives in a
+    # directory only this user can enter, never straight in /tmp.
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"agentzen-{user}")
+
+
+DEFAULT_ADDRESS = "unix:" + os.path.join(_runtime_dir(), "agentzen.sock")
+
+_LENGTH = struct.Struct(">I")
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """
+    (socket family, address) for "unix:PATH", "tcp://HOST:PORT" or
+    "HOST:PORT". Anything else is taken as a socket path.
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    elif "/" in address or ":" not in address:
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def read_exactly(f: Any, n: int) -> Optional[bytes]:
+    """
+    n bytes from a file-like stream, or None at a clean EOF before
+    the first byte. EOFError if it ends part way.
+    """
+    data = f.read(n)
+    if not data:
+        return None
+    while len(data) < n:
+        more = f.read(n - len(data))
+        if not more:
+            raise EOFError("connection closed inside a frame")
+        data += more
+    return data
+
+
+def read_frame(f: Any) -> Optional[bytes]:
+    """
+    The next frame's payload from a file-like stream, or None at EOF.
+    """
+    header = read_exactly(f, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+    if length == 0:
+        return b""
+    payload = read_exactly(f, length)
+    if payload is None:
+        raise EOFError("connection closed inside a frame")
+    return payload
+
+
+def private_dir(path: str, create: bool = False):
+    """
+    Check that the directory of the default socket path belongs to
+    this user and is closed to everyone else (creating it, mode
+    0700, if create). Other socket paths are the caller's business.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory != os.path.abspath(os.path.dirname(parse_address(DEFAULT_ADDRESS)[1])):
+        return
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid") or not os.path.isdir(directory):
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(
+            f"{directory} is not private to this user; refusing to use its socket"
+        )
+
+
+def connect(address: str, timeout: Optional[float] = None) -> socket.socket:
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX:
+        private_dir(addr)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(addr)
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(HELLO)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+# ---------------------------------------------------------------------
+# CLIENT
+# ---------------------------------------------------------------------
+
+class CollectorExporter:
+    """
+    Send finished spans to an `agentzen collect` daemon, so many
+    worker processes can share one trace store.
+
+    Spans are queued and sent in batches by a background thread
+    (see BatchProcessor for the queue and overflow semantics), one
+    frame per batch. While the collector is unreachable, frames are
+    kept in a retry buffer of up to retry_buffer_bytes, oldest
+    dropped first, and resent in order once it is back; reconnects
+    back off exponentially up to max_backoff seconds. Spans that
+    were in the socket buffers when a collector died are lost.
+
+    In stats(), written counts the spans the sender thread has
+    delivered; spans_sent also counts those flush() and shutdown()
+    got out of the retry buffer.
+    """
+
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        retry_buffer_bytes: int = 64 * 1024 * 1024,
+        timeout: Optional[float] = 30.0,
+        max_backoff: float = 5.0,
+        serializer: Optional[SpanSerializer] = None,
+    ):
+        parse_address(address)
+        self.address = address
+        self.retry_buffer_bytes = retry_buffer_bytes
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.serializer = serializer or DEFAULT_SERIALIZER
+
+        self._send_lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._pending: Deque[Tuple[bytes, int]] = deque()
+        self._pending_bytes = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+        self.frames_sent = 0
+        self.spans_sent = 0
+        self.reconnects = 0
+        self.dropped_spans = 0
+
+        self._batch = BatchProcessor(
+            self._write_batch,
+            max_queue_size=max_queue_size,
+            max_batch_size=max_batch_size,
+            flush_interval=flush_interval,
+            overflow=overflow,
+            name="agentzen-collector-client",
+            on_fork=self._after_fork,
+        )
+
+    def export(self, span: Any):
+        self._batch.put(span)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued span has been sent. Returns False if
+        some are still waiting for the collector.
+        """
+        if not self._batch.flush(timeout):
+            return False
+        with self._send_lock:
+            self._drain(force=True)
+            return not self._pending
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Send what is queued (one last attempt for the retry buffer)
+        and close the connection.
+        """
+        self._batch.shutdown(timeout)
+        with self._send_lock:
+            self._drain(force=True)
+            if self._pending:
+                self._drop(len(self._pending))
+            self._disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._batch.stats())
+        stats.update(
+            {
+                "frames_sent": self.frames_sent,
+                "spans_sent": self.spans_sent,
+                "pending_frames": len(self._pending),
+                "pending_bytes": self._pending_bytes,
+                "reconnects": self.reconnects,
+                "dropped_spans": self.dropped_spans,
+                "connected": self._sock is not None,
+            }
+        )
+        return stats
+
+    def _after_fork(self):
+        # The child must not write into the parent's connection or
+        # resend the parent's frames; it opens its own connection.
+        self._send_lock = threading.Lock()
+        self._disconnect()  # closes the child's copy only
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self.frames_sent = self.spans_sent = self.reconnects = self.dropped_spans = 0
+
+    # --------------------------------------------------
+    # SENDER THREAD
+    # --------------------------------------------------
+
+    def _write_batch(self, spans: List[Any]) -> int:
+        # Counts spans delivered, not queued: a frame left in the
+        # retry buffer is counted when a later batch gets it out.
+        payload = b"".join(
+            self.serializer.dumps(span_record(span), newline=True) for span in spans
+        )
+        frame = encode_frame(payload)
+        with self._send_lock:
+            self._pending.append((frame, len(spans)))
+            self._pending_bytes += len(frame)
+            sent = self._drain()
+            while self._pending_bytes > self.retry_buffer_bytes and len(self._pending) > 1:
+                self._drop(1)
+        return sent
+
+    def _drain(self, force: bool = False) -> int:
+        sent = 0
+        while self._pending:
+            sock = self._connection(force)
+            if sock is None:
+                break
+            frame, n = self._pending[0]
+            try:
+                sock.sendall(frame)
+            except OSError:
+                self._disconnect()
+                self._failed()
+                break
+            self._pending.popleft()
+            self._pending_bytes -= len(frame)
+            self.frames_sent += 1
+            self.spans_sent += n
+            sent += n
+        return sent
+
+    def _connection(self, force: bool) -> Optional[socket.socket]:
+        if self._sock is not None:
+            if not _peer_closed(self._sock):
+                return self._sock
+            self._disconnect()
+        if not force and time.monotonic() < self._retry_at:
+            return None
+        try:
+            self._sock = connect(self.address, self.timeout)
+        except OSError:
+            self._failed()
+            return None
+        if self._backoff:
+            self.reconnects += 1
+        self._backoff = 0.0
+        return self._sock
+
+    def _failed(self):
+        self._backoff = min(self.max_backoff, self._backoff * 2 or 0.1)
+        self._retry_at = time.monotonic() + self._backoff
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _drop(self, frames: int):
+        for _ in range(frames):
+            frame, n = self._pending.popleft()
+            self._pending_bytes -= len(frame)
+            self.dropped_spans += n
+            TELEMETRY.add("spans.dropped", n)
+
+
+def _peer_closed(sock: socket.socket) -> bool:
+    # The collector never writes, so a readable socket means it has
+    # closed the connection. Sending on it would appear to succeed
+    # and lose the frame.
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except (OSError, ValueError):
+        return True
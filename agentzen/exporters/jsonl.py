@@ -1,29 +1,305 @@
-import json
+import asyncio
+import threading
+import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from agentzen.replay.blobs import BlobStore
+from agentzen.replay.index import IndexWriter, append_entries, build_index
+from agentzen.tracing.telemetry import TELEMETRY
+
+from .batch import BatchProcessor
+from .rotation import SegmentRotator
+from .serialize import DEFAULT_SERIALIZER, SpanSerializer
 
 
 class JSONLExporter:
-    def __init__(self, path: str):
+    """
+    Append finished spans to a JSONL file, one record per line.
+
+    By default every export() writes synchronously on the caller's
+    thread. With batch=True spans are queued instead and a background
+    writer appends them in chunks through a single open file handle;
+    see BatchProcessor for the queue and overflow semantics.
+
+    With index=True the exporter also maintains the trace index
+    sidecar (see replay.index) as it writes, so single traces can
+    be located without scanning the file.
+
+    max_bytes / max_age rotate the file into numbered segments;
+    closed segments can be compressed ("gzip" or "lzma") and pruned
+    by count (max_segments) or age in seconds (retention_age) on a
+    background thread. See SegmentRotator.
+
+    blobs moves large output / attribute values into a content-
+    addressed store next to the file, written once however often
+    the payload repeats: True for the default store, or a BlobStore
+    for custom thresholds. See replay.blobs.
+
+    Records are encoded by serializer (the shared SpanSerializer by
+    default), which copes with arbitrary objects in outputs and
+    attributes instead of raising. Spans that still fail (a blob
+    store write, say) and failed synchronous writes are dropped and
+    counted in stats(), never raised.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch: bool = False,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        index: bool = False,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        compress: Optional[str] = None,
+        max_segments: Optional[int] = None,
+        retention_age: Optional[float] = None,
+        blobs: Union[bool, BlobStore, None] = None,
+        serializer: Optional[SpanSerializer] = None,
+    ):
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.index = index
+        self.serializer = serializer or DEFAULT_SERIALIZER
+        self.blobs = resolve_blob_store(self.path, blobs, self.serializer)
+
+        self._rotator: Optional[SegmentRotator] = None
+        if max_bytes is not None or max_age is not None:
+            self._rotator = SegmentRotator(
+                self.path,
+                max_bytes=max_bytes,
+                max_age=max_age,
+                compress=compress,
+                max_segments=max_segments,
+                retention_age=retention_age,
+            )
+
+        if index and self.path.exists():
+            # Catch the sidecar up with anything written without it.
+            build_index(self.path)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._index: Optional[IndexWriter] = None
+        self._batch: Optional[BatchProcessor] = None
+
+        self.encode_errors = 0
+        self.write_errors = 0
+
+        if batch:
+            self._batch = BatchProcessor(
+                self._write_batch,
+                max_queue_size=max_queue_size,
+                max_batch_size=max_batch_size,
+                flush_interval=flush_interval,
+                overflow=overflow,
+                name="agentzen-jsonl-writer",
+            )
 
     def export(self, span: Any):
         """
         Export a single TraceSpan as JSONL.
         """
+        if self._batch is not None:
+            self._batch.put(span)
+            return
+
+        try:
+            self._write_batch([span])
+        except Exception:
+            self.write_errors += 1
+            TELEMETRY.add("export.errors")
+            TELEMETRY.add("spans.dropped")
+
+    async def export_async(self, span: Any):
+        """
+        Export from a coroutine without blocking the event loop.
+        """
+        if self._batch is not None and self._batch.overflow != "block":
+            self._batch.put(span)
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.export, span)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.shutdown)
+
+    # --------------------------------------------------
+    # BATCH MODE
+    # --------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued span is on disk.
+        """
+        if self._batch is None:
+            return True
+        return self._batch.flush(timeout)
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Drain the queue, stop the writer and close the file.
+        """
+        if self._batch is not None:
+            self._batch.shutdown(timeout)
+        with self._lock:
+            self._close_files()
+        if self._rotator is not None:
+            self._rotator.shutdown()
+
+    @property
+    def dropped(self) -> int:
+        return self._batch.dropped if self._batch is not None else 0
+
+    def stats(self) -> Dict[str, int]:
+        if self._batch is None:
+            return {"encode_errors": self.encode_errors, "write_errors": self.write_errors}
+        return {**self._batch.stats(), "encode_errors": self.encode_errors}
+
+    def _write_batch(self, spans: List[Any]) -> int:
+        encoded = []
+        for span in spans:
+            try:
+                if TELEMETRY.sampled("serialize"):
+                    start = time.perf_counter()
+                    encoded.append(self._encode(span))
+                    TELEMETRY.observe("serialize", time.perf_counter() - start)
+                else:
+                    encoded.append(self._encode(span))
+            except Exception:
+                # Drop the one span, not the batch.
+                self.encode_errors += 1
+                TELEMETRY.add("export.errors")
+                TELEMETRY.add("spans.dropped")
+
+        if not encoded:
+            return 0
+
+        with self._lock:
+            if self._rotator is None or self._rotator.max_bytes is None:
+                self._append(encoded)
+                return len(encoded)
+
+            # Split large batches so segments honour max_bytes.
+            chunk, size = [], 0
+            for item in encoded:
+                if chunk and size + len(item[1]) > self._rotator.max_bytes:
+                    self._append(chunk)
+                    chunk, size = [], 0
+                chunk.append(item)
+                size += len(item[1])
+            self._append(chunk)
+        return len(encoded)
+
+    def _append(self, encoded: List[Tuple[Dict[str, Any], bytes]]):
+        payload = b"".join(data for _, data in encoded)
+
+        if self._rotator is not None:
+            self._maybe_rotate(len(payload))
+
+        # Batch mode keeps one handle open; synchronous mode opens
+        # and closes the file around every write as before.
+        f = self._file if self._file is not None else self.path.open("ab")
+        try:
+            offset = f.seek(0, 2)
+            f.write(payload)
+            f.flush()
+            TELEMETRY.add("bytes.written", len(payload))
+
+            if self.index:
+                entries = []
+                for record, data in encoded:
+                    entries.append((
+                        record["trace_id"],
+                        offset,
+                        len(data),
+                        record["start_time"],
+                        record["end_time"],
+                        bool(record["error"]),
+                    ))
+                    offset += len(data)
+                try:
+                    if self._batch is None:
+                        append_entries(self.path, entries, offset)
+                    else:
+                        if self._index is None:
+                            self._index = IndexWriter(self.path)
+                        self._index.append(entries, offset)
+                except Exception:
+                    # The spans are on disk; a sidecar that falls
+                    # behind is detected as stale and rebuilt.
+                    TELEMETRY.add("export.errors")
+        finally:
+            if self._batch is None:
+                f.close()
+            else:
+                self._file = f
+
+    def _maybe_rotate(self, incoming: int):
+        if self._file is not None:
+            size = self._file.tell()
+        else:
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+
+        if self._rotator.should_rotate(size, incoming):
+            # The rotator renames the sidecar along with the file.
+            self._close_files()
+            self._rotator.rotate()
+
+    def _close_files(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    # --------------------------------------------------
+    # SERIALIZATION
+    # --------------------------------------------------
+
+    @staticmethod
+    def _record(span: Any) -> Dict[str, Any]:
+        return span_record(span)
+
+    def _encode(self, span: Any) -> Tuple[Dict[str, Any], bytes]:
+        record = self._record(span)
+        if self.blobs is not None:
+            self.blobs.externalize(record)
+        return record, self.serializer.dumps(record, newline=True)
+
+
+def resolve_blob_store(
+    path: Path,
+    blobs: Union[bool, BlobStore, None],
+    serializer: Optional[SpanSerializer] = None,
+) -> Optional[BlobStore]:
+    if blobs is None or blobs is False:
+        return None
+    if blobs is True:
+        return BlobStore.for_trace(path, serializer=serializer)
+    return blobs
+
 
-        record = {
-            "name": span.name,
-            "span_id": span.span_id,
-            "parent_id": span.parent_id,
-            "trace_id": span.trace_id,
-            "start_time": span.start_time,
-            "end_time": span.end_time,
-            "output": span.output,
-            "error": span.error,
-            "attributes": span.attributes,
-        }
-
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
+def span_record(span: Any) -> Dict[str, Any]:
+    """
+    The exported fields of a span, shared by all file exporters.
+    """
+    return {
+        "name": span.name,
+        "span_id": span.span_id,
+        "parent_id": span.parent_id,
+        "trace_id": span.trace_id,
+        "start_time": span.start_time,
+        "end_time": span.end_time,
+        "output": span.output,
+        "error": span.error,
+        "attributes": span.attributes,
+    }
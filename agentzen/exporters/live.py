@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Type
+
+from agentzen.analysis.antipatterns import Finding
+from agentzen.analysis.detectors import DECISION_PREFIX, DetectorEngine
+from agentzen.tracing.tracer import ABORT_MARKER
+
+
+class AntiPatternAbort(RuntimeError):
+    """
+    Raised into the agent when a live detector crosses an abort rule.
+    """
+
+    def __init__(self, trace_id: str, finding: Finding):
+        super().__init__(finding.message)
+        self.trace_id = trace_id
+        self.finding = finding
+
+
+class LiveAnalysisExporter:
+    """
+    Exporter wrapper that runs the anti-pattern detectors online,
+    as spans finish, instead of after the run.
+
+    Each open trace keeps one DetectorEngine, dropped when its root
+    span is exported. As soon as a detector crosses its threshold:
+
+        - on_finding(trace_id, finding, span) is called, if given
+        - if finding.rule is in abort_on, abort_exception is raised
+
+    The exception surfaces from the `with tracer.trace(...)` /
+    `tracer.decision(...)` block whose span tripped the rule, so
+    the agent can stop looping early. That needs spans exported
+    inline: do not combine with Tracer(nonblocking=True).
+
+    Rules that can only be judged on a whole trace (low confidence)
+    are reported through on_finding when the root span ends.
+
+    Spans are forwarded to exporter (if any) before analysis, so a
+    span that triggers an abort is still recorded. Non-decision spans
+    cost one prefix check unless a plugin detector wants all spans.
+    """
+
+    def __init__(
+        self,
+        exporter: Any = None,
+        on_finding: Optional[Callable[[str, Finding, Any], None]] = None,
+        abort_on: Iterable[str] = (),
+        abort_exception: Type[BaseException] = AntiPatternAbort,
+        config: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_traces: int = 10000,
+    ):
+        if exporter is not None and not hasattr(exporter, "export"):
+            raise RuntimeError("Exporter must implement export(span)")
+
+        self.exporter = exporter
+        self.on_finding = on_finding
+        self.abort_on = frozenset(abort_on)
+        self.abort_exception = abort_exception
+        self.max_traces = max_traces
+
+        self._prototype = DetectorEngine(config)
+        self._all_spans = not self._prototype.decisions_only
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, DetectorEngine]" = OrderedDict()
+        self._reported: Dict[str, Set[str]] = {}
+
+        self.findings = 0
+        self.aborts = 0
+        self.evicted_traces = 0
+
+    def export(self, span: Any):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+        is_root = span.parent_id is None
+        if not (self._all_spans or span.name.startswith(DECISION_PREFIX)):
+            if is_root and self._traces:
+                with self._lock:
+                    final = self._close(span.trace_id)
+                self._report_final(span.trace_id, final, span)
+            return
+
+        trace_id = span.trace_id
+        with self._lock:
+            engine = self._traces.get(trace_id)
+            if engine is None:
+                engine = self._traces[trace_id] = self._prototype.spawn()
+                if len(self._traces) > self.max_traces:
+                    # Roots that never arrive (crashed or unsampled
+                    # traces) must not leak state.
+                    evicted, _ = self._traces.popitem(last=False)
+                    self._reported.pop(evicted, None)
+                    self.evicted_traces += 1
+
+            crossed = engine.feed(span)
+            if crossed:
+                self._reported.setdefault(trace_id, set()).update(
+                    f.rule for f in crossed
+                )
+            final = self._close(trace_id) if is_root else ()
+
+        self._report_final(trace_id, final, span)
+
+        abort = None
+        for finding in crossed:
+            self.findings += 1
+            if self.on_finding is not None:
+                self.on_finding(trace_id, finding, span)
+            if abort is None and finding.rule in self.abort_on:
+                abort = finding
+
+        if abort is not None:
+            self.aborts += 1
+            if self.abort_exception is AntiPatternAbort:
+                error = AntiPatternAbort(trace_id, abort)
+            else:
+                error = self.abort_exception(abort.message)
+            try:
+                setattr(error, ABORT_MARKER, True)
+            except AttributeError:
+                pass
+            raise error
+
+    def _close(self, trace_id: str) -> List[Finding]:
+        """
+        Drop a finished trace's state. Returns its whole-trace findings
+        that were never crossed live. Called with the lock held.
+        """
+        engine = self._traces.pop(trace_id, None)
+        reported = self._reported.pop(trace_id, ())
+        if engine is None or self.on_finding is None:
+            return []
+        return [f for f in engine.result().findings if f.rule not in reported]
+
+    def _report_final(self, trace_id: str, findings: List[Finding], root: Any):
+        # Outside the lock: hooks may well emit spans of their own.
+        for finding in findings:
+            self.findings += 1
+            if self.on_finding is not None:
+                self.on_finding(trace_id, finding, root)
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if hasattr(self.exporter, "flush"):
+            return self.exporter.flush(timeout)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        if hasattr(self.exporter, "shutdown"):
+            self.exporter.shutdown(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "open_traces": len(self._traces),
+            "findings": self.findings,
+            "aborts": self.aborts,
+            "evicted_traces": self.evicted_traces,
+        }
@@ -1,13 +1,289 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
 from .base import SpanExporter
 from agentzen.tracing.span import TraceSpan
 
 
+# ---------------------------------------------------------------------
+# IN-MEMORY SPAN STORE
+#
+# Spans are numbered in arrival order (seq) and kept in:
+#
+#   _spans     seq -> span, oldest first
+#   _traces    trace_id -> [seqs], least recently active first
+#   _by_name   name -> {seq: span}, plus a sorted list of names
+#              for prefix lookups
+#   _errors    seq -> span, for spans with an error
+#
+# Capacity is enforced by evicting whole traces, least recently
+# active first, removing each of their spans from every index, so a
+# query never sees half a trace. Spans arriving for a trace evicted
+# before its root finished are dropped rather than starting a
+# fragment of it (until the root arrives).
+#
+# The trace being written to is never evicted: when it alone
+# exceeds the capacity, its oldest spans are dropped instead, so a
+# single oversized trace keeps its most recent spans.
+#
+# One lock guards all of it. Writers hold it for O(1) amortized
+# work; queries copy what they need under it and sort or filter
+# outside, so readers never block writers for long.
+# ---------------------------------------------------------------------
+
 class MemoryExporter(SpanExporter):
-    def __init__(self):
-        self.spans = []
+    """
+    Bounded, indexed in-process span store.
+
+    max_spans and max_bytes (an estimate of the spans' encoded size;
+    None for no byte limit) cap what is kept; past either, whole
+    traces are evicted, least recently active first. A trace that
+    alone exceeds them loses its oldest spans instead.
+    """
+
+    _MAX_REMEMBERED_EVICTIONS = 4096
+
+    def __init__(self, max_spans: Optional[int] = 10000, max_bytes: Optional[int] = None):
+        if max_spans is not None and max_spans < 1:
+            raise ValueError("max_spans must be >= 1")
+        self.max_spans = max_spans
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._spans: Dict[int, Any] = {}
+        self._sizes: Dict[int, int] = {}
+        self._traces: "OrderedDict[Any, Deque[int]]" = OrderedDict()
+        self._by_name: Dict[str, Dict[int, Any]] = {}
+        self._names: List[str] = []
+        self._errors: Dict[int, Any] = {}
+        self._evicted: "OrderedDict[Any, None]" = OrderedDict()
+        self._bytes = 0
+
+        self.evicted_traces = 0
+        self.dropped_spans = 0
+        self.truncated_spans = 0
+
+    # --------------------------------------------------
+    # WRITE SIDE
+    # --------------------------------------------------
+
+    def export(self, span: TraceSpan):
+        trace_id = span.trace_id
+        size = _approx_size(span) if self.max_bytes is not None else 0
+
+        with self._lock:
+            if trace_id in self._evicted:
+                if span.parent_id is None:
+                    del self._evicted[trace_id]
+                self.dropped_spans += 1
+                return
+
+            seq = self._seq
+            self._seq += 1
+
+            self._spans[seq] = span
+            if size:
+                self._sizes[seq] = size
+                self._bytes += size
+
+            seqs = self._traces.get(trace_id)
+            if seqs is None:
+                seqs = self._traces[trace_id] = deque()
+            else:
+                self._traces.move_to_end(trace_id)
+            seqs.append(seq)
+
+            name = span.name
+            named = self._by_name.get(name)
+            if named is None:
+                named = self._by_name[name] = {}
+                insort(self._names, name)
+            named[seq] = span
+
+            if span.error:
+                self._errors[seq] = span
+
+            while self._over_capacity():
+                oldest = next(iter(self._traces))
+                if oldest != trace_id:
+                    self._evict(oldest)
+                elif len(seqs) > 1:
+                    self._remove(seqs.popleft())
+                    self.truncated_spans += 1
+                else:
+                    # One span larger than max_bytes: keep it.
+                    break
+
+    def _over_capacity(self) -> bool:
+        return bool(self._traces) and (
+            (self.max_spans is not None and len(self._spans) > self.max_spans)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        )
+
+    def _evict(self, trace_id: Any):
+        seqs = self._traces.pop(trace_id)
+        complete = False
+        for seq in seqs:
+            if self._remove(seq).parent_id is None:
+                complete = True
+
+        self.evicted_traces += 1
+        if not complete:
+            self._evicted[trace_id] = None
+            if len(self._evicted) > self._MAX_REMEMBERED_EVICTIONS:
+                self._evicted.popitem(last=False)
+
+    def _remove(self, seq: int) -> Any:
+        # Drop one span from every index except _traces.
+        span = self._spans.pop(seq)
+        self._bytes -= self._sizes.pop(seq, 0)
+        named = self._by_name[span.name]
+        del named[seq]
+        if not named:
+            del self._by_name[span.name]
+            del self._names[bisect_left(self._names, span.name)]
+        self._errors.pop(seq, None)
+        return span
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._sizes.clear()
+            self._traces.clear()
+            self._by_name.clear()
+            self._names.clear()
+            self._errors.clear()
+            self._evicted.clear()
+            self._bytes = 0
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+
+    @property
+    def spans(self) -> List[Any]:
+        """
+        Every stored span, oldest first.
+        """
+        with self._lock:
+            return list(self._spans.values())
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def trace(self, trace_id: Any) -> List[Any]:
+        """
+        The stored spans of one trace in arrival order (empty if
+        unknown or evicted).
+        """
+        with self._lock:
+            seqs = self._traces.get(trace_id)
+            if seqs is None:
+                return []
+            return [self._spans[seq] for seq in seqs]
+
+    def recent_traces(self, limit: int = 10, complete: bool = False) -> List[Tuple[Any, List[Any]]]:
+        """
+        (trace_id, spans) for the most recently active traces, most
+        recent first. complete=True skips traces whose root span
+        has not finished yet.
+        """
+        result = []
+        with self._lock:
+            for trace_id in reversed(self._traces):
+                spans = [self._spans[seq] for seq in self._traces[trace_id]]
+                if complete and spans[-1].parent_id is not None:
+                    continue
+                result.append((trace_id, spans))
+                if len(result) >= limit:
+                    break
+        return result
+
+    def by_name(self, prefix: str, limit: Optional[int] = None) -> List[Any]:
+        """
+        Spans whose name starts with prefix, most recent first.
+        """
+        with self._lock:
+            matches: Dict[int, Any] = {}
+            i = bisect_left(self._names, prefix)
+            while i < len(self._names) and self._names[i].startswith(prefix):
+                matches.update(self._by_name[self._names[i]])
+                i += 1
+        return _most_recent(matches, limit)
+
+    def errors(self, limit: Optional[int] = None) -> List[Any]:
+        """
+        Spans that recorded an error, most recent first.
+        """
+        with self._lock:
+            matches = dict(self._errors)
+        return _most_recent(matches, limit)
+
+    def slowest(self, limit: int = 10, name_prefix: Optional[str] = None) -> List[Any]:
+        """
+        The limit longest spans (optionally only those whose name
+        starts with name_prefix), longest first.
+        """
+        spans = self.by_name(name_prefix) if name_prefix else self.spans
+        return heapq.nlargest(limit, spans, key=_duration)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "spans": len(self._spans),
+                "traces": len(self._traces),
+                "bytes": self._bytes,
+                "evicted_traces": self.evicted_traces,
+                "dropped_spans": self.dropped_spans,
+                "truncated_spans": self.truncated_spans,
+            }
+
+
+def _most_recent(spans: Dict[int, Any], limit: Optional[int]) -> List[Any]:
+    seqs = sorted(spans, reverse=True)
+    if limit is not None:
+        seqs = seqs[:limit]
+    return [spans[seq] for seq in seqs]
+
+
+def _duration(span: Any) -> float:
+    if span.start_time is None or span.end_time is None:
+        return 0.0
+    return span.end_time - span.start_time
+
+
+def _approx_size(span: Any) -> int:
+    """
+    Rough encoded size of a span in bytes: ids, timestamps and
+    names, plus its output, error and attributes (walked to a
+    bounded depth).
+    """
+    return (
+        160
+        + len(span.name or "")
+        + _approx_value(span.output, 0)
+        + _approx_value(span.error, 0)
+        + _approx_value(span.attributes, 0)
+    )
 
-    def on_span_start(self, span: TraceSpan):
-        pass
 
-    def on_span_end(self, span: TraceSpan):
-        self.spans.append(span)
+def _approx_value(value: Any, depth: int) -> int:
+    if value is None:
+        return 4
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, (bool, int, float)):
+        return 8
+    if depth >= 4:
+        return 64
+    if isinstance(value, dict):
+        return 2 + sum(
+            len(str(k)) + 4 + _approx_value(v, depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return 2 + sum(_approx_value(v, depth + 1) + 1 for v in value)
+    return 64
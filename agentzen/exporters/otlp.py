@@ -0,0 +1,391 @@
+import gzip
+import hashlib
+import http.client
+import math
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from agentzen.tracing.telemetry import TELEMETRY
+
+from .batch import BatchProcessor
+from .serialize import DEFAULT_SERIALIZER, SpanSerializer
+
+
+# ---------------------------------------------------------------------
+# OTLP/HTTP JSON EXPORTER
+#
+# Spans are queued by export() (never blocking: a full queue drops,
+# see BatchProcessor) and a background thread turns each batch into
+# one or more OTLP ExportTraceServiceRequest bodies of at most
+# max_request_bytes, gzips them and POSTs them over one persistent
+# HTTP/1.1 connection.
+#
+# Failed requests (connection errors, 429, 502, 503, 504) are retried
+# up to max_retries times with "full jitter" backoff: a random delay
+# in [0, min(max_backoff, initial_backoff * 2**attempt)], or the
+# server's Retry-After when it sends one. Other error statuses drop
+# the request; retrying would not change the answer.
+# ---------------------------------------------------------------------
+
+DEFAULT_ENDPOINT = "http://localhost:4318/v1/traces"
+
+SCOPE_NAME = "agentzen"
+
+_RETRYABLE_STATUS = (429, 502, 503, 504)
+
+_STATUS_UNSET = 0
+_STATUS_ERROR = 2
+_KIND_INTERNAL = 1
+
+_DECISION_PREFIX = "agent:decision:"
+
+
+class OTLPExporter:
+    """
+    Send finished spans to an OTLP/HTTP (JSON) endpoint such as an
+    OpenTelemetry Collector.
+
+    Batches hold at most max_batch_size spans and are sent at least
+    every flush_interval seconds; each request body is kept under
+    max_request_bytes before compression. overflow is "drop_oldest"
+    or "drop_newest": the traced code never waits for the network.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_ENDPOINT,
+        headers: Optional[Dict[str, str]] = None,
+        service_name: str = "agentzen",
+        resource_attributes: Optional[Dict[str, Any]] = None,
+        max_queue_size: int = 4096,
+        max_batch_size: int = 512,
+        max_request_bytes: int = 4 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        overflow: str = "drop_oldest",
+        compression: Optional[str] = "gzip",
+        timeout: float = 10.0,
+        max_retries: int = 5,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        serializer: Optional[SpanSerializer] = None,
+    ):
+        if overflow == "block":
+            raise ValueError("OTLPExporter must not block traced code; use a drop_* overflow")
+        if compression not in (None, "gzip"):
+            raise ValueError(f"compression must be None or 'gzip', got {compression!r}")
+
+        url = urlsplit(endpoint)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"not an http(s) endpoint: {endpoint!r}")
+        self.endpoint = endpoint
+        self._scheme = url.scheme
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path or "/v1/traces"
+
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        if compression == "gzip":
+            self.headers["Content-Encoding"] = "gzip"
+        self.compression = compression
+        self.max_request_bytes = max_request_bytes
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.serializer = serializer or DEFAULT_SERIALIZER
+
+        resource = {"service.name": service_name, **(resource_attributes or {})}
+        self._prefix = (
+            b'{"resourceSpans":[{"resource":'
+            + self.serializer.dumps({"attributes": _key_values(resource, self.serializer)})
+            + b',"scopeSpans":[{"scope":{"name":"' + SCOPE_NAME.encode() + b'"},"spans":['
+        )
+        self._suffix = b"]}]}]}"
+
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._closing = threading.Event()
+
+        self.requests = 0
+        self.encode_errors = 0
+        self.retries = 0
+        self.failed_requests = 0
+        self.spans_sent = 0
+        self.bytes_sent = 0
+        self.connections = 0
+
+        self._batch = BatchProcessor(
+            self._write_batch,
+            max_queue_size=max_queue_size,
+            max_batch_size=max_batch_size,
+            flush_interval=flush_interval,
+            overflow=overflow,
+            name="agentzen-otlp-exporter",
+        )
+
+    def export(self, span: Any):
+        self._batch.put(span)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self._batch.flush(timeout)
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Send what is queued and close the connection. Pending
+        retries stop waiting out their backoff.
+        """
+        self._closing.set()
+        self._batch.shutdown(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._batch.stats())
+        stats.update(
+            {
+                "requests": self.requests,
+                "encode_errors": self.encode_errors,
+                "retries": self.retries,
+                "failed_requests": self.failed_requests,
+                "spans_sent": self.spans_sent,
+                "bytes_sent": self.bytes_sent,
+                "connections": self.connections,
+            }
+        )
+        return stats
+
+    # --------------------------------------------------
+    # SENDER THREAD
+    # --------------------------------------------------
+
+    def _write_batch(self, spans: List[Any]) -> int:
+        sent = 0
+        budget = self.max_request_bytes - len(self._prefix) - len(self._suffix)
+        chunk: List[bytes] = []
+        size = 0
+        for span in spans:
+            try:
+                data = self.serializer.dumps(otlp_span(span, self.serializer))
+            except Exception:
+                # Drop the one span, not the batch.
+                self.encode_errors += 1
+                TELEMETRY.add("export.errors")
+                TELEMETRY.add("spans.dropped")
+                continue
+            if chunk and size + len(data) + 1 > budget:
+                sent += self._send(chunk)
+                chunk, size = [], 0
+            chunk.append(data)
+            size += len(data) + 1
+        if chunk:
+            sent += self._send(chunk)
+        return sent
+
+    def _send(self, encoded: List[bytes]) -> int:
+        body = self._prefix + b",".join(encoded) + self._suffix
+        if self.compression == "gzip":
+            body = gzip.compress(body, compresslevel=5)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+            status, retry_after = self._post(body)
+            self.requests += 1
+            if status is not None and 200 <= status < 300:
+                self.spans_sent += len(encoded)
+                self.bytes_sent += len(body)
+                TELEMETRY.add("bytes.written", len(body))
+                return len(encoded)
+            if status is not None and status not in _RETRYABLE_STATUS:
+                break
+            if attempt < self.max_retries:
+                self._closing.wait(self._backoff(attempt, retry_after))
+
+        self.failed_requests += 1
+        TELEMETRY.add("export.errors")
+        TELEMETRY.add("spans.dropped", len(encoded))
+        return 0
+
+    def _post(self, body: bytes) -> Tuple[Optional[int], Optional[float]]:
+        """
+        (HTTP status, Retry-After seconds), or (None, None) when the
+        request did not get an answer.
+        """
+        try:
+            conn = self._connection()
+            if conn.sock is None:
+                conn.connect()
+                # http.client writes headers and a large body
+                # separately; without this the body's last segment
+                # waits for the server's delayed ACK.
+                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.request("POST", self._path, body=body, headers=self.headers)
+            response = conn.getresponse()
+            # Read the body so the connection can be reused.
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._disconnect()
+            return None, None
+
+        if response.will_close:
+            self._disconnect()
+        return response.status, _retry_after(response.getheader("Retry-After"))
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.initial_backoff * 2 ** attempt))
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self._scheme == "https":
+                self._conn = http.client.HTTPSConnection(
+                    self._host, self._port, timeout=self.timeout
+                )
+            else:
+                self._conn = http.client.HTTPConnection(
+                    self._host, self._port, timeout=self.timeout
+                )
+            self.connections += 1
+        return self._conn
+
+    def _disconnect(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form; not worth parsing, use our own backoff.
+        return None
+
+
+# ---------------------------------------------------------------------
+# SPAN MAPPING
+#
+# agentzen span           OTLP span
+#   trace_id / span_id      traceId / spanId (hex; other ids hashed)
+#   start/end_time          start/endTimeUnixNano
+#   error                   status {code: ERROR, message}
+#   attributes              attributes
+#   output                  attribute agentzen.output
+#
+# Decision spans (agent:decision:NAME, from Tracer.decision()) put
+# their options / chosen / confidence under agentzen.decision.*, with
+# agentzen.decision.name = NAME. Other values are mapped through
+# the serializer's encoders (see exporters.serialize).
+# ---------------------------------------------------------------------
+
+def otlp_span(span: Any, serializer: Optional[SpanSerializer] = None) -> Dict[str, Any]:
+    serializer = serializer or DEFAULT_SERIALIZER
+    # TraceSpan creates its attributes dict on first access; don't.
+    if hasattr(span, "_attributes"):
+        attributes = dict(span._attributes or {})
+    else:
+        attributes = dict(span.attributes or {})
+
+    if span.name and span.name.startswith(_DECISION_PREFIX):
+        decision = {"agentzen.decision.name": span.name[len(_DECISION_PREFIX):]}
+        if attributes.get("type") == "decision":
+            del attributes["type"]
+            for key in ("options", "chosen", "confidence"):
+                if key in attributes:
+                    decision[f"agentzen.decision.{key}"] = attributes.pop(key)
+        attributes = {**decision, **attributes}
+
+    if span.output is not None:
+        attributes["agentzen.output"] = span.output
+
+    record: Dict[str, Any] = {
+        "traceId": _hex_id(span.trace_id, 16),
+        "spanId": _hex_id(span.span_id, 8),
+        "name": span.name or "",
+        "kind": _KIND_INTERNAL,
+        "startTimeUnixNano": _nanos(span.start_time),
+        "endTimeUnixNano": _nanos(span.end_time if span.end_time is not None else span.start_time),
+        "attributes": _key_values(attributes, serializer),
+        "status": {"code": _STATUS_UNSET},
+    }
+    if span.parent_id:
+        record["parentSpanId"] = _hex_id(span.parent_id, 8)
+    if span.error:
+        record["status"] = {"code": _STATUS_ERROR, "message": str(span.error)}
+    return record
+
+
+def _nanos(seconds: Optional[float]) -> str:
+    # uint64 fields are strings in OTLP JSON.
+    if seconds is None or not math.isfinite(seconds):
+        return "0"
+    return str(int(seconds * 1e9))
+
+
+def _hex_id(value: Any, nbytes: int) -> str:
+    text = str(value or "")
+    if len(text) == 2 * nbytes:
+        try:
+            int(text, 16)
+            return text.lower()
+        except ValueError:
+            pass
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=nbytes).hexdigest()
+
+
+def _key_values(values: Dict[str, Any], serializer: SpanSerializer) -> List[Dict[str, Any]]:
+    return [
+        {"key": str(key), "value": _any_value(value, serializer, 0)}
+        for key, value in values.items()
+        if value is not None
+    ]
+
+
+_NON_FINITE = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}
+
+
+def _any_value(value: Any, serializer: SpanSerializer, depth: int) -> Dict[str, Any]:
+    if isinstance(value, str):
+        return {"stringValue": value}
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        if -(1 << 63) <= value < (1 << 63):
+            return {"intValue": str(value)}
+        return {"stringValue": str(value)}
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            # JSON has no NaN/Infinity literals; the protobuf JSON
+            # mapping spells them as strings.
+            return {"doubleValue": _NON_FINITE[str(value)]}
+        return {"doubleValue": value}
+    if depth < 8:
+        if isinstance(value, (list, tuple)):
+            return {
+                "arrayValue": {
+                    "values": [_any_value(v, serializer, depth + 1) for v in value]
+                }
+            }
+        if isinstance(value, dict):
+            return {
+                "kvlistValue": {
+                    "values": [
+                        {"key": str(k), "value": _any_value(v, serializer, depth + 1)}
+                        for k, v in value.items()
+                    ]
+                }
+            }
+    if value is None:
+        return {}
+    if depth < 8:
+        # The serializer's stand-in: a dict for model objects, a
+        # string for datetimes, UUIDs, unknown types (their repr).
+        return _any_value(serializer.default(value), serializer, depth + 1)
+    return {"stringValue": serializer.dumps(value).decode("utf-8")}
@@ -0,0 +1,136 @@
+import gzip
+import lzma
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from agentzen.replay.index import index_path
+from agentzen.replay.segments import (
+    COMPRESSION_SUFFIXES,
+    closed_segments,
+    segment_path,
+)
+
+
+class SegmentRotator:
+    """
+    Size- and time-based rotation of an exporter's output file.
+
+    rotate() renames the active file to the next numbered segment
+    (trace.jsonl -> trace.000007.jsonl). Compression of closed
+    segments and retention run on a background thread, never on
+    the exporter's write path.
+
+    The caller must serialize calls and close its handle on the
+    active file before rotate().
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        compress: Optional[str] = None,
+        max_segments: Optional[int] = None,
+        retention_age: Optional[float] = None,
+    ):
+        if compress is not None and compress not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"compress must be one of {tuple(COMPRESSION_SUFFIXES)}, got {compress!r}"
+            )
+
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.max_segments = max_segments
+        self.retention_age = retention_age
+
+        existing = closed_segments(self.path)
+        self._seq = existing[-1][0] if existing else 0
+        self._opened_at = time.time()
+        self._worker = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="agentzen-segments"
+        )
+
+        self.rotations = 0
+
+    def should_rotate(self, size: int, incoming: int) -> bool:
+        if size == 0:
+            return False
+        if self.max_bytes is not None and size + incoming > self.max_bytes:
+            return True
+        if self.max_age is not None and time.time() - self._opened_at >= self.max_age:
+            return True
+        return False
+
+    def rotate(self):
+        self._opened_at = time.time()
+        if not self.path.exists():
+            return
+
+        self._seq += 1
+        closed = segment_path(self.path, self._seq)
+        os.replace(self.path, closed)
+        self.rotations += 1
+
+        # Byte offsets stay valid after a rename, so the index follows.
+        sidecar = index_path(self.path)
+        if sidecar.exists():
+            os.replace(sidecar, index_path(closed))
+
+        self._worker.submit(self._after_rotate, closed)
+
+    def shutdown(self):
+        self._worker.shutdown(wait=True)
+
+    # --------------------------------------------------
+    # BACKGROUND WORK
+    # --------------------------------------------------
+
+    def _after_rotate(self, closed: Path):
+        try:
+            if self.compress is not None:
+                self._compress(closed)
+            self._apply_retention()
+        except OSError:
+            # Housekeeping failures must never reach the exporter.
+            pass
+
+    def _compress(self, closed: Path):
+        suffix = COMPRESSION_SUFFIXES[self.compress]
+        target = closed.with_name(closed.name + suffix)
+        tmp = closed.with_name(closed.name + suffix + ".tmp")
+        opener = gzip.open if self.compress == "gzip" else lzma.open
+
+        with closed.open("rb") as src, opener(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp, target)
+        closed.unlink()
+
+        # Offsets into the uncompressed bytes are useless for seeking.
+        sidecar = index_path(closed)
+        if sidecar.exists():
+            sidecar.unlink()
+
+    def _apply_retention(self):
+        segments = closed_segments(self.path)
+
+        doomed = []
+        if self.max_segments is not None and len(segments) > self.max_segments:
+            doomed.extend(p for _, p in segments[: len(segments) - self.max_segments])
+
+        if self.retention_age is not None:
+            cutoff = time.time() - self.retention_age
+            doomed.extend(
+                p for _, p in segments if p not in doomed and p.stat().st_mtime < cutoff
+            )
+
+        for p in doomed:
+            p.unlink()
+            sidecar = index_path(p)
+            if sidecar.exists():
+                sidecar.unlink()
@@ -0,0 +1,262 @@
+import base64
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import math
+import uuid
+from pathlib import PurePath
+from typing import Any, Callable, Dict, Type
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+
+Encoder = Callable[[Any], Any]
+
+
+# ---------------------------------------------------------------------
+# SPAN SERIALIZATION
+#
+# Span outputs and attributes hold whatever the agent put there: LLM
+# response objects, tool results, datetimes, sets, bytes... Encoding
+# them must never fail, because exporters run in Tracer.trace()'s
+# finally block and an exception there lands in the agent.
+#
+#   1. orjson, when installed
+#   2. the stdlib json module
+#   3. a scrubbed copy of the value (cycles cut, odd keys stringified,
+#      non-finite floats nulled), encoded by the stdlib
+#
+# Values neither encoder knows go through default(), which looks up
+# an encoder for the value's type once and caches it by type:
+# registered encoders (along the MRO) first, then the usual model
+# protocols (model_dump, dict, to_dict, dataclass fields), then repr.
+#
+# The output must not depend on whether orjson is installed. orjson
+# is told to pass datetimes and dataclasses through to default(), so
+# registered encoders for them run; UUIDs, enums and numpy values it
+# always encodes itself, so registering an encoder for one of those
+# turns the fast path off. NaN and infinities become null on both
+# paths (the stdlib would write NaN, which is not JSON).
+# ---------------------------------------------------------------------
+
+_MAX_DEPTH = 64
+
+
+class SpanSerializer:
+    """
+    Encodes span records (or any value) to compact UTF-8 JSON bytes.
+    dumps() never raises.
+
+    fast=False ignores orjson even when it is installed; either way
+    the output decodes to the same values.
+    """
+
+    def __init__(self, fast: bool = True):
+        self.fast = fast and orjson is not None
+        self._encoders: Dict[type, Encoder] = dict(_BUILTIN_ENCODERS)
+        self._cache: Dict[type, Encoder] = {}
+        self.recovered = 0
+
+        if self.fast:
+            self._options = (
+                orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_SERIALIZE_NUMPY
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+            )
+
+    def register(self, type_: Type, encoder: Encoder):
+        """
+        Encode instances of type_ (and its subclasses) as encoder(value),
+        which must return something JSON can represent (possibly with
+        more values for default() to handle).
+        """
+        self._encoders[type_] = encoder
+        self._cache.clear()
+        if self.fast and _orjson_native(type_):
+            # orjson would never call default() for these.
+            self.fast = False
+
+    def dumps(self, value: Any, newline: bool = False) -> bytes:
+        if self.fast:
+            try:
+                if newline:
+                    return orjson.dumps(
+                        value,
+                        default=self.default,
+                        option=self._options | orjson.OPT_APPEND_NEWLINE,
+                    )
+                return orjson.dumps(value, default=self.default, option=self._options)
+            except Exception:
+                # Integers beyond 64 bits, cycles, invalid UTF-8, ...
+                pass
+
+        end = "\n" if newline else ""
+        try:
+            # ASCII output is both faster here and safe for lone surrogates.
+            text = json.dumps(
+                value, default=self.default, separators=(",", ":"), allow_nan=False
+            )
+            return (text + end).encode("ascii")
+        except Exception:
+            pass
+
+        self.recovered += 1
+        try:
+            text = json.dumps(_scrub(self, value, 0, set()), separators=(",", ":"))
+        except Exception:
+            text = json.dumps(_safe_repr(value))
+        return (text + end).encode("ascii")
+
+    def default(self, value: Any) -> Any:
+        cls = type(value)
+        encoder = self._cache.get(cls)
+        if encoder is None:
+            encoder = self._cache[cls] = self._resolve(cls)
+        try:
+            return encoder(value)
+        except Exception:
+            return _safe_repr(value)
+
+    def _resolve(self, cls: type) -> Encoder:
+        for base in cls.__mro__:
+            encoder = self._encoders.get(base)
+            if encoder is not None:
+                return encoder
+
+        if callable(getattr(cls, "model_dump", None)):
+            return _model_dump
+        if hasattr(cls, "__fields__") and callable(getattr(cls, "dict", None)):
+            return _pydantic_v1
+        if callable(getattr(cls, "to_dict", None)):
+            return _to_dict
+        if dataclasses.is_dataclass(cls):
+            return _dataclass_fields
+        return _safe_repr
+
+    def stats(self) -> Dict[str, int]:
+        return {"recovered": self.recovered}
+
+
+# ---------------------------------------------------------------------
+# ENCODERS
+# ---------------------------------------------------------------------
+
+def _isoformat(value) -> str:
+    return value.isoformat()
+
+
+def _bytes(value) -> str:
+    try:
+        return bytes(value).decode("utf-8")
+    except UnicodeDecodeError:
+        return "base64:" + base64.b64encode(bytes(value)).decode("ascii")
+
+
+def _decimal(value: decimal.Decimal):
+    return float(value) if value.is_finite() else str(value)
+
+
+_BUILTIN_ENCODERS: Dict[type, Encoder] = {
+    datetime.datetime: _isoformat,
+    datetime.date: _isoformat,
+    datetime.time: _isoformat,
+    datetime.timedelta: lambda v: v.total_seconds(),
+    decimal.Decimal: _decimal,
+    uuid.UUID: str,
+    enum.Enum: lambda v: v.value,
+    PurePath: str,
+    bytes: _bytes,
+    bytearray: _bytes,
+    memoryview: _bytes,
+    set: list,
+    frozenset: list,
+    BaseException: lambda v: f"{type(v).__name__}: {v}",
+}
+
+
+def _model_dump(value):
+    # pydantic v2 (OpenAI, Anthropic and LangChain response objects).
+    return value.model_dump()
+
+
+def _pydantic_v1(value):
+    return value.dict()
+
+
+def _to_dict(value):
+    return value.to_dict()
+
+
+def _dataclass_fields(value):
+    # Shallow: nested values come back through default().
+    return {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+
+
+def _orjson_native(cls: type) -> bool:
+    return issubclass(cls, (uuid.UUID, enum.Enum)) or cls.__module__.split(".")[0] == "numpy"
+
+
+def _safe_repr(value) -> str:
+    try:
+        return repr(value)
+    except Exception:
+        return f"<unserializable {type(value).__name__}>"
+
+
+def _scrub(serializer: SpanSerializer, value: Any, depth: int, seen: set) -> Any:
+    """
+    Plain-JSON copy of value for the last-resort encoding pass.
+    """
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (bool, int)):
+        return value
+    if isinstance(value, str):
+        return value
+    if depth >= _MAX_DEPTH:
+        return _safe_repr(value)
+
+    if isinstance(value, (dict, list, tuple)):
+        if id(value) in seen:
+            return "<circular>"
+        seen.add(id(value))
+        try:
+            if isinstance(value, dict):
+                return {
+                    k if isinstance(k, str) else _safe_repr(k): _scrub(
+                        serializer, v, depth + 1, seen
+                    )
+                    for k, v in value.items()
+                }
+            return [_scrub(serializer, v, depth + 1, seen) for v in value]
+        finally:
+            seen.discard(id(value))
+
+    converted = serializer.default(value)
+    if converted is value or type(converted) is type(value):
+        return _safe_repr(value)
+    return _scrub(serializer, converted, depth + 1, seen)
+
+
+# ---------------------------------------------------------------------
+# DEFAULT INSTANCE
+# ---------------------------------------------------------------------
+
+DEFAULT_SERIALIZER = SpanSerializer()
+
+
+def register_encoder(type_: Type, encoder: Encoder):
+    """
+    Register an encoder on the serializer shared by all exporters.
+    """
+    DEFAULT_SERIALIZER.register(type_, encoder)
+
+
+def dumps(value: Any, newline: bool = False) -> bytes:
+    return DEFAULT_SERIALIZER.dumps(value, newline)
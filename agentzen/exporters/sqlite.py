@@ -0,0 +1,123 @@
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from agentzen.replay.sqlite import SQLiteWriter, connect
+from agentzen.tracing.telemetry import TELEMETRY
+
+from .batch import BatchProcessor
+from .jsonl import span_record
+from .serialize import DEFAULT_SERIALIZER, SpanSerializer
+
+
+class SQLiteExporter:
+    """
+    Store finished spans in an SQLite trace database (.db).
+
+    Spans and their attributes go into indexed tables (see
+    replay.sqlite), so traces can be queried with `agentzen query`
+    and read back by every command that takes a trace file.
+
+    Each write is one transaction; use batch=True to group spans
+    into transactions of up to max_batch_size from a background
+    thread. The database is in WAL mode, so it can be read while
+    it is written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch: bool = False,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        serializer: Optional[SpanSerializer] = None,
+    ):
+        self.path = Path(path)
+        self.serializer = serializer or DEFAULT_SERIALIZER
+
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._writer = SQLiteWriter(self._conn, dumps=self.serializer.dumps)
+        self._batch: Optional[BatchProcessor] = None
+        self.write_errors = 0
+
+        if batch:
+            self._batch = BatchProcessor(
+                self._write_batch,
+                max_queue_size=max_queue_size,
+                max_batch_size=max_batch_size,
+                flush_interval=flush_interval,
+                overflow=overflow,
+                name="agentzen-sqlite-writer",
+            )
+
+    def export(self, span: Any):
+        if self._batch is not None:
+            self._batch.put(span)
+            return
+        try:
+            self._write_batch([span])
+        except Exception:
+            # A locked or broken database must not reach traced code.
+            self.write_errors += 1
+            TELEMETRY.add("export.errors")
+            TELEMETRY.add("spans.dropped")
+
+    def write_records(self, records: Iterable[Dict[str, Any]], chunk_size: int = 10000) -> int:
+        """
+        Insert already-serialized span records (used by convert),
+        chunk_size per transaction. Returns how many were written.
+        """
+        records = iter(records)
+        written = 0
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return written
+            with self._lock:
+                written += self._writer.write(chunk)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # Every write is committed; only the queue can hold spans.
+        if self._batch is not None:
+            return self._batch.flush(timeout)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        if self._batch is not None:
+            self._batch.shutdown(timeout)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def dropped(self) -> int:
+        return self._batch.dropped if self._batch is not None else 0
+
+    def stats(self) -> Dict[str, int]:
+        if self._batch is None:
+            return {"encode_errors": self._writer.skipped, "write_errors": self.write_errors}
+        return {**self._batch.stats(), "encode_errors": self._writer.skipped}
+
+    # --------------------------------------------------
+
+    def _write_batch(self, spans: List[Any]) -> int:
+        if TELEMETRY.sampled("serialize"):
+            start = time.perf_counter()
+            records = [span_record(span) for span in spans]
+            TELEMETRY.observe("serialize", time.perf_counter() - start)
+        else:
+            records = [span_record(span) for span in spans]
+        with self._lock:
+            if self._conn is None:
+                return 0
+            written = self._writer.write(records)
+        if written < len(records):
+            TELEMETRY.add("export.errors")
+            TELEMETRY.add("spans.dropped", len(records) - written)
+        return written
@@ -1,20 +1,188 @@
-from typing import Any, Dict
+import threading
+import time
+from collections import OrderedDict
+from time import perf_counter
+from typing import Any, Dict, List, Optional
 
-from langchain.callbacks.base import AsyncCallbackHandler
+try:
+    from langchain_core.callbacks.base import AsyncCallbackHandler
+except ImportError:  # LangChain before langchain-core
+    from langchain.callbacks.base import AsyncCallbackHandler
 
+from agentzen.tracing.span import now
+from agentzen.tracing.telemetry import TELEMETRY
 from agentzen.tracing.tracer import Tracer
-from agentzen.tracing.span import TraceSpan
+
+
+# ---------------------------------------------------------------------
+# RUN TRACKING
+#
+# LangChain names every chain, LLM and tool invocation by a run_id
+# and passes the run_id of the enclosing run as parent_run_id. Open
+# runs are kept in run_id -> _Run, and a span's parent is looked up
+# from parent_run_id, never from callback order or the current
+# context, so batched and concurrent generate() calls nest
+# correctly. Only a root run (no parent_run_id, or one we never
+# saw) nests under the current span of the calling context.
+#
+# A run whose end or error callback never arrives would stay open
+# forever. Runs are kept in order of last activity: a run is active
+# when it starts, and again whenever a run under it starts or ends,
+# which refreshes the whole chain of its ancestors. Each start first
+# ends (as failed) and exports the runs idle for more than ttl
+# seconds, then the least recently active ones beyond max_runs.
+#
+# Refreshing moves the ancestors behind the run that caused it, so a
+# run is always older than its ancestors, and the oldest run has no
+# open runs under it: a long agent whose steps keep starting and
+# ending is never cut out of its own trace, and an orphan is evicted
+# from the leaves up.
+#
+# Streamed tokens are appended to their LLM run and joined once
+# when it ends. A token never becomes a span of its own.
+#
+# The handler's own cost per callback is sampled into the
+# callback.start, callback.token and callback.end histograms of
+# Tracer.stats().
+# ---------------------------------------------------------------------
+
+class _Run:
+    __slots__ = ("span", "run_id", "parent", "active", "children", "tokens", "first_token")
+
+    def __init__(self, span: Any, run_id: Any, parent: "Optional[_Run]", active: float):
+        self.span = span
+        self.run_id = run_id
+        self.parent = parent
+        self.active = active
+        # Open runs directly under this one.
+        self.children = 0
+        self.tokens: Optional[List[str]] = None
+        self.first_token: Optional[float] = None
 
 
 class AgentZenLangChainCallback(AsyncCallbackHandler):
     """
     Async LangChain callback handler that emits clean,
     structured observability spans to agentzen Tracer.
+
+    Create the tracer with Tracer(exporter, nonblocking=True) so
+    finished spans are exported by a loop-owned task instead of
+    doing file I/O inside the callback.
+
+    Runs idle for more than ttl seconds (nothing under them started
+    or ended), or beyond the max_runs most recently active, are
+    ended with an error. A run with open runs under it is never
+    evicted before them.
     """
 
-    def __init__(self, tracer: Tracer):
+    def __init__(self, tracer: Tracer, ttl: float = 600.0, max_runs: int = 10000):
         self.tracer = tracer
-        self._active_spans: Dict[str, TraceSpan] = {}
+        self.ttl = ttl
+        self.max_runs = max_runs
+
+        self._lock = threading.Lock()
+        self._runs: "OrderedDict[Any, _Run]" = OrderedDict()
+
+        self.evicted_runs = 0
+
+    # ============================================================
+    # RUN BOOKKEEPING
+    # ============================================================
+
+    def _start(
+        self,
+        run_id: Any,
+        parent_run_id: Any,
+        name: str,
+        attributes: Dict[str, Any],
+    ):
+        timed = TELEMETRY.sampled("callback.start")
+        t0 = perf_counter() if timed else 0.0
+
+        current = time.monotonic()
+        expired = self._expire(current)
+
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id is not None else None
+        span = self.tracer.start_span(
+            name,
+            attributes=attributes,
+            parent=parent.span if parent is not None else None,
+        )
+        with self._lock:
+            self._runs[run_id] = _Run(span, run_id, parent, current)
+            if parent is not None:
+                parent.children += 1
+                self._touch(parent, current)
+
+        for run in expired:
+            self.tracer.record_exception(
+                run.span, TimeoutError("run never ended (evicted by agentzen)")
+            )
+
+        if timed:
+            TELEMETRY.observe("callback.start", perf_counter() - t0)
+
+    def _expire(self, current: float) -> List[_Run]:
+        expired = []
+        with self._lock:
+            runs = self._runs
+            while runs:
+                oldest = next(iter(runs.values()))
+                if len(runs) < self.max_runs and current - oldest.active <= self.ttl:
+                    break
+                if oldest.children:
+                    # Can not happen while ancestors stay behind
+                    # their runs (see _touch); never break a live tree.
+                    break
+                runs.popitem(last=False)
+                if oldest.parent is not None:
+                    oldest.parent.children -= 1
+                expired.append(oldest)
+            self.evicted_runs += len(expired)
+        if expired:
+            TELEMETRY.add("langchain.runs.evicted", len(expired))
+        return expired
+
+    def _touch(self, run: Optional[_Run], current: float):
+        # Called with the lock held: mark run and its ancestors active.
+        runs = self._runs
+        while run is not None and runs.get(run.run_id) is run:
+            run.active = current
+            runs.move_to_end(run.run_id)
+            run = run.parent
+
+    def _end(
+        self,
+        run_id: Any,
+        output: Any = None,
+        error: Optional[BaseException] = None,
+        response: Any = None,
+    ):
+        timed = TELEMETRY.sampled("callback.end")
+        t0 = perf_counter() if timed else 0.0
+
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is not None and run.parent is not None:
+                run.parent.children -= 1
+                self._touch(run.parent, time.monotonic())
+        if run is None:
+            return
+
+        if error is not None:
+            self.tracer.record_exception(run.span, error)
+        else:
+            if response is not None:
+                output = _llm_output(response, run)
+            self.tracer.end_span(run.span, output)
+
+        if timed:
+            TELEMETRY.observe("callback.end", perf_counter() - t0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"open_runs": len(self._runs), "evicted_runs": self.evicted_runs}
 
     # ============================================================
     # CHAINS
@@ -24,34 +192,32 @@ class AgentZenLangChainCallback(AsyncCallbackHandler):
         self,
         serialized: Dict[str, Any],
         inputs: Dict[str, Any],
-        run_id: str,
+        run_id: Any,
+        parent_run_id: Any = None,
         **kwargs,
     ):
-        span = self.tracer.start_span(
-            name=f"chain:{serialized.get('name', 'unknown')}",
-            attributes={"inputs": inputs},
+        self._start(
+            run_id,
+            parent_run_id,
+            f"chain:{_name(serialized, kwargs)}",
+            {"inputs": inputs},
         )
-        self._active_spans[run_id] = span
 
     async def on_chain_end(
         self,
         outputs: Dict[str, Any],
-        run_id: str,
+        run_id: Any,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if span:
-            self.tracer.end_span(span, outputs)
+        self._end(run_id, outputs)
 
     async def on_chain_error(
         self,
         error: BaseException,
-        run_id: str,
+        run_id: Any,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if span:
-            self.tracer.record_exception(span, error)
+        self._end(run_id, error=error)
 
     # ============================================================
     # LLM CALLS
@@ -61,65 +227,65 @@ class AgentZenLangChainCallback(AsyncCallbackHandler):
         self,
         serialized: Dict[str, Any],
         prompts: list,
-        run_id: str,
+        run_id: Any,
+        parent_run_id: Any = None,
         **kwargs,
     ):
         # IMPORTANT:
         # Do NOT put model info at span root.
         # LLM-specific metadata belongs in output only.
-        span = self.tracer.start_span(
-            name="llm:call",
-            attributes={
-                "prompts": prompts,
-            },
-        )
-        self._active_spans[run_id] = span
+        self._start(run_id, parent_run_id, "llm:call", {"prompts": prompts})
 
-    async def on_llm_end(
+    async def on_chat_model_start(
         self,
-        response: Any,
-        run_id: str,
+        serialized: Dict[str, Any],
+        messages: list,
+        run_id: Any,
+        parent_run_id: Any = None,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if not span:
-            return
-
-        # Stable, intentional LLM output schema
-        output: Dict[str, Any] = {
-            "text": None,
-            "token_usage": None,
-            "model": None,
-        }
+        self._start(
+            run_id,
+            parent_run_id,
+            "llm:call",
+            {"messages": [[_message(m) for m in batch] for batch in messages]},
+        )
 
-        try:
-            # Chat models (most common case)
-            if hasattr(response, "generations"):
-                gen = response.generations[0][0]
-                output["text"] = getattr(gen.message, "content", None)
+    async def on_llm_new_token(
+        self,
+        token: str,
+        run_id: Any = None,
+        **kwargs,
+    ):
+        timed = TELEMETRY.sampled("callback.token")
+        t0 = perf_counter() if timed else 0.0
 
-            # Token usage + model name
-            if hasattr(response, "llm_output") and isinstance(
-                response.llm_output, dict
-            ):
-                output["token_usage"] = response.llm_output.get("token_usage")
-                output["model"] = response.llm_output.get("model_name")
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                if run.tokens is None:
+                    run.tokens = []
+                    run.first_token = now()
+                run.tokens.append(token)
 
-        except Exception:
-            # Observability must never break execution
-            output["raw"] = str(response)
+        if timed:
+            TELEMETRY.observe("callback.token", perf_counter() - t0)
 
-        self.tracer.end_span(span, output)
+    async def on_llm_end(
+        self,
+        response: Any,
+        run_id: Any,
+        **kwargs,
+    ):
+        self._end(run_id, response=response)
 
     async def on_llm_error(
         self,
         error: BaseException,
-        run_id: str,
+        run_id: Any,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if span:
-            self.tracer.record_exception(span, error)
+        self._end(run_id, error=error)
 
     # ============================================================
     # TOOLS
@@ -129,31 +295,89 @@ class AgentZenLangChainCallback(AsyncCallbackHandler):
         self,
         serialized: Dict[str, Any],
         input_str: str,
-        run_id: str,
+        run_id: Any,
+        parent_run_id: Any = None,
         **kwargs,
     ):
-        span = self.tracer.start_span(
-            name=f"tool:{serialized.get('name', 'unknown')}",
-            attributes={"input": input_str},
+        self._start(
+            run_id,
+            parent_run_id,
+            f"tool:{_name(serialized, kwargs)}",
+            {"input": input_str},
         )
-        self._active_spans[run_id] = span
 
     async def on_tool_end(
         self,
         output: Any,
-        run_id: str,
+        run_id: Any,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if span:
-            self.tracer.end_span(span, output)
+        self._end(run_id, output)
 
     async def on_tool_error(
         self,
         error: BaseException,
-        run_id: str,
+        run_id: Any,
         **kwargs,
     ):
-        span = self._active_spans.pop(run_id, None)
-        if span:
-            self.tracer.record_exception(span, error)
+        self._end(run_id, error=error)
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+    # Runnables may pass serialized=None and their name as a kwarg.
+    if serialized and serialized.get("name"):
+        return serialized["name"]
+    return kwargs.get("name") or "unknown"
+
+
+def _message(message: Any) -> Dict[str, Any]:
+    return {
+        "role": getattr(message, "type", None),
+        "content": getattr(message, "content", message),
+    }
+
+
+def _llm_output(response: Any, run: _Run) -> Dict[str, Any]:
+    # Stable, intentional LLM output schema
+    output: Dict[str, Any] = {
+        "text": None,
+        "token_usage": None,
+        "model": None,
+    }
+
+    try:
+        if getattr(response, "generations", None):
+            gen = response.generations[0][0]
+            message = getattr(gen, "message", None)
+            if message is not None:
+                # Chat models (most common case)
+                output["text"] = getattr(message, "content", None)
+            else:
+                output["text"] = getattr(gen, "text", None)
+
+        # Token usage + model name
+        if hasattr(response, "llm_output") and isinstance(
+            response.llm_output, dict
+        ):
+            output["token_usage"] = response.llm_output.get("token_usage")
+            output["model"] = response.llm_output.get("model_name")
+
+    except Exception:
+        # Observability must never break execution
+        output["raw"] = str(response)
+
+    if run.tokens is not None:
+        if not output["text"]:
+            output["text"] = "".join(run.tokens)
+        output["stream"] = {
+            "tokens": len(run.tokens),
+            "time_to_first_token": run.first_token - run.span.start_time
+            if run.span.start_time is not None
+            else None,
+        }
+
+    return output
@@ -1 +1,8 @@
-from .loader import load_trace
+from .loader import (
+    LoadStats,
+    group_traces,
+    iter_records,
+    iter_spans,
+    iter_traces,
+    load_trace,
+)
@@ -0,0 +1,435 @@
+import json
+import re
+import struct
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .loader import LoadStats, PathLike, counts_unowned, shard_of
+from .segments import open_trace
+
+
+# ---------------------------------------------------------------------
+# AGENTZEN BINARY TRACE FORMAT (.azb)
+#
+#   file     := MAGIC record*
+#   record   := tag:u8 length:u32 payload[length]
+#
+#   tag 1  STRING  payload is UTF-8; strings are numbered 0, 1, 2...
+#                  in order of appearance and referenced by number.
+#   tag 2  SPAN    see below
+#
+#   span     := flags:u8 idflags:u8 name:u32 start:f64 end:f64
+#               trace_id span_id parent_id
+#               [error:value] [input:value] [output:value]
+#               attributes:value [extra:value]
+#
+# Span ids that are lowercase hex of 16 or 32 characters are stored
+# as 8 or 16 raw bytes; anything else goes through the string table.
+# Attribute keys, span names and short string values are interned,
+# so repeated names like "agent:decision:route" cost 4 bytes each.
+# All integers are little-endian.
+# ---------------------------------------------------------------------
+
+MAGIC = b"AZB\x01"
+SUFFIX = ".azb"
+
+TAG_STRING = 1
+TAG_SPAN = 2
+
+# span flags
+F_START = 0x01
+F_END = 0x02
+F_ERROR = 0x04
+F_INPUT = 0x08
+F_OUTPUT = 0x10
+F_EXTRA = 0x20
+
+# id encodings (2 bits per id in idflags: trace, span, parent)
+ID_NONE = 0
+ID_RAW8 = 1
+ID_RAW16 = 2
+ID_STRING = 3
+
+# value tags
+V_NONE = 0
+V_TRUE = 1
+V_FALSE = 2
+V_INT = 3
+V_FLOAT = 4
+V_STR_REF = 5
+V_STR = 6
+V_LIST = 7
+V_DICT = 8
+V_JSON = 9
+
+INTERN_MAX_LEN = 48
+
+_RECORD = struct.Struct("<BI")
+_SPAN_HEAD = struct.Struct("<BBIdd")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+# Lone surrogates (from badly decoded input) are legal in a Python
+# str; keep them rather than fail the whole record.
+_UTF8_ERRORS = "surrogatepass"
+
+_HEX_ID = re.compile(r"(?:[0-9a-f]{16}){1,2}")
+
+_KNOWN_FIELDS = (
+    "name", "span_id", "parent_id", "trace_id", "start_time",
+    "end_time", "input", "output", "error", "attributes",
+)
+
+
+def is_binary(path: PathLike) -> bool:
+    """
+    True if path starts with the binary trace magic.
+    """
+    try:
+        with open_trace(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, EOFError):
+        return False
+
+
+# ---------------------------------------------------------------------
+# WRITER
+# ---------------------------------------------------------------------
+
+class BinaryWriter:
+    """
+    Encodes span records onto a binary file object.
+
+    The string table is per file; when appending to an existing
+    file, pass the strings already defined in it (read_strings()).
+    Values without a tag of their own are stored as JSON encoded by
+    dumps (value -> bytes).
+    """
+
+    def __init__(
+        self,
+        f: BinaryIO,
+        strings: Optional[List[str]] = None,
+        dumps: Optional[Callable[[Any], bytes]] = None,
+    ):
+        self.f = f
+        self._dumps = dumps or _json_bytes
+        self._ids: Dict[str, int] = {}
+        for s in strings or ():
+            self._ids[s] = len(self._ids)
+
+    def write(self, record: Dict[str, Any]) -> int:
+        """
+        Append one span record. Returns the number of bytes written.
+        """
+        out = bytearray()
+        defined = len(self._ids)
+        try:
+            payload = self._encode_span(record, out)
+        except BaseException:
+            # The new strings in out are never written; forget their
+            # ids, or later records would refer to missing strings.
+            while len(self._ids) > defined:
+                self._ids.popitem()
+            raise
+        out += _RECORD.pack(TAG_SPAN, len(payload))
+        out += payload
+        self.f.write(out)
+        return len(out)
+
+    # --------------------------------------------------
+
+    def _ref(self, s: str, out: bytearray) -> int:
+        ref = self._ids.get(s)
+        if ref is None:
+            data = s.encode("utf-8", _UTF8_ERRORS)
+            ref = self._ids[s] = len(self._ids)
+            out += _RECORD.pack(TAG_STRING, len(data))
+            out += data
+        return ref
+
+    def _encode_id(self, value: Optional[str], buf: bytearray, out: bytearray) -> int:
+        if value is None:
+            return ID_NONE
+        if isinstance(value, str) and _HEX_ID.fullmatch(value):
+            buf += bytes.fromhex(value)
+            return ID_RAW8 if len(value) == 16 else ID_RAW16
+        buf += _U32.pack(self._ref(str(value), out))
+        return ID_STRING
+
+    def _encode_span(self, record: Dict[str, Any], out: bytearray) -> bytes:
+        start = record.get("start_time")
+        end = record.get("end_time")
+        error = record.get("error")
+        has_input = record.get("input") is not None
+        output = record.get("output")
+        extra = {k: v for k, v in record.items() if k not in _KNOWN_FIELDS}
+
+        flags = (
+            (F_START if start is not None else 0)
+            | (F_END if end is not None else 0)
+            | (F_ERROR if error is not None else 0)
+            | (F_INPUT if has_input else 0)
+            | (F_OUTPUT if output is not None else 0)
+            | (F_EXTRA if extra else 0)
+        )
+
+        ids = bytearray()
+        idflags = (
+            self._encode_id(record.get("trace_id"), ids, out)
+            | self._encode_id(record.get("span_id"), ids, out) << 2
+            | self._encode_id(record.get("parent_id"), ids, out) << 4
+        )
+
+        body = bytearray(
+            _SPAN_HEAD.pack(
+                flags,
+                idflags,
+                self._ref(str(record.get("name")), out),
+                start if start is not None else 0.0,
+                end if end is not None else 0.0,
+            )
+        )
+        body += ids
+
+        if error is not None:
+            self._encode_value(error, body, out)
+        if has_input:
+            self._encode_value(record["input"], body, out)
+        if output is not None:
+            self._encode_value(output, body, out)
+        self._encode_value(record.get("attributes") or {}, body, out)
+        if extra:
+            self._encode_value(extra, body, out)
+        return bytes(body)
+
+    def _encode_value(self, value: Any, body: bytearray, out: bytearray):
+        if value is None:
+            body.append(V_NONE)
+        elif value is True:
+            body.append(V_TRUE)
+        elif value is False:
+            body.append(V_FALSE)
+        elif isinstance(value, str):
+            if len(value) <= INTERN_MAX_LEN:
+                body.append(V_STR_REF)
+                body += _U32.pack(self._ref(value, out))
+            else:
+                data = value.encode("utf-8", _UTF8_ERRORS)
+                body.append(V_STR)
+                body += _U32.pack(len(data))
+                body += data
+        elif isinstance(value, float):
+            body.append(V_FLOAT)
+            body += _F64.pack(value)
+        elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+            body.append(V_INT)
+            body += _I64.pack(value)
+        elif isinstance(value, (list, tuple)):
+            body.append(V_LIST)
+            body += _U32.pack(len(value))
+            for item in value:
+                self._encode_value(item, body, out)
+        elif isinstance(value, dict) and all(isinstance(k, str) for k in value):
+            body.append(V_DICT)
+            body += _U32.pack(len(value))
+            for k, v in value.items():
+                body += _U32.pack(self._ref(k, out))
+                self._encode_value(v, body, out)
+        else:
+            data = self._dumps(value)
+            body.append(V_JSON)
+            body += _U32.pack(len(data))
+            body += data
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+# ---------------------------------------------------------------------
+# READER
+# ---------------------------------------------------------------------
+
+def read_strings(f: BinaryIO) -> List[str]:
+    """
+    Collect the string table of an open binary trace file, seeking
+    past span records without decoding them. Leaves f at the end of
+    the last complete record.
+    """
+    strings: List[str] = []
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not an agentzen binary trace file")
+    good = f.tell()
+    while True:
+        head = f.read(_RECORD.size)
+        if len(head) < _RECORD.size:
+            break
+        tag, length = _RECORD.unpack(head)
+        if tag == TAG_STRING:
+            data = f.read(length)
+            if len(data) < length:
+                break
+            strings.append(data.decode("utf-8", _UTF8_ERRORS))
+        else:
+            f.seek(length, 1)
+        good = f.tell()
+    f.seek(good)
+    f.truncate()
+    return strings
+
+
+def _decode_value(buf, pos: int, strings: List[str]):
+    tag = buf[pos]
+    pos += 1
+    if tag == V_STR_REF:
+        return strings[_U32.unpack_from(buf, pos)[0]], pos + 4
+    if tag == V_FLOAT:
+        return _F64.unpack_from(buf, pos)[0], pos + 8
+    if tag == V_NONE:
+        return None, pos
+    if tag == V_TRUE:
+        return True, pos
+    if tag == V_FALSE:
+        return False, pos
+    if tag == V_INT:
+        return _I64.unpack_from(buf, pos)[0], pos + 8
+    if tag == V_DICT:
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        d = {}
+        for _ in range(n):
+            key = strings[_U32.unpack_from(buf, pos)[0]]
+            d[key], pos = _decode_value(buf, pos + 4, strings)
+        return d, pos
+    if tag == V_LIST:
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        items = []
+        for _ in range(n):
+            item, pos = _decode_value(buf, pos, strings)
+            items.append(item)
+        return items, pos
+    if tag == V_STR:
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        return buf[pos:pos + n].decode("utf-8", _UTF8_ERRORS), pos + n
+    if tag == V_JSON:
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        return json.loads(buf[pos:pos + n]), pos + n
+    raise ValueError(f"unknown value tag {tag}")
+
+
+def _decode_id(buf, pos: int, kind: int, strings: List[str]):
+    if kind == ID_RAW16:
+        return buf[pos:pos + 16].hex(), pos + 16
+    if kind == ID_RAW8:
+        return buf[pos:pos + 8].hex(), pos + 8
+    if kind == ID_STRING:
+        return strings[_U32.unpack_from(buf, pos)[0]], pos + 4
+    return None, pos
+
+
+def iter_binary_records(
+    path: PathLike,
+    trace_id: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream span records from a binary trace file.
+
+    Yields the same dicts as the JSONL loader. With name_prefix,
+    non-matching spans are skipped after reading only their name.
+    A truncated trailing record is counted as corrupt.
+    """
+    stats = stats if stats is not None else LoadStats()
+    strings: List[str] = []
+    # A corrupt record's trace is unknown (see counts_unowned).
+    corrupt = 1 if counts_unowned(shard) else 0
+
+    with open_trace(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an agentzen binary trace file")
+
+        read = f.read
+        head_size = _RECORD.size
+        while True:
+            head = read(head_size)
+            if not head:
+                break
+            if len(head) < head_size:
+                stats.corrupt += corrupt
+                break
+            tag, length = _RECORD.unpack(head)
+            buf = read(length)
+            if len(buf) < length:
+                # Truncated trailing record, e.g. from an interrupted write.
+                stats.corrupt += corrupt
+                break
+
+            if tag == TAG_STRING:
+                strings.append(buf.decode("utf-8", _UTF8_ERRORS))
+                continue
+            if tag != TAG_SPAN:
+                continue
+
+            stats.lines += 1
+            try:
+                record = _decode_span(buf, strings, trace_id, name_prefix, shard)
+            except (ValueError, IndexError, struct.error):
+                stats.corrupt += corrupt
+                continue
+
+            if record is None:
+                stats.filtered += 1
+                continue
+
+            stats.records += 1
+            yield record
+
+
+def _decode_span(buf, strings, trace_id=None, name_prefix=None, shard=None):
+    flags, idflags, name_ref, start, end = _SPAN_HEAD.unpack_from(buf, 0)
+    name = strings[name_ref]
+    if name_prefix is not None and not name.startswith(name_prefix):
+        return None
+
+    pos = _SPAN_HEAD.size
+    tid, pos = _decode_id(buf, pos, idflags & 3, strings)
+    if trace_id is not None and tid != trace_id:
+        return None
+    if shard is not None and shard_of(tid, shard[1]) != shard[0]:
+        return None
+    sid, pos = _decode_id(buf, pos, (idflags >> 2) & 3, strings)
+    pid, pos = _decode_id(buf, pos, (idflags >> 4) & 3, strings)
+
+    error = None
+    if flags & F_ERROR:
+        error, pos = _decode_value(buf, pos, strings)
+
+    record = {
+        "name": name,
+        "span_id": sid,
+        "parent_id": pid,
+        "trace_id": tid,
+        "start_time": start if flags & F_START else None,
+        "end_time": end if flags & F_END else None,
+    }
+    if flags & F_INPUT:
+        record["input"], pos = _decode_value(buf, pos, strings)
+
+    output = None
+    if flags & F_OUTPUT:
+        output, pos = _decode_value(buf, pos, strings)
+    record["output"] = output
+    record["error"] = error
+    record["attributes"], pos = _decode_value(buf, pos, strings)
+
+    if flags & F_EXTRA:
+        extra, pos = _decode_value(buf, pos, strings)
+        record.update(extra)
+    return record
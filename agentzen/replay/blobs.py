@@ -0,0 +1,348 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .loader import PathLike
+from .segments import parse_segment
+
+
+BLOBS_SUFFIX = ".blobs"
+REF_KEY = "$blob"
+
+# What the analyzer and live detectors read from decision spans;
+# these stay inline however large they are. (Duplicated from
+# analysis.detectors, which this module must not import.)
+_DECISION_PREFIX = "agent:decision:"
+_DECISION_ATTRIBUTES = frozenset(("type", "options", "chosen", "confidence"))
+
+
+def blob_dir(path: PathLike) -> Path:
+    """
+    Default blob store of a trace file. Rotated and compressed
+    segments share their active file's store:
+
+        trace.000003.jsonl.gz -> trace.jsonl.blobs/
+    """
+    path = Path(path)
+    parsed = parse_segment(path)
+    base = parsed[0] if parsed else path.name
+    return path.with_name(base + BLOBS_SUFFIX)
+
+
+def is_ref(value: Any) -> bool:
+    return type(value) is dict and REF_KEY in value
+
+
+# ---------------------------------------------------------------------
+# BLOB STORE
+#
+# Content-addressed: each payload is stored once, as JSON, under the
+# hex BLAKE2b digest of its encoding:
+#
+#   trace.jsonl.blobs/3f/3fa1c0...e9
+#
+# Spans hold a reference in place of the value:
+#
+#   {"$blob": "3fa1c0...e9", "size": 18342, "preview": "You are a…"}
+#
+# Agents resend nearly the same prompt every iteration, so a trace
+# with dozens of LLM calls usually stores a handful of blobs.
+# ---------------------------------------------------------------------
+
+class BlobStore:
+    """
+    Moves large span payloads out of span records.
+
+    Values of output and of each attribute that encode to more than
+    threshold bytes are written to the store and replaced by a
+    reference. Dicts are walked (up to 3 levels) rather than moved
+    whole, so small fields next to a large one (token_usage next to
+    the response text) stay inline and queryable.
+
+    preview keeps the first N characters of string payloads in the
+    reference. max_blob_bytes shortens string payloads that encode
+    to more than that before they are stored (lossy, but bounds disk
+    use for prompts and completions); the reference is then marked
+    "truncated" and its size is still the original one. Other values
+    are stored whole.
+
+    The type, options, chosen and confidence attributes of
+    agent:decision:* spans are never moved, so the analyzer, live
+    detectors and trace diff read them as written.
+
+    Payloads are encoded by serializer (the exporters' shared
+    SpanSerializer by default).
+
+    The store only grows: segment rotation and retention never
+    delete blobs, since a blob may be shared by segments that are
+    kept. Remove the directory with the traces that use it.
+    """
+
+    _MAX_DEPTH = 3
+    _KNOWN_DIGESTS = 65536
+    _RECENT_BYTES = 4 << 20
+
+    def __init__(
+        self,
+        root: PathLike,
+        threshold: int = 4096,
+        preview: int = 0,
+        max_blob_bytes: Optional[int] = None,
+        serializer=None,
+    ):
+        if serializer is None:
+            # Imported here: the exporters package imports this module.
+            from agentzen.exporters.serialize import DEFAULT_SERIALIZER
+
+            serializer = DEFAULT_SERIALIZER
+
+        self.root = Path(root)
+        self.serializer = serializer
+        self.threshold = threshold
+        self.preview = preview
+        self.max_blob_bytes = max_blob_bytes
+
+        self._lock = threading.Lock()
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        # Recently stored strings -> reference. A prompt resent
+        # verbatim skips encoding and hashing entirely.
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._recent_bytes = 0
+
+        self.blobs_written = 0
+        self.bytes_written = 0
+        self.bytes_deduplicated = 0
+
+    @classmethod
+    def for_trace(cls, path: PathLike, **kwargs) -> "BlobStore":
+        return cls(blob_dir(path), **kwargs)
+
+    # --------------------------------------------------
+    # WRITE SIDE
+    # --------------------------------------------------
+
+    def externalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace large values of record's output and attributes with
+        references, in place. Returns record.
+        """
+        output = record.get("output")
+        if output is not None:
+            record["output"] = self._walk(output, 0)
+
+        attributes = record.get("attributes")
+        if attributes:
+            if str(record.get("name") or "").startswith(_DECISION_PREFIX):
+                record["attributes"] = self._walk_decision(attributes)
+            else:
+                record["attributes"] = self._walk(attributes, 0)
+
+        return record
+
+    def _walk_decision(self, attributes: Any) -> Any:
+        if type(attributes) is not dict:
+            return self._walk(attributes, 0)
+        out = None
+        for k, v in attributes.items():
+            if k in _DECISION_ATTRIBUTES:
+                continue
+            new = self._walk(v, 1)
+            if new is not v:
+                if out is None:
+                    out = dict(attributes)
+                out[k] = new
+        return attributes if out is None else out
+
+    def _walk(self, value: Any, depth: int) -> Any:
+        if type(value) is dict and depth < self._MAX_DEPTH:
+            if REF_KEY in value:
+                return value
+            out = None
+            for k, v in value.items():
+                new = self._walk(v, depth + 1)
+                if new is not v:
+                    if out is None:
+                        out = dict(value)
+                    out[k] = new
+            return value if out is None else out
+
+        if _exceeds(value, self.threshold):
+            return self.put(value)
+        return value
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """
+        Store value (unless already stored) and return its reference.
+        """
+        if type(value) is str:
+            with self._lock:
+                ref = self._recent.get(value)
+                if ref is not None:
+                    self._recent.move_to_end(value)
+                    self.bytes_deduplicated += ref["size"]
+                    return dict(ref)
+
+        data = self.serializer.dumps(value)
+        size = len(data)
+        truncated = False
+        if self.max_blob_bytes is not None and size > self.max_blob_bytes and type(value) is str:
+            data = self._truncate(value, self.max_blob_bytes)
+            truncated = True
+
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        self._write(digest, data)
+
+        ref: Dict[str, Any] = {REF_KEY: digest, "size": size}
+        if truncated:
+            ref["truncated"] = True
+        if self.preview and isinstance(value, str):
+            ref["preview"] = value[: self.preview]
+
+        if type(value) is str and len(value) <= self._RECENT_BYTES // 4:
+            with self._lock:
+                if value not in self._recent:
+                    self._recent[value] = ref
+                    self._recent_bytes += len(value)
+                    while self._recent_bytes > self._RECENT_BYTES:
+                        old, _ = self._recent.popitem(last=False)
+                        self._recent_bytes -= len(old)
+        return dict(ref)
+
+    def _truncate(self, value: str, limit: int) -> bytes:
+        # Encoding of the longest prefix of value that fits in limit
+        # bytes, or close to it: escapes and non-ASCII characters
+        # encode to more than one byte each.
+        text = value[:limit]
+        data = self.serializer.dumps(text)
+        while len(data) > limit and text:
+            text = text[: len(text) * limit // len(data) - 1]
+            data = self.serializer.dumps(text)
+        return data
+
+    def _write(self, digest: str, data: bytes):
+        with self._lock:
+            if digest in self._known:
+                self._known.move_to_end(digest)
+                self.bytes_deduplicated += len(data)
+                return
+
+        target = self._path(digest)
+        if target.exists():
+            self.bytes_deduplicated += len(data)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so readers never see a partial blob
+            # and concurrent writers of the same payload are harmless.
+            fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, target)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            self.blobs_written += 1
+            self.bytes_written += len(data)
+
+        with self._lock:
+            self._known[digest] = None
+            if len(self._known) > self._KNOWN_DIGESTS:
+                self._known.popitem(last=False)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    # --------------------------------------------------
+    # READ SIDE
+    # --------------------------------------------------
+
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """
+        The payload behind a reference. Raises KeyError if the blob
+        is missing (e.g. pruned with its segments). For a reference
+        marked truncated, this is the shortened string.
+        """
+        try:
+            data = self._path(ref[REF_KEY]).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(ref[REF_KEY]) from None
+        return json.loads(data)
+
+    def resolve(self, value: Any) -> Any:
+        """
+        value with every reference replaced by its payload. Missing
+        blobs are left as references.
+        """
+        if type(value) is dict:
+            if REF_KEY in value:
+                try:
+                    return self.get(value)
+                except KeyError:
+                    return value
+            return {k: self.resolve(v) for k, v in value.items()}
+        return value
+
+    def resolve_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if record.get("output") is not None:
+            record["output"] = self.resolve(record["output"])
+        if record.get("attributes"):
+            record["attributes"] = self.resolve(record["attributes"])
+        return record
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "blobs_written": self.blobs_written,
+            "bytes_written": self.bytes_written,
+            "bytes_deduplicated": self.bytes_deduplicated,
+        }
+
+
+def _exceeds(value: Any, limit: int) -> bool:
+    """
+    Whether value's JSON encoding is (roughly) larger than limit
+    bytes, without encoding it. Stops as soon as the answer is known.
+    """
+    budget = [limit]
+
+    def walk(v) -> bool:
+        if isinstance(v, str):
+            budget[0] -= len(v) + 2
+        elif isinstance(v, (list, tuple)):
+            budget[0] -= 2
+            for item in v:
+                if walk(item):
+                    return True
+        elif isinstance(v, dict):
+            budget[0] -= 2
+            for k, item in v.items():
+                budget[0] -= len(str(k)) + 4
+                if walk(item):
+                    return True
+        else:
+            budget[0] -= 8
+        return budget[0] < 0
+
+    return walk(value)
+
+
+def format_ref(ref: Dict[str, Any]) -> str:
+    """
+    Short human-readable form of a reference for CLI output.
+    """
+    size = ref.get("size", 0)
+    human = f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+    text = f"<blob {ref[REF_KEY][:12]}, {human}"
+    if ref.get("truncated"):
+        text += ", truncated"
+    text += ">"
+    if ref.get("preview"):
+        text += f" {ref['preview']!r}…"
+    return text
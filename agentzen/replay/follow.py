@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
+
+from .loader import LoadStats, PathLike
+from .segments import closed_segments, open_trace
+
+
+# ---------------------------------------------------------------------
+# FOLLOWING A LIVE TRACE FILE
+#
+# TraceFollower keeps one handle on the file and the byte offset it
+# has read up to. Each poll reads only what was appended since; a
+# line is parsed once its newline has arrived, and a partial last
+# line waits for the next poll.
+#
+# Between polls the path is checked against the open handle:
+#
+#   different inode   the file was rotated (renamed away and
+#                     recreated, see exporters.rotation): the old
+#                     handle is read to its end, then every segment
+#                     closed since (compressed or not, the writer
+#                     may have rotated more than once between two
+#                     polls), then the new file from offset 0
+#   smaller size      the file was truncated: restart at offset 0
+#   missing           rotated, new file not created yet: keep the
+#                     old handle and wait
+# ---------------------------------------------------------------------
+
+_CHUNK = 1024 * 1024
+
+
+class TraceFollower:
+    """
+    Tail a JSONL trace file that is still being written, like
+    `tail -F`, yielding span records as they are appended.
+
+    The file is followed from its current end unless from_start is
+    True. It does not have to exist yet. Blank and corrupt lines are
+    counted in stats, as by iter_records.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        from_start: bool = False,
+        poll_interval: float = 0.25,
+        stats: Optional[LoadStats] = None,
+    ):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.stats = stats if stats is not None else LoadStats()
+
+        self.offset = 0
+        self.rotations = 0
+        self.truncations = 0
+        self.skipped_segments = 0
+
+        self._file: Any = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._partial = b""
+
+        # Number of the last closed segment already accounted for;
+        # the file being followed will become the next one.
+        segments = closed_segments(self.path)
+        self._segment = segments[-1][0] if segments else 0
+
+        self._open(at_end=not from_start)
+
+    def follow(self, stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records forever, or until stop is set. Sleeps
+        poll_interval between polls that found nothing new.
+        """
+        try:
+            while stop is None or not stop.is_set():
+                idle = True
+                for record in self.poll():
+                    idle = False
+                    yield record
+                if idle:
+                    if stop is not None:
+                        stop.wait(self.poll_interval)
+                    else:
+                        time.sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def poll(self) -> Iterator[Dict[str, Any]]:
+        """
+        Records appended since the last poll.
+        """
+        if self._file is None:
+            # Not created yet, or gone after a rotation: segments
+            # closed in the meantime come first.
+            yield from self._catch_up()
+            opened = yield from self._open_active()
+            if not opened:
+                return
+
+        yield from self._read()
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        if (st.st_dev, st.st_ino) != self._identity:
+            # A rotating writer closes the file before renaming it,
+            # so once the rest of the old handle is read, it is done.
+            yield from self._read()
+            self._discard_partial()
+            self._close_file()
+            self.rotations += 1
+            self._segment += 1
+            yield from self._catch_up()
+            opened = yield from self._open_active()
+            if opened:
+                yield from self._read()
+        elif st.st_size < self.offset:
+            self.truncations += 1
+            self._partial = b""
+            self._file.seek(0)
+            self.offset = 0
+            yield from self._read()
+
+    def close(self):
+        self._close_file()
+
+    def _catch_up(self) -> Iterator[Dict[str, Any]]:
+        # Read the segments closed after the last one seen, in order.
+        while True:
+            later: Dict[int, List[Path]] = {}
+            for seq, p in closed_segments(self.path):
+                if seq > self._segment:
+                    later.setdefault(seq, []).append(p)
+            if not later:
+                return
+            seq = min(later)
+            # Pruned by retention before we got to them.
+            self.skipped_segments += seq - self._segment - 1
+            # Mid-compression both files exist; the plain one is
+            # complete, the compressed one appears atomically.
+            for p in sorted(later[seq], key=lambda p: p.suffix in (".gz", ".xz")):
+                try:
+                    f = open_trace(p, "rb")
+                except FileNotFoundError:
+                    continue
+                with f:
+                    while True:
+                        chunk = f.read(_CHUNK)
+                        if not chunk:
+                            break
+                        yield from self._split(chunk)
+                self._discard_partial()
+                self.rotations += 1
+                break
+            else:
+                # Every file listed for seq is gone: compressed since
+                # the listing (the plain file unlinked once the .gz is
+                # in place) or pruned. List again; a pruned segment is
+                # then counted as skipped above.
+                continue
+            self._segment = seq
+
+    def _open_active(self) -> Generator[Dict[str, Any], None, bool]:
+        while self._open(at_end=False):
+            # The writer may have rotated again between _catch_up()
+            # and the open: then the next segment is not the file
+            # we just opened, and has to be read first.
+            nxt = [p for seq, p in closed_segments(self.path) if seq == self._segment + 1]
+            if not nxt or any(_identity(p) == self._identity for p in nxt):
+                return True
+            self._close_file()
+            yield from self._catch_up()
+        return False
+
+    def _open(self, at_end: bool) -> bool:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        st = os.fstat(f.fileno())
+        self._file = f
+        self._identity = (st.st_dev, st.st_ino)
+        self._partial = b""
+        self.offset = st.st_size if at_end else 0
+        f.seek(self.offset)
+        return True
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            chunk = self._file.read(_CHUNK)
+            if not chunk:
+                return
+            self.offset += len(chunk)
+            yield from self._split(chunk)
+
+    def _split(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        complete, newline, self._partial = (self._partial + chunk).rpartition(b"\n")
+        if not newline:
+            return
+        # Decoded once per chunk; a split UTF-8 sequence can only
+        # sit in the partial line, which is decoded next time.
+        for line in complete.decode("utf-8", "replace").split("\n"):
+            record = self._parse(line)
+            if record is not None:
+                yield record
+
+    def _parse(self, line: str) -> Optional[Dict[str, Any]]:
+        stats = self.stats
+        stats.lines += 1
+        if not line.strip():
+            stats.blank += 1
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats.corrupt += 1
+            return None
+        if not isinstance(record, dict) or "name" not in record:
+            stats.corrupt += 1
+            return None
+        stats.records += 1
+        return record
+
+    def _discard_partial(self):
+        # A line a closed file never finished will never be finished.
+        if self._partial.strip():
+            self.stats.lines += 1
+            self.stats.corrupt += 1
+        self._partial = b""
+
+
+def _identity(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
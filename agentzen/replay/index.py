@@ -0,0 +1,302 @@
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .loader import PathLike
+
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+
+
+def index_path(path: PathLike) -> Path:
+    """
+    Sidecar location for a trace file: trace.jsonl -> trace.jsonl.idx
+    """
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+# ---------------------------------------------------------------------
+# SIDECAR FORMAT
+#
+# The sidecar is itself append-only JSONL so it can be maintained
+# incrementally by the exporter:
+#
+#   {"format": "agentzen-index", "version": 2}      header
+#   ["<trace_id>", [[offset, length], ...],          one per trace per
+#    start, end, span_count, 0|1]                    appended batch
+#   {"indexed": <bytes>}                             checkpoint
+#
+# Spans are aggregated per trace before they are written, so loading
+# the index costs one line per trace and batch rather than one per
+# span. A trace written over several batches has several lines, which
+# load() merges. Version 1 sidecars (one line per span:
+# ["<trace_id>", offset, length, start, end, 0|1]) are still read.
+#
+# A checkpoint records how many bytes of the data file are covered.
+# The index is stale when the data file no longer has that size.
+# ---------------------------------------------------------------------
+
+
+def encode_entries(entries: List[Tuple[str, int, int, Any, Any, bool]], indexed: int) -> str:
+    traces: Dict[str, TraceEntry] = {}
+    for tid, off, length, start, end, err in entries:
+        entry = traces.get(tid)
+        if entry is None:
+            entry = traces[tid] = TraceEntry(tid)
+        entry.add(off, length, start, end, err)
+    lines = [
+        json.dumps([e.trace_id, e.ranges, e.start_time, e.end_time, e.span_count, 1 if e.error else 0])
+        for e in traces.values()
+    ]
+    lines.append(json.dumps({"indexed": indexed}))
+    return "\n".join(lines) + "\n"
+
+
+def _header() -> str:
+    return json.dumps({"format": "agentzen-index", "version": INDEX_VERSION}) + "\n"
+
+
+def append_entries(
+    path: PathLike,
+    entries: List[Tuple[str, int, int, Any, Any, bool]],
+    indexed: int,
+):
+    """
+    Append span entries and a checkpoint to the sidecar of path.
+    """
+    sidecar = index_path(path)
+    header = not sidecar.exists() or sidecar.stat().st_size == 0
+    with sidecar.open("a", encoding="utf-8") as f:
+        if header:
+            f.write(_header())
+        f.write(encode_entries(entries, indexed))
+
+
+class IndexWriter:
+    """
+    append_entries() through one open handle, for writers that
+    append to the sidecar many times (a batching exporter). Close
+    it before the sidecar is renamed or removed.
+    """
+
+    def __init__(self, path: PathLike):
+        sidecar = index_path(path)
+        self._file = sidecar.open("a", encoding="utf-8")
+        if self._file.tell() == 0:
+            self._file.write(_header())
+
+    def append(self, entries: List[Tuple[str, int, int, Any, Any, bool]], indexed: int):
+        self._file.write(encode_entries(entries, indexed))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class TraceEntry:
+    """
+    Location and summary of one trace inside a data file.
+    """
+
+    __slots__ = ("trace_id", "ranges", "start_time", "end_time", "span_count", "error")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.ranges: List[List[int]] = []
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.span_count = 0
+        self.error = False
+
+    def add(self, offset: int, length: int, start, end, error: bool):
+        self.merge([[offset, length]], start, end, 1, error)
+
+    def merge(self, ranges: List[List[int]], start, end, span_count: int, error: bool):
+        # Spans of one trace are usually written back to back, so
+        # adjacent lines collapse into a single byte range.
+        for offset, length in ranges:
+            if self.ranges and self.ranges[-1][0] + self.ranges[-1][1] == offset:
+                self.ranges[-1][1] += length
+            else:
+                self.ranges.append([offset, length])
+
+        if start is not None and (self.start_time is None or start < self.start_time):
+            self.start_time = start
+        if end is not None and (self.end_time is None or end > self.end_time):
+            self.end_time = end
+        self.span_count += span_count
+        self.error = self.error or bool(error)
+
+    def overlaps(self, since: Optional[float], until: Optional[float]) -> bool:
+        if since is not None and (self.end_time is None or self.end_time < since):
+            return False
+        if until is not None and (self.start_time is None or self.start_time > until):
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "span_count": self.span_count,
+            "error": self.error,
+        }
+
+
+class TraceIndex:
+    """
+    In-memory view of a trace file's index sidecar.
+    """
+
+    def __init__(self, data_path: PathLike):
+        self.data_path = Path(data_path)
+        self.entries: Dict[str, TraceEntry] = {}
+        self.indexed = 0
+
+    # --------------------------------------------------
+    # LOADING
+    # --------------------------------------------------
+
+    @classmethod
+    def load(cls, data_path: PathLike) -> Optional["TraceIndex"]:
+        """
+        Read the sidecar of data_path, or return None if it has none.
+        """
+        sidecar = index_path(data_path)
+        if not sidecar.exists():
+            return None
+
+        index = cls(data_path)
+        with sidecar.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write.
+                    continue
+                if isinstance(item, list):
+                    if isinstance(item[1], list):
+                        index._merge(*item)
+                    else:
+                        index._add(*item)
+                elif isinstance(item, dict) and "indexed" in item:
+                    index.indexed = item["indexed"]
+        return index
+
+    def _add(self, trace_id, offset, length, start, end, error):
+        entry = self.entries.get(trace_id)
+        if entry is None:
+            entry = self.entries[trace_id] = TraceEntry(trace_id)
+        entry.add(offset, length, start, end, error)
+
+    def _merge(self, trace_id, ranges, start, end, span_count, error):
+        entry = self.entries.get(trace_id)
+        if entry is None:
+            entry = self.entries[trace_id] = TraceEntry(trace_id)
+        entry.merge(ranges, start, end, span_count, error)
+
+    def is_stale(self) -> bool:
+        """
+        True if the data file has grown or shrunk since it was indexed.
+        """
+        try:
+            size = self.data_path.stat().st_size
+        except FileNotFoundError:
+            return True
+        return size != self.indexed
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+
+    def find(self, trace_id: str) -> Optional[TraceEntry]:
+        return self.entries.get(trace_id)
+
+    def select(
+        self,
+        trace_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[TraceEntry]:
+        if trace_id is not None:
+            entry = self.entries.get(trace_id)
+            candidates = [entry] if entry is not None else []
+        else:
+            candidates = list(self.entries.values())
+        return [e for e in candidates if e.overlaps(since, until)]
+
+    def read(self, entries: List[TraceEntry]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield (trace_id, records) for each entry, seeking straight
+        to its byte ranges through mmap instead of scanning the file.
+        """
+        if not entries:
+            return
+        with self.data_path.open("rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for entry in entries:
+                    records = []
+                    for offset, length in entry.ranges:
+                        for line in mm[offset:offset + length].splitlines():
+                            if line.strip():
+                                records.append(json.loads(line))
+                    yield entry.trace_id, records
+
+
+# ---------------------------------------------------------------------
+# BUILDING
+# ---------------------------------------------------------------------
+
+
+def build_index(path: PathLike, rebuild: bool = False) -> TraceIndex:
+    """
+    Create or extend the index sidecar of a JSONL trace file.
+
+    An existing index is extended from its last checkpoint when the
+    file has only grown; it is rebuilt from scratch when the file
+    shrank (truncated or replaced) or rebuild=True.
+    """
+    path = Path(path)
+    sidecar = index_path(path)
+    size = path.stat().st_size
+
+    index = None if rebuild else TraceIndex.load(path)
+    if index is None or index.indexed > size:
+        if sidecar.exists():
+            sidecar.unlink()
+        index = TraceIndex(path)
+
+    entries = []
+    offset = index.indexed
+    with path.open("rb") as f:
+        f.seek(offset)
+        for line in f:
+            length = len(line)
+            if not line.endswith(b"\n"):
+                # Partial line still being written: stop before it.
+                break
+            try:
+                record = json.loads(line)
+                entry = (
+                    record["trace_id"],
+                    offset,
+                    length,
+                    record.get("start_time"),
+                    record.get("end_time"),
+                    bool(record.get("error")),
+                )
+            except (ValueError, KeyError, TypeError):
+                entry = None
+            if entry is not None:
+                entries.append(entry)
+                index._add(*entry)
+            offset += length
+
+    if entries or offset != index.indexed or not sidecar.exists():
+        append_entries(path, entries, offset)
+    index.indexed = offset
+    return index
@@ -1,10 +1,248 @@
 import json
+import zlib
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
 from agentzen.tracing.span import TraceSpan
 
+from .segments import open_trace, resolve_paths
+
+
+PathLike = Union[str, Path]
+
+
+class LoadStats:
+    """
+    Counters filled in while a trace file is streamed.
+    """
+
+    def __init__(self):
+        self.lines = 0
+        self.blank = 0
+        self.corrupt = 0
+        self.filtered = 0
+        self.records = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"LoadStats(lines={self.lines}, records={self.records}, "
+            f"blank={self.blank}, corrupt={self.corrupt}, filtered={self.filtered})"
+        )
+
+
+def shard_of(trace_id: Any, shards: int) -> int:
+    """
+    Stable shard number of a trace; identical in every process.
+    """
+    return zlib.crc32(str(trace_id).encode("utf-8")) % shards
+
+
+def counts_unowned(shard: Optional[Tuple[int, int]]) -> bool:
+    """
+    Whether a reader of shard counts a corrupt record whose trace
+    is unknown. Every shard reads it; only shard 0 counts it, so
+    the corrupt counts of all shards add up to the file's.
+    """
+    return shard is None or shard[0] == 0
+
+
+def iter_records(
+    path: PathLike,
+    trace_id: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    payloads: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream span records (dicts) from a JSONL trace file.
+
+    Only one line is held in memory at a time. Blank and corrupt
+    lines are skipped and counted in stats. trace_id and name_prefix
+    are checked against the raw line before it is parsed, so lines
+    that can not match are never decoded.
+
+    Binary trace files (.azb) and trace databases are detected by
+    their magic bytes and read by replay.binary / replay.sqlite
+    instead.
+
+    path may also be a directory or glob of rotated segments,
+    compressed or not; they are read in order as one stream.
+
+    shard=(k, n) keeps only traces with shard_of(trace_id, n) == k,
+    so n processes can split one stream between them.
+
+    Payloads moved to a blob store (see replay.blobs) are returned
+    as references unless payloads=True, which reads them back.
+    """
+    stats = stats if stats is not None else LoadStats()
+
+    from .binary import is_binary, iter_binary_records
+    from .blobs import BlobStore, blob_dir
+    from .sqlite import is_sqlite, iter_sqlite_records
+
+    for file in resolve_paths(path):
+        if is_binary(file):
+            records = iter_binary_records(file, trace_id, name_prefix, stats, shard)
+        elif is_sqlite(file):
+            records = iter_sqlite_records(file, trace_id, name_prefix, stats, shard)
+        else:
+            records = _iter_jsonl_records(file, trace_id, name_prefix, stats, shard)
+
+        if payloads and blob_dir(file).is_dir():
+            store = BlobStore(blob_dir(file))
+            records = (store.resolve_record(r) for r in records)
+
+        yield from records
+
+
+def _line_trace_id(line: str) -> Optional[str]:
+    # Cheap extraction of the trace id for shard prefiltering. Lines
+    # may be written with or without a space after the colon.
+    i = line.find('"trace_id":')
+    if i < 0:
+        return None
+    i += 11
+    if line.startswith(" ", i):
+        i += 1
+    if not line.startswith('"', i):
+        return None
+    i += 1
+    j = line.find('"', i)
+    return line[i:j] if j > 0 else None
+
+
+def _iter_jsonl_records(
+    path: Path,
+    trace_id: Optional[str],
+    name_prefix: Optional[str],
+    stats: LoadStats,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    # JSON encodes the name as "name": "<prefix>..., so the encoded
+    # prefix without its closing quote must appear in matching lines.
+    # Non-ASCII prefixes may be written escaped or as raw UTF-8.
+    name_needles = None
+    if name_prefix:
+        name_needles = {
+            json.dumps(name_prefix)[:-1],
+            json.dumps(name_prefix, ensure_ascii=False)[:-1],
+        }
+
+    tid = None
+    with open_trace(path, "r") as f:
+        for line in f:
+            stats.lines += 1
+
+            if not line.strip():
+                stats.blank += 1
+                continue
+
+            if (trace_id is not None and trace_id not in line) or (
+                name_needles is not None
+                and not any(needle in line for needle in name_needles)
+            ):
+                stats.filtered += 1
+                continue
+
+            if shard is not None:
+                tid = _line_trace_id(line)
+                if tid is not None and shard_of(tid, shard[1]) != shard[0]:
+                    stats.filtered += 1
+                    continue
+
+            try:
+                record = json.loads(line)
+                valid = isinstance(record, dict) and "name" in record
+            except ValueError:
+                valid = False
+            if not valid:
+                # With a shard, tid is set once this shard owns the line.
+                if tid is not None or counts_unowned(shard):
+                    stats.corrupt += 1
+                else:
+                    stats.filtered += 1
+                continue
+
+            if (
+                (trace_id is not None and record.get("trace_id") != trace_id)
+                or (
+                    name_prefix is not None
+                    and not str(record["name"]).startswith(name_prefix)
+                )
+                or (
+                    shard is not None
+                    and shard_of(record.get("trace_id"), shard[1]) != shard[0]
+                )
+            ):
+                stats.filtered += 1
+                continue
+
+            stats.records += 1
+            yield record
+
+
+def iter_spans(
+    path: PathLike,
+    trace_id: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+) -> Iterator[TraceSpan]:
+    """
+    Like iter_records(), but yields TraceSpan objects.
+    """
+    for record in iter_records(path, trace_id, name_prefix, stats):
+        yield TraceSpan(**record)
+
+
+def group_traces(
+    records: Iterable[Dict[str, Any]],
+    max_pending: Optional[int] = None,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Group a stream of records into complete traces.
+
+    A trace is yielded as soon as its root span (parent_id None)
+    arrives; the tracer exports the root last, so by then every
+    child has been seen. Traces still open at the end of the
+    stream are yielded last, in order of first appearance.
+
+    With max_pending, at most that many traces are kept open: the
+    oldest one is yielded, incomplete, to make room for a new one.
+    Use it on streams that may never end (see replay.follow).
+    """
+    pending: Dict[str, List[Dict[str, Any]]] = OrderedDict() if max_pending else {}
+
+    for record in records:
+        tid = record.get("trace_id")
+        spans = pending.get(tid)
+        if spans is None:
+            if max_pending and len(pending) >= max_pending:
+                yield pending.popitem(last=False)
+            spans = pending[tid] = []
+        spans.append(record)
+
+        if record.get("parent_id") is None:
+            yield tid, pending.pop(tid)
+
+    for tid, spans in pending.items():
+        yield tid, spans
+
+
+def iter_traces(
+    path: PathLike,
+    trace_id: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Stream complete traces as (trace_id, records) pairs.
+
+    Memory is proportional to the traces open at once, not
+    to the size of the file.
+    """
+    return group_traces(iter_records(path, trace_id=trace_id, stats=stats))
+
 
 def load_trace(path: str) -> list[TraceSpan]:
-    spans = []
-    for line in Path(path).read_text().splitlines():
-        spans.append(TraceSpan(**json.loads(line)))
-    return spans
+    return list(iter_spans(path))
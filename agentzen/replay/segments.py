@@ -0,0 +1,109 @@
+import glob
+import gzip
+import lzma
+import re
+from pathlib import Path
+from typing import IO, List, Optional, Sequence, Tuple, Union
+
+
+# ---------------------------------------------------------------------
+# SEGMENT NAMING
+#
+# A rotating exporter writing to trace.jsonl produces:
+#
+#   trace.000001.jsonl.gz   closed, compressed
+#   trace.000002.jsonl      closed
+#   trace.jsonl             active
+#
+# Readers treat all of them, in that order, as one logical stream.
+# ---------------------------------------------------------------------
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "lzma": ".xz"}
+
+_SEGMENT = re.compile(
+    r"^(?P<stem>.+?)(?:\.(?P<seq>\d{6,}))?(?P<ext>\.jsonl|\.azb)(?P<comp>\.gz|\.xz)?$"
+)
+
+
+def segment_path(path: Path, seq: int) -> Path:
+    """
+    Name of closed segment number seq of the active file path.
+    """
+    return path.with_name(f"{path.stem}.{seq:06d}{path.suffix}")
+
+
+def parse_segment(path: Path) -> Optional[Tuple[str, int, str]]:
+    """
+    (stem + ext, seq, compression suffix) for a trace segment file,
+    or None if the name is not one. The active file has seq -1.
+    """
+    m = _SEGMENT.match(path.name)
+    if m is None:
+        return None
+    seq = int(m.group("seq")) if m.group("seq") else -1
+    return m.group("stem") + m.group("ext"), seq, m.group("comp") or ""
+
+
+def closed_segments(path: Path) -> List[Tuple[int, Path]]:
+    """
+    Closed segments of the active file path, oldest first.
+    """
+    path = Path(path)
+    base = path.name
+    found = []
+    if not path.parent.exists():
+        return found
+    for p in path.parent.iterdir():
+        parsed = parse_segment(p)
+        if parsed is not None and parsed[0] == base and parsed[1] >= 0:
+            found.append((parsed[1], p))
+    found.sort()
+    return found
+
+
+def _stream_order(path: Path):
+    parsed = parse_segment(path)
+    if parsed is None:
+        return (path.parent.as_posix(), path.name, 0, "")
+    base, seq, comp = parsed
+    # Closed segments in sequence order, then the active file.
+    return (path.parent.as_posix(), base, seq if seq >= 0 else float("inf"), comp)
+
+
+def resolve_paths(source: Union[str, Path, Sequence[Union[str, Path]]]) -> List[Path]:
+    """
+    Expand a file, directory or glob pattern into trace files in
+    stream order. Directories and globs only yield files named like
+    trace segments (*.jsonl, *.azb, optionally .gz/.xz compressed).
+    A list of sources is expanded item by item, keeping its order.
+    """
+    if isinstance(source, (list, tuple)):
+        return [p for item in source for p in resolve_paths(item)]
+
+    path = Path(source)
+    if path.is_dir():
+        candidates = [p for p in path.iterdir() if p.is_file()]
+    elif path.exists():
+        return [path]
+    elif glob.has_magic(str(source)):
+        candidates = [Path(p) for p in glob.glob(str(source)) if Path(p).is_file()]
+    else:
+        return [path]
+
+    files = [p for p in candidates if parse_segment(p) is not None]
+    files.sort(key=_stream_order)
+    return files
+
+
+def open_trace(path: Union[str, Path], mode: str = "rb") -> IO:
+    """
+    Open a trace file, decompressing .gz and .xz segments on the fly.
+    """
+    path = Path(path)
+    text = "b" not in mode
+    kwargs = {"encoding": "utf-8", "errors": "replace"} if text else {}
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt" if text else "rb", **kwargs)
+    if path.suffix == ".xz":
+        return lzma.open(path, "rt" if text else "rb", **kwargs)
+    return path.open(mode, **kwargs)
@@ -0,0 +1,454 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .loader import LoadStats, shard_of
+
+
+PathLike = Union[str, Path]
+
+
+# ---------------------------------------------------------------------
+# SQLITE TRACE STORE
+#
+#   spans       id (insertion order), span_id, trace_id, parent_id,
+#               name, start_time, end_time, duration, error, output
+#   attributes  span -> spans.id, key, value, kind
+#
+# Attribute values are stored natively when SQLite has a type for
+# them, so they can be filtered and grouped on in SQL:
+#
+#   kind 0   str / int / float, as is
+#   kind 1   bool, as 0 / 1
+#   kind 2   anything else, as JSON text
+#
+# output is JSON text. Spans are read back in insertion order, which
+# is export order, so group_traces() works on them as on a file.
+#
+# The database runs in WAL mode: readers (agentzen trace / query)
+# never block the exporter, and each batch is one transaction.
+# ---------------------------------------------------------------------
+
+MAGIC = b"SQLite format 3\x00"
+
+SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY,
+    span_id TEXT,
+    trace_id TEXT,
+    parent_id TEXT,
+    name TEXT,
+    start_time REAL,
+    end_time REAL,
+    duration REAL,
+    error TEXT,
+    output TEXT
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    span INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value,
+    kind INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (span, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id);
+CREATE INDEX IF NOT EXISTS spans_name ON spans (name, start_time);
+CREATE INDEX IF NOT EXISTS spans_start ON spans (start_time);
+CREATE INDEX IF NOT EXISTS spans_error ON spans (error) WHERE error IS NOT NULL;
+CREATE INDEX IF NOT EXISTS attributes_key ON attributes (key, value);
+"""
+
+_KIND_PLAIN = 0
+_KIND_BOOL = 1
+_KIND_JSON = 2
+
+_INT64 = (-(1 << 63), 1 << 63)
+
+# Raised while binding a row SQLite can not take; the transaction is
+# rolled back and other rows can still be written.
+_BIND_ERRORS = (sqlite3.InterfaceError, sqlite3.ProgrammingError, ValueError, OverflowError)
+
+
+def is_sqlite(path: PathLike) -> bool:
+    """
+    True if path is an SQLite database.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def connect(path: PathLike, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open (and, unless readonly, create) a trace database.
+    """
+    if readonly:
+        conn = sqlite3.connect(
+            f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        return conn
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------------------------------------------------------------------
+# WRITER
+# ---------------------------------------------------------------------
+
+class SQLiteWriter:
+    """
+    Inserts span records into a trace database, one transaction per
+    write() call. Values SQLite can not store natively are encoded
+    by dumps (value -> bytes of JSON).
+
+    Several writers, in any number of processes, may share one
+    database: span ids are taken inside the write transaction.
+    Records that can not be stored are skipped and counted in
+    skipped; the call's other records are still written.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, dumps: Optional[Callable[[Any], bytes]] = None):
+        self.conn = conn
+        self.dumps = dumps or _json_bytes
+        self.skipped = 0
+
+    def write(self, records: Iterable[Dict[str, Any]]) -> int:
+        rows = []
+        for record in records:
+            try:
+                rows.append(self._rows(record))
+            except Exception:
+                self.skipped += 1
+        if not rows:
+            return 0
+
+        try:
+            self._insert(rows)
+            return len(rows)
+        except _BIND_ERRORS:
+            pass
+
+        # A value the driver can not bind (a lone surrogate, ...):
+        # find the record by writing one per transaction.
+        written = 0
+        for row in rows:
+            try:
+                self._insert([row])
+                written += 1
+            except _BIND_ERRORS:
+                self.skipped += 1
+        return written
+
+    def _rows(self, record: Dict[str, Any]) -> Tuple[Tuple, List[Tuple]]:
+        # Everything but the id, which _insert() assigns.
+        start = record.get("start_time")
+        end = record.get("end_time")
+        output = record.get("output")
+        error = record.get("error")
+        span = (
+            record.get("span_id"),
+            record.get("trace_id"),
+            record.get("parent_id"),
+            record.get("name"),
+            start,
+            end,
+            end - start if start is not None and end is not None else None,
+            str(error) if error else None,
+            self.dumps(output).decode("utf-8") if output is not None else None,
+        )
+        attributes = []
+        for key, value in (record.get("attributes") or {}).items():
+            value, kind = self._attribute(value)
+            attributes.append((str(key), value, kind))
+        return span, attributes
+
+    def _insert(self, rows: List[Tuple[Tuple, List[Tuple]]]):
+        conn = self.conn
+        # IMMEDIATE takes the write lock now, so MAX(id) can not
+        # change under us until COMMIT, whoever else is writing.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            first = (conn.execute("SELECT MAX(id) FROM spans").fetchone()[0] or 0) + 1
+            conn.executemany(
+                "INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(first + i,) + span for i, (span, _) in enumerate(rows)],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO attributes VALUES (?, ?, ?, ?)",
+                [
+                    (first + i,) + attribute
+                    for i, (_, attributes) in enumerate(rows)
+                    for attribute in attributes
+                ],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _attribute(self, value: Any) -> Tuple[Any, int]:
+        cls = type(value)
+        if cls is str or cls is float or value is None:
+            return value, _KIND_PLAIN
+        if cls is bool:
+            return int(value), _KIND_BOOL
+        if cls is int and _INT64[0] <= value < _INT64[1]:
+            return value, _KIND_PLAIN
+        return self.dumps(value).decode("utf-8"), _KIND_JSON
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# ---------------------------------------------------------------------
+# READER
+# ---------------------------------------------------------------------
+
+def span_filter(
+    trace_id: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    error: Optional[bool] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    attribute: Optional[Tuple[str, Any]] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    SQL condition on spans s (and its params) for the given filters.
+    since / until bound the span's start time.
+    """
+    clauses = []
+    params: List[Any] = []
+    if trace_id is not None:
+        clauses.append("s.trace_id = ?")
+        params.append(trace_id)
+    if name_prefix:
+        # A range rather than LIKE, so the name index is used.
+        clauses.append("s.name >= ? AND s.name < ?")
+        params += [name_prefix, name_prefix + "\U0010ffff"]
+    if error is True:
+        clauses.append("s.error IS NOT NULL")
+    elif error is False:
+        clauses.append("s.error IS NULL")
+    if since is not None:
+        clauses.append("s.start_time >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("s.start_time <= ?")
+        params.append(until)
+    if attribute is not None:
+        key, value = attribute
+        if type(value) is int and not _INT64[0] <= value < _INT64[1]:
+            value = str(value)
+        clauses.append("s.id IN (SELECT span FROM attributes WHERE key = ? AND value IN (?, ?))")
+        # A command-line value may name a number or a string.
+        params += [key, value, _number(value)]
+    return (" AND ".join(clauses) or "1"), params
+
+
+def _number(value: Any) -> Any:
+    # The value as the writer would have stored it (see
+    # SQLiteWriter._attribute), for a string that names a non-string.
+    if not isinstance(value, str):
+        return value
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return int(lowered == "true")
+    try:
+        number = int(value)
+    except ValueError:
+        pass
+    else:
+        # Wider integers were stored as their JSON text.
+        return number if _INT64[0] <= number < _INT64[1] else value
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def iter_sqlite_records(
+    path: PathLike,
+    trace_id: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    stats: Optional[LoadStats] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream span records from a trace database, in insertion order.
+
+    Yields the same dicts as the JSONL loader. trace_id and
+    name_prefix are answered from the indexes. since / until keep
+    whole traces that overlap the range, as agentzen trace does.
+    """
+    stats = stats if stats is not None else LoadStats()
+    where, params = span_filter(trace_id=trace_id, name_prefix=name_prefix)
+    if since is not None or until is not None:
+        having = []
+        if since is not None:
+            having.append("MAX(end_time) >= ?")
+            params.append(since)
+        if until is not None:
+            having.append("MIN(start_time) <= ?")
+            params.append(until)
+        where += (
+            " AND s.trace_id IN (SELECT trace_id FROM spans GROUP BY trace_id"
+            f" HAVING {' AND '.join(having)})"
+        )
+
+    conn = connect(path, readonly=True)
+    try:
+        rows = conn.execute(
+            "SELECT s.id, s.name, s.span_id, s.parent_id, s.trace_id, s.start_time,"
+            " s.end_time, s.output, s.error, a.key, a.value, a.kind"
+            " FROM spans s LEFT JOIN attributes a ON a.span = s.id"
+            f" WHERE {where} ORDER BY s.id",
+            params,
+        )
+
+        current = None
+        record: Dict[str, Any] = {}
+        for row in rows:
+            if row[0] != current:
+                if current is not None and _keep(record, shard, stats):
+                    yield record
+                current = row[0]
+                stats.lines += 1
+                record = _record(row)
+            if row[9] is not None:
+                record["attributes"][row[9]] = _attribute_value(row[10], row[11])
+        if current is not None and _keep(record, shard, stats):
+            yield record
+    finally:
+        conn.close()
+
+
+def _record(row: Tuple) -> Dict[str, Any]:
+    output = row[7]
+    if output is not None:
+        try:
+            output = json.loads(output)
+        except ValueError:
+            pass
+    return {
+        "name": row[1],
+        "span_id": row[2],
+        "parent_id": row[3],
+        "trace_id": row[4],
+        "start_time": row[5],
+        "end_time": row[6],
+        "output": output,
+        "error": row[8],
+        "attributes": {},
+    }
+
+
+def _keep(record: Dict[str, Any], shard: Optional[Tuple[int, int]], stats: LoadStats) -> bool:
+    if shard is not None and shard_of(record["trace_id"], shard[1]) != shard[0]:
+        stats.filtered += 1
+        return False
+    stats.records += 1
+    return True
+
+
+def _attribute_value(value: Any, kind: int) -> Any:
+    if kind == _KIND_BOOL:
+        return bool(value)
+    if kind == _KIND_JSON:
+        try:
+            return json.loads(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+
+# ---------------------------------------------------------------------
+# QUERIES
+# ---------------------------------------------------------------------
+
+def query_spans(
+    conn: sqlite3.Connection,
+    order: str = "recent",
+    limit: Optional[int] = 20,
+    **filters: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Matching spans (without output / attributes), most recent first,
+    or longest first with order="slowest".
+    """
+    where, params = span_filter(**filters)
+    order_by = "s.duration DESC" if order == "slowest" else "s.start_time DESC"
+    sql = (
+        "SELECT s.trace_id, s.span_id, s.name, s.start_time, s.duration, s.error"
+        f" FROM spans s WHERE {where} ORDER BY {order_by}"
+    )
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    keys = ("trace_id", "span_id", "name", "start_time", "duration", "error")
+    return [dict(zip(keys, row)) for row in conn.execute(sql, params)]
+
+
+def query_traces(
+    conn: sqlite3.Connection,
+    limit: Optional[int] = 20,
+    **filters: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Traces with at least one matching span: how many matched, how
+    many of those failed, and when the first one started. Most
+    recent first.
+    """
+    where, params = span_filter(**filters)
+    sql = (
+        "SELECT s.trace_id, COUNT(*), COUNT(s.error), MIN(s.start_time)"
+        f" FROM spans s WHERE {where} GROUP BY s.trace_id ORDER BY MIN(s.start_time) DESC"
+    )
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    keys = ("trace_id", "spans", "errors", "start_time")
+    return [dict(zip(keys, row)) for row in conn.execute(sql, params)]
+
+
+def query_groups(
+    conn: sqlite3.Connection,
+    group_by: str,
+    limit: Optional[int] = 20,
+    **filters: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Duration statistics of matching spans per span name
+    (group_by="name") or per value of an attribute, slowest
+    average first.
+    """
+    where, params = span_filter(**filters)
+    if group_by == "name":
+        key_sql, join, join_params = "s.name", "", []
+    else:
+        key_sql = "a.value"
+        join = "JOIN attributes a ON a.span = s.id AND a.key = ?"
+        join_params = [group_by]
+    sql = (
+        f"SELECT {key_sql}, COUNT(*), COUNT(s.error), AVG(s.duration), MAX(s.duration)"
+        f" FROM spans s {join} WHERE {where} GROUP BY {key_sql}"
+        " ORDER BY AVG(s.duration) DESC"
+    )
+    params = join_params + params
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    keys = ("group", "spans", "errors", "avg_duration", "max_duration")
+    return [dict(zip(keys, row)) for row in conn.execute(sql, params)]
@@ -1,9 +1,12 @@
-from contextvars import ContextVar
-from typing import Optional
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
 
 _current_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
 _current_span_id: ContextVar[Optional[str]] = ContextVar("span_id", default=None)
 
+# Span id marking the current trace as not sampled (the W3C invalid span id).
+NOT_SAMPLED = "0" * 16
+
 
 def get_trace_id() -> Optional[str]:
     return _current_trace_id.get()
@@ -19,3 +22,20 @@ def get_span_id() -> Optional[str]:
 
 def set_span_id(span_id: Optional[str]):
     _current_span_id.set(span_id)
+
+
+def push_span(trace_id: str, span_id: str) -> Tuple[Token, Token]:
+    """
+    Make span_id the current span of the running context.
+
+    Returns the tokens needed by pop_span() to restore the
+    previous state. Every asyncio task and thread sees its
+    own copy, so concurrent spans never share a parent.
+    """
+    return _current_trace_id.set(trace_id), _current_span_id.set(span_id)
+
+
+def pop_span(tokens: Tuple[Token, Token]):
+    trace_token, span_token = tokens
+    _current_span_id.reset(span_token)
+    _current_trace_id.reset(trace_token)
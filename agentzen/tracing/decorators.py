@@ -1,5 +1,7 @@
 from functools import wraps
 from typing import Callable, Awaitable
+
+from .context import pop_span, push_span
 from .tracer import Tracer
 
 
@@ -8,13 +10,21 @@ def trace_async_step(tracer: Tracer, name: str):
         @wraps(fn)
         async def wrapper(*args, **kwargs):
             span = tracer.start_span(name)
+            # Current for the duration of the call, so spans opened
+            # inside fn nest under it.
+            tokens = push_span(span.trace_id, span.span_id)
             try:
                 result = await fn(*args, **kwargs)
-                tracer.end_span(span, result)
-                return result
-            except Exception as e:
+            except BaseException as e:
+                # Including CancelledError, so a cancelled step is
+                # still exported rather than left open.
                 tracer.record_exception(span, e)
                 raise
+            else:
+                tracer.end_span(span, result)
+            finally:
+                pop_span(tokens)
+            return result
 
         return wrapper
 
@@ -0,0 +1,48 @@
+import itertools
+import os
+
+# ---------------------------------------------------------------------
+# ID GENERATION
+#
+# IDs are a random per-process prefix followed by a counter, which
+# is much cheaper than uuid4() (one os.urandom() call per process
+# instead of per span). Lengths follow W3C Trace Context: 32 hex
+# characters for trace ids, 16 for span ids, never all zeros.
+#
+#   trace id   8 random bytes + 64-bit counter
+#   span id    4 random bytes + 32-bit counter
+#
+# Span ids only need to be unique within a trace, whose id already
+# carries 8 random bytes; 4 keep spans of processes that write into
+# the same trace (a collector, a worker pool) apart.
+# ---------------------------------------------------------------------
+
+_MASK_TRACE = (1 << 64) - 1
+_MASK_SPAN = (1 << 32) - 1
+
+_trace_prefix = ""
+_span_prefix = ""
+_counter = itertools.count(1)
+
+
+def _reseed():
+    global _trace_prefix, _span_prefix, _counter
+    seed = os.urandom(12)
+    _trace_prefix = seed[:8].hex()
+    _span_prefix = seed[8:].hex()
+    _counter = itertools.count(1)
+
+
+def new_trace_id() -> str:
+    return f"{_trace_prefix}{next(_counter) & _MASK_TRACE:016x}"
+
+
+def new_span_id() -> str:
+    return f"{_span_prefix}{next(_counter) & _MASK_SPAN:08x}"
+
+
+_reseed()
+
+# A forked child must not continue the parent's sequence.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
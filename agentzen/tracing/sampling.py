@@ -0,0 +1,186 @@
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from agentzen.analysis.antipatterns import AntiPatternAnalyzer
+
+
+# ---------------------------------------------------------------------
+# HEAD SAMPLERS
+# ---------------------------------------------------------------------
+
+class Sampler(ABC):
+    """
+    Head sampler: decides once per trace, when the root span starts.
+
+    Unsampled traces cost almost nothing: their spans are never
+    created, timed or exported.
+    """
+
+    @abstractmethod
+    def should_sample(self, trace_id: str, name: str) -> bool:
+        ...
+
+
+class AlwaysOnSampler(Sampler):
+    def should_sample(self, trace_id: str, name: str) -> bool:
+        return True
+
+
+class TraceIdRatioSampler(Sampler):
+    """
+    Keep a fixed fraction of traces, keyed on trace_id.
+
+    The decision is a pure function of the trace id, so every
+    process that sees the same trace agrees on it.
+    """
+
+    def __init__(self, rate: float):
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"rate must be within [0, 1], got {rate}")
+        self.rate = rate
+        self._bound = int(rate * (1 << 64))
+
+    def should_sample(self, trace_id: str, name: str) -> bool:
+        if self.rate >= 1.0:
+            return True
+        if self.rate <= 0.0:
+            return False
+        digest = hashlib.blake2b(trace_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") < self._bound
+
+
+# ---------------------------------------------------------------------
+# TAIL SAMPLER
+# ---------------------------------------------------------------------
+
+class TailSampler:
+    """
+    Exporter wrapper that buffers each trace until its root span
+    ends, then forwards it only if it is interesting:
+
+        - any span recorded an error
+        - the root span took longer than latency_threshold seconds
+        - AntiPatternAnalyzer reports findings (analyze=True)
+
+    Buffered memory is bounded by max_buffered_spans. When it is
+    exceeded the oldest incomplete traces are evicted and dropped,
+    along with any of their spans that finish afterwards.
+    """
+
+    _MAX_REMEMBERED_EVICTIONS = 4096
+
+    def __init__(
+        self,
+        exporter: Any,
+        latency_threshold: Optional[float] = None,
+        keep_errors: bool = True,
+        analyze: bool = True,
+        max_buffered_spans: int = 10000,
+    ):
+        if not hasattr(exporter, "export"):
+            raise RuntimeError("Exporter must implement export(span)")
+
+        self.exporter = exporter
+        self.latency_threshold = latency_threshold
+        self.keep_errors = keep_errors
+        self.analyze = analyze
+        self.max_buffered_spans = max_buffered_spans
+
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._evicted: "OrderedDict[str, None]" = OrderedDict()
+        self._buffered = 0
+
+        self.kept_traces = 0
+        self.dropped_traces = 0
+        self.evicted_traces = 0
+
+    def export(self, span: Any):
+        with self._lock:
+            if span.trace_id in self._evicted:
+                if span.parent_id is None:
+                    del self._evicted[span.trace_id]
+                return
+
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+            spans.append(span)
+            self._buffered += 1
+
+            if span.parent_id is None:
+                del self._traces[span.trace_id]
+                self._buffered -= len(spans)
+                complete = spans
+            else:
+                complete = None
+                self._evict()
+
+        if complete is None:
+            return
+
+        # The decision (which may run the analyzer) and the export
+        # stay outside the lock; only the counters need it.
+        keep = self._keep(span, complete)
+        with self._lock:
+            if keep:
+                self.kept_traces += 1
+            else:
+                self.dropped_traces += 1
+        if keep:
+            for s in complete:
+                self.exporter.export(s)
+
+    def _evict(self):
+        while self._buffered > self.max_buffered_spans and self._traces:
+            trace_id, spans = self._traces.popitem(last=False)
+            self._buffered -= len(spans)
+            self.evicted_traces += 1
+
+            self._evicted[trace_id] = None
+            if len(self._evicted) > self._MAX_REMEMBERED_EVICTIONS:
+                self._evicted.popitem(last=False)
+
+    def _keep(self, root: Any, spans: List[Any]) -> bool:
+        if self.keep_errors and any(s.error for s in spans):
+            return True
+
+        if (
+            self.latency_threshold is not None
+            and root.end_time is not None
+            and root.end_time - root.start_time > self.latency_threshold
+        ):
+            return True
+
+        if self.analyze:
+            records = [s.to_dict() for s in spans]
+            if not AntiPatternAnalyzer(records).analyze().is_empty():
+                return True
+
+        return False
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if hasattr(self.exporter, "flush"):
+            return self.exporter.flush(timeout)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        if hasattr(self.exporter, "shutdown"):
+            self.exporter.shutdown(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "buffered_spans": self._buffered,
+                "buffered_traces": len(self._traces),
+                "kept_traces": self.kept_traces,
+                "dropped_traces": self.dropped_traces,
+                "evicted_traces": self.evicted_traces,
+            }
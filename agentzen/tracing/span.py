@@ -1,10 +1,22 @@
-from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
-from time import time
-import uuid
+from time import perf_counter, time
+
+from .ids import new_span_id
+
+# A span's start_time is read from the wall clock, so it stays true
+# however long the process runs (an anchor taken once at import
+# drifts from NTP-corrected time). Its duration is measured on the
+# monotonic clock, so it can never go negative when the system
+# clock is adjusted: end_time is start_time + elapsed.
+
+
+def now() -> float:
+    """
+    Current wall-clock time in epoch seconds.
+    """
+    return time()
 
 
-@dataclass
 class TraceSpan:
     """
     Represents a single tracing span.
@@ -12,43 +24,111 @@ class TraceSpan:
     This object is intentionally minimal and uses
     explicit serialization via to_dict() to avoid
     leaking internal or accidental attributes.
+
+    It is built on __slots__ so a span carries no per-instance
+    __dict__, and its attributes dict is only created when
+    something is written to it. start_time/end_time are epoch
+    seconds; their difference is measured on a monotonic clock.
     """
 
-    # ---- Identity ----
-    name: str
-    span_id: str = field(default_factory=lambda: uuid.uuid4().hex)
-    parent_id: Optional[str] = None
-    trace_id: Optional[str] = None
+    __slots__ = (
+        # ---- Identity ----
+        "name",
+        "span_id",
+        "parent_id",
+        "trace_id",
+        # ---- Timing ----
+        "start_time",
+        "end_time",
+        # ---- Data ----
+        "input",
+        "output",
+        "error",
+        # ---- Metadata ----
+        "_attributes",
+        "_started",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        span_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        input: Optional[Any] = None,
+        output: Optional[Any] = None,
+        error: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.span_id = span_id or new_span_id()
+        self.parent_id = parent_id
+        self.trace_id = trace_id
+
+        if start_time is None:
+            self.start_time = time()
+            self._started: Optional[float] = perf_counter()
+        else:
+            # Rebuilt from a record: only wall-clock times are known.
+            self.start_time = start_time
+            self._started = None
+        self.end_time = end_time
+
+        self.input = input
+        self.output = output
+        self.error = error
+
+        self._attributes = attributes or None
+
+    # ------------------------------------------------------------------
+    # Attributes (created lazily)
+    # ------------------------------------------------------------------
 
-    # ---- Timing ----
-    start_time: float = field(default_factory=time)
-    end_time: Optional[float] = None
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        if self._attributes is None:
+            self._attributes = {}
+        return self._attributes
 
-    # ---- Data ----
-    input: Optional[Any] = None
-    output: Optional[Any] = None
-    error: Optional[str] = None
+    @attributes.setter
+    def attributes(self, value: Optional[Dict[str, Any]]):
+        self._attributes = value or None
 
-    # ---- Metadata ----
-    attributes: Dict[str, Any] = field(default_factory=dict)
+    # ------------------------------------------------------------------
+    # Timing
+    # ------------------------------------------------------------------
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
 
     # ------------------------------------------------------------------
     # Lifecycle
     # ------------------------------------------------------------------
 
-    def finish(self, output: Any = None):
+    def finish(self, output: Any = None, error: Optional[str] = None):
         """
-        Mark the span as completed successfully.
+        Mark the span as completed, successfully unless error is given.
         """
         self.output = output
-        self.end_time = time()
+        self.error = error
+        self.end_time = self._now()
 
     def fail(self, exc: Exception):
         """
         Mark the span as failed with an exception.
         """
         self.error = repr(exc)
-        self.end_time = time()
+        self.end_time = self._now()
+
+    def _now(self) -> float:
+        if self._started is None:
+            return time()
+        return self.start_time + (perf_counter() - self._started)
 
     # ------------------------------------------------------------------
     # Serialization (STRICT, WHITELISTED)
@@ -71,5 +151,11 @@ class TraceSpan:
             "input": self.input,
             "output": self.output,
             "error": self.error,
-            "attributes": self.attributes,
+            "attributes": self._attributes if self._attributes is not None else {},
         }
+
+    def __repr__(self) -> str:
+        return (
+            f"TraceSpan(name={self.name!r}, span_id={self.span_id!r}, "
+            f"parent_id={self.parent_id!r}, trace_id={self.trace_id!r})"
+        )
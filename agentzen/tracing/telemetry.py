@@ -0,0 +1,305 @@
+import atexit
+import json
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agentzen.analysis.sketch import QuantileSketch
+
+
+# ---------------------------------------------------------------------
+# SELF-TELEMETRY
+#
+# What the tracing pipeline itself costs, process-wide:
+#
+#   counters     spans.started, spans.finished, spans.dropped,
+#                traces.unsampled, bytes.written, batches.written,
+#                export.errors, langchain.runs.evicted
+#   gauges       queue_depth (summed over live export queues)
+#   histograms   export       Tracer -> exporter.export(), per span
+#                serialize    encoding one span record
+#                write_batch  one batch written by a background writer
+#                flush        one flush() call
+#                callback.*   one LangChain callback (start, token, end)
+#
+# Every thread writes to its own shard (plain dicts, no locks), and
+# snapshot() merges the shards. Per-span timings are sampled: only
+# every sample_every-th call on a thread is timed, so the clock is
+# read a fraction of the time. Per-batch timings are always taken.
+# Shards of finished threads are folded into one retired shard, by
+# snapshot() and whenever the shard list has doubled since the last
+# fold, so short-lived threads are not kept alive by their shards.
+# ---------------------------------------------------------------------
+
+_RELATIVE_ACCURACY = 0.02
+
+
+class _Shard:
+    # The tracer's per-span counters are slots rather than dict
+    # entries: they are bumped twice for every span.
+    __slots__ = ("started", "finished", "counters", "ticks", "histograms")
+
+    def __init__(self):
+        self.started = 0
+        self.finished = 0
+        self.counters: Dict[str, int] = {}
+        self.ticks: Dict[str, int] = {}
+        self.histograms: Dict[str, QuantileSketch] = {}
+
+
+class Telemetry:
+    """
+    Cheap, thread-safe self-metrics. Set enabled = False to turn
+    collection off entirely.
+    """
+
+    def __init__(self, sample_every: int = 16):
+        self.enabled = True
+        self.sample_every = sample_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._retired = _Shard()
+        self._prune_at = 64
+        self._queues: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._new_shard()
+
+    def _new_shard(self) -> _Shard:
+        shard = self._local.shard = _Shard()
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+            if len(self._shards) >= self._prune_at:
+                self._prune()
+                self._prune_at = max(64, 2 * len(self._shards))
+        return shard
+
+    def _prune(self):
+        # Fold the shards of finished threads; caller holds _lock.
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _fold(self._retired, shard)
+        self._shards = live
+
+    # --------------------------------------------------
+    # RECORDING
+    # --------------------------------------------------
+
+    def span_started(self):
+        if self.enabled:
+            try:
+                shard = self._local.shard
+            except AttributeError:
+                shard = self._new_shard()
+            shard.started += 1
+
+    def span_finished(self) -> bool:
+        """
+        Count a finished span. Returns whether its export should be
+        timed (sampled, as for sampled("export")).
+        """
+        if not self.enabled:
+            return False
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        n = shard.finished
+        shard.finished = n + 1
+        return n % self.sample_every == 0
+
+    def add(self, name: str, n: int = 1):
+        if self.enabled:
+            counters = self._shard().counters
+            counters[name] = counters.get(name, 0) + n
+
+    def sampled(self, name: str) -> bool:
+        """
+        Whether this call of a per-span operation should be timed.
+        True for the 1st, (sample_every + 1)th, ... call per thread.
+        """
+        if not self.enabled:
+            return False
+        ticks = self._shard().ticks
+        n = ticks.get(name, 0)
+        ticks[name] = n + 1
+        return n % self.sample_every == 0
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            histograms = self._shard().histograms
+            sketch = histograms.get(name)
+            if sketch is None:
+                sketch = histograms[name] = QuantileSketch(_RELATIVE_ACCURACY)
+            sketch.add(seconds)
+
+    def register_queue(self, queue: Any):
+        """
+        Include queue.queue_depth() in the queue_depth gauge for as
+        long as queue is alive.
+        """
+        with self._lock:
+            self._queues.add(queue)
+
+    # --------------------------------------------------
+    # READING
+    # --------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        counters: Dict[str, int] = {}
+        histograms: Dict[str, QuantileSketch] = {}
+
+        with self._lock:
+            self._prune()
+            shards = [self._retired] + [shard for _, shard in self._shards]
+            queues = list(self._queues)
+
+        for shard in shards:
+            _merge_into(counters, histograms, shard)
+
+        depth = 0
+        for queue in queues:
+            try:
+                depth += queue.queue_depth()
+            except Exception:
+                pass
+
+        return {
+            "counters": dict(sorted(counters.items())),
+            "gauges": {"queue_depth": depth},
+            "histograms": {
+                name: _summary(sketch) for name, sketch in sorted(histograms.items())
+            },
+            "sample_every": self.sample_every,
+        }
+
+    def reset(self):
+        """
+        Forget everything recorded so far (queues stay registered).
+        """
+        with self._lock:
+            for _, shard in self._shards:
+                shard.started = shard.finished = 0
+                shard.counters.clear()
+                shard.ticks.clear()
+                shard.histograms.clear()
+            self._retired = _Shard()
+
+
+def _copy_sketch(sketch: QuantileSketch) -> QuantileSketch:
+    # The owning thread may be adding to sketch right now; dict()
+    # copies the buckets atomically, the scalars are read as-is.
+    copy = QuantileSketch(sketch.relative_accuracy)
+    copy.buckets = dict(sketch.buckets)
+    copy.zero_count = sketch.zero_count
+    copy.count = sketch.count
+    copy.sum = sketch.sum
+    copy.min = sketch.min
+    copy.max = sketch.max
+    copy.integral = sketch.integral
+    return copy
+
+
+def _merge_into(counters: Dict[str, int], histograms: Dict[str, QuantileSketch], shard: _Shard):
+    for name, n in (("spans.started", shard.started), ("spans.finished", shard.finished)):
+        if n:
+            counters[name] = counters.get(name, 0) + n
+    for name, n in dict(shard.counters).items():
+        counters[name] = counters.get(name, 0) + n
+    for name, sketch in dict(shard.histograms).items():
+        if name in histograms:
+            histograms[name].merge(_copy_sketch(sketch))
+        else:
+            histograms[name] = _copy_sketch(sketch)
+
+
+def _fold(retired: _Shard, shard: _Shard):
+    retired.started += shard.started
+    retired.finished += shard.finished
+    shard.started = shard.finished = 0
+    _merge_into(retired.counters, retired.histograms, shard)
+
+
+def _summary(sketch: QuantileSketch) -> Dict[str, Any]:
+    return {
+        "samples": sketch.count,
+        "mean": sketch.mean(),
+        "p50": sketch.quantile(0.5),
+        "p95": sketch.quantile(0.95),
+        "p99": sketch.quantile(0.99),
+        "max": sketch.max,
+    }
+
+
+TELEMETRY = Telemetry()
+
+
+# ---------------------------------------------------------------------
+# PERIODIC DUMP
+# ---------------------------------------------------------------------
+
+class TelemetryReporter:
+    """
+    Background thread writing a stats snapshot every interval
+    seconds: as a JSON line appended to path, and/or through
+    logger.info(). A last snapshot is written on stop(), which
+    also runs at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Dict[str, Any]],
+        interval: float = 60.0,
+        path: Optional[str] = None,
+        logger: Any = None,
+    ):
+        if path is None and logger is None:
+            raise ValueError("TelemetryReporter needs a path or a logger")
+        self.source = source
+        self.interval = interval
+        self.path = path
+        self.logger = logger
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="agentzen-telemetry", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def report(self):
+        try:
+            line = json.dumps({"time": time.time(), **self.source()}, default=str)
+        except Exception:
+            return
+        if self.path is not None:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass
+        if self.logger is not None:
+            self.logger.info("agentzen telemetry %s", line)
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.report()
+        try:
+            atexit.unregister(self.stop)
+        except Exception:
+            pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
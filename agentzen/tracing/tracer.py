@@ -1,35 +1,54 @@
-import time
-import uuid
 from contextlib import contextmanager
+from time import perf_counter
 from typing import Optional, Dict, Any
 
+from .context import (
+    NOT_SAMPLED,
+    get_trace_id,
+    get_span_id,
+    push_span,
+    pop_span,
+)
+from .ids import new_trace_id
+from .span import TraceSpan
+from .telemetry import TELEMETRY, TelemetryReporter
+
+
+# Set on an exception an exporter raises on purpose into the traced
+# code (see exporters.live); any other exporter error is swallowed.
+ABORT_MARKER = "_agentzen_abort"
+
 
 # ---------------------------------------------------------------------
-# TRACE SPAN
+# NON-RECORDING SPAN
 # ---------------------------------------------------------------------
 
-class TraceSpan:
-    def __init__(
-        self,
-        name: str,
-        trace_id: str,
-        parent_id: Optional[str],
-        attributes: Optional[Dict[str, Any]] = None,
-    ):
-        self.name = name
-        self.trace_id = trace_id
-        self.span_id = uuid.uuid4().hex
-        self.parent_id = parent_id
-        self.start_time = time.time()
-        self.end_time = None
-        self.output = None
-        self.error = None
-        self.attributes = attributes or {}
+class _NonRecordingSpan:
+    """
+    Stand-in yielded for spans of unsampled traces. Nothing on it
+    is timed or exported.
+    """
+
+    __slots__ = ()
+
+    name = None
+    trace_id = None
+    span_id = NOT_SAMPLED
+    parent_id = None
+    start_time = None
+    end_time = None
+    output = None
+    error = None
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        return {}
 
     def finish(self, output=None, error=None):
-        self.end_time = time.time()
-        self.output = output
-        self.error = error
+        pass
+
+
+_NON_RECORDING_SPAN = _NonRecordingSpan()
 
 
 # ---------------------------------------------------------------------
@@ -37,19 +56,33 @@ class TraceSpan:
 # ---------------------------------------------------------------------
 
 class Tracer:
-    def __init__(self, exporter):
+    def __init__(self, exporter, nonblocking: bool = False, sampler=None):
         """
         exporter must implement:
             export(span: TraceSpan)
-        """
-        self.exporter = exporter
-        self._stack = []
+        or, for asyncio applications:
+            async export_async(span: TraceSpan)
+
+        With nonblocking=True (implied for async-only exporters)
+        finished spans are handed to an AsyncExportPipeline and
+        exported by a task on the running loop instead of inline.
 
-        if not hasattr(exporter, "export"):
+        sampler is an optional head sampler (see tracing.sampling)
+        consulted once per trace when its root span starts.
+        """
+        if not hasattr(exporter, "export") and not hasattr(exporter, "export_async"):
             raise RuntimeError(
-                "Exporter must implement export(span)"
+                "Exporter must implement export(span) or export_async(span)"
             )
 
+        if nonblocking or not hasattr(exporter, "export"):
+            from agentzen.exporters.aio import AsyncExportPipeline
+
+            exporter = AsyncExportPipeline(exporter)
+
+        self.exporter = exporter
+        self.sampler = sampler
+
     # --------------------------------------------------
     # CORE TRACE CONTEXT
     # --------------------------------------------------
@@ -60,8 +93,29 @@ class Tracer:
         name: str,
         attributes: Optional[Dict[str, Any]] = None,
     ):
-        trace_id = self._stack[0].trace_id if self._stack else uuid.uuid4().hex
-        parent_id = self._stack[-1].span_id if self._stack else None
+        # Nesting lives in contextvars rather than on the tracer, so a
+        # single Tracer can be shared by concurrent asyncio tasks and
+        # threads without spans picking up each other's parents.
+        parent_id = get_span_id()
+
+        if parent_id == NOT_SAMPLED:
+            yield _NON_RECORDING_SPAN
+            return
+
+        if parent_id is None:
+            trace_id = new_trace_id()
+            if self.sampler is not None and not self.sampler.should_sample(
+                trace_id, name
+            ):
+                TELEMETRY.add("traces.unsampled")
+                tokens = push_span(trace_id, NOT_SAMPLED)
+                try:
+                    yield _NON_RECORDING_SPAN
+                finally:
+                    pop_span(tokens)
+                return
+        else:
+            trace_id = get_trace_id()
 
         span = TraceSpan(
             name=name,
@@ -70,7 +124,8 @@ class Tracer:
             attributes=attributes,
         )
 
-        self._stack.append(span)
+        tokens = push_span(span.trace_id, span.span_id)
+        TELEMETRY.span_started()
 
         try:
             yield span
@@ -80,8 +135,134 @@ class Tracer:
         else:
             span.finish()
         finally:
-            self._stack.pop()
-            self.exporter.export(span)
+            pop_span(tokens)
+            self._export(span)
+
+    def _export(self, span: TraceSpan):
+        try:
+            if TELEMETRY.span_finished():
+                t0 = perf_counter()
+                self.exporter.export(span)
+                TELEMETRY.observe("export", perf_counter() - t0)
+            else:
+                self.exporter.export(span)
+        except Exception as e:
+            # Exporters count their own failures; this is the last
+            # resort so that none escapes trace()'s finally block.
+            # Only a live detector's abort is meant for the agent.
+            if getattr(e, ABORT_MARKER, False):
+                raise
+            TELEMETRY.add("export.errors")
+            TELEMETRY.add("spans.dropped")
+
+    # --------------------------------------------------
+    # MANUAL SPANS
+    #
+    # For callback-style code (framework integrations, decorators)
+    # whose start and end do not share a with block. A manual span
+    # is never made current by the tracer: pass it as parent= to
+    # nest under it, or push it with context.push_span().
+    # --------------------------------------------------
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Any = None,
+    ):
+        """
+        Start a span and return it. parent is the span to nest
+        under; by default the current span of the running context
+        (or a new trace when there is none). Finish it with
+        end_span() or record_exception().
+        """
+        if parent is None:
+            parent_id = get_span_id()
+            trace_id = get_trace_id()
+        else:
+            parent_id = parent.span_id
+            trace_id = parent.trace_id
+
+        if parent_id == NOT_SAMPLED:
+            return _NON_RECORDING_SPAN
+
+        if parent_id is None:
+            trace_id = new_trace_id()
+            if self.sampler is not None and not self.sampler.should_sample(
+                trace_id, name
+            ):
+                TELEMETRY.add("traces.unsampled")
+                return _NON_RECORDING_SPAN
+
+        span = TraceSpan(
+            name=name,
+            trace_id=trace_id,
+            parent_id=parent_id,
+            attributes=attributes,
+        )
+        TELEMETRY.span_started()
+        return span
+
+    def end_span(self, span, output: Any = None):
+        """
+        Finish a span from start_span() successfully and export it.
+        Ending a span twice is a no-op.
+        """
+        if span is _NON_RECORDING_SPAN or span.end_time is not None:
+            return
+        span.finish(output=output)
+        self._export(span)
+
+    def record_exception(self, span, error: BaseException):
+        """
+        Finish a span from start_span() as failed with error and
+        export it, as trace() does when its block raises.
+        """
+        if span is _NON_RECORDING_SPAN or span.end_time is not None:
+            return
+        # str() of some exceptions (CancelledError, bare KeyError())
+        # is empty, which would read as "no error".
+        span.finish(error=str(error) or type(error).__name__)
+        self._export(span)
+
+    # --------------------------------------------------
+    # SELF-TELEMETRY
+    # --------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        What tracing costs: span counters, queue depth and latency
+        histograms (process-wide, see tracing.telemetry), plus the
+        exporter's own stats() under "exporter" when it has them.
+        """
+        stats = TELEMETRY.snapshot()
+        if hasattr(self.exporter, "stats"):
+            try:
+                stats["exporter"] = self.exporter.stats()
+            except Exception:
+                pass
+        return stats
+
+    def report_stats(
+        self,
+        interval: float = 60.0,
+        path: Optional[str] = None,
+        logger: Any = None,
+    ) -> TelemetryReporter:
+        """
+        Dump stats() every interval seconds to path (JSON lines)
+        and/or logger. Call stop() on the result to end it.
+        """
+        return TelemetryReporter(self.stats, interval=interval, path=path, logger=logger)
+
+    async def aclose(self):
+        """
+        Flush pending spans and close the exporter from async code.
+        """
+        if hasattr(self.exporter, "aclose"):
+            await self.exporter.aclose()
+        elif hasattr(self.exporter, "shutdown"):
+            self.exporter.shutdown()
 
     # --------------------------------------------------
     # AGENT DECISION API
@@ -99,6 +280,9 @@ class Tracer:
         """
         Records a structured agent decision without exposing chain-of-thought.
         """
+        if get_span_id() == NOT_SAMPLED:
+            yield
+            return
 
         attributes = {
             "type": "decision",
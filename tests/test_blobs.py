@@ -0,0 +1,26 @@
+from agentzen.replay.blobs import BlobStore
+
+
+# ---------------------------------------------------------------------
+# max_blob_bytes shortens the string itself; what get() returns is a
+# prefix of what was written, never a piece of its JSON encoding.
+# ---------------------------------------------------------------------
+
+
+def test_truncated_string_reads_back_as_prefix(tmp_path):
+    store = BlobStore(tmp_path, threshold=10, max_blob_bytes=64)
+    value = 'say "hi"\nnaïve ☃ ' * 50
+    ref = store.put(value)
+    assert ref["truncated"] is True
+    assert ref["size"] > 64
+    stored = store.get(ref)
+    assert isinstance(stored, str)
+    assert stored and value.startswith(stored)
+
+
+def test_non_strings_are_stored_whole(tmp_path):
+    store = BlobStore(tmp_path, threshold=10, max_blob_bytes=64)
+    value = {"items": list(range(100))}
+    ref = store.put(value)
+    assert "truncated" not in ref
+    assert store.get(ref) == value
@@ -0,0 +1,74 @@
+import gzip
+import json
+import threading
+from pathlib import Path
+
+from agentzen.exporters.jsonl import JSONLExporter
+from agentzen.replay import follow
+from agentzen.replay.follow import TraceFollower
+from agentzen.replay.segments import segment_path
+from agentzen.tracing.tracer import Tracer
+
+
+# ---------------------------------------------------------------------
+# Following a file that is rotated and compressed underneath the
+# follower must yield every span exactly once, and only segments
+# pruned by retention count as skipped.
+# ---------------------------------------------------------------------
+
+SPANS = 5000
+
+
+def test_follow_rotating_compressed_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    follower = TraceFollower(path, from_start=True, poll_interval=0.001)
+    seen = []
+    done = threading.Event()
+
+    def write():
+        exporter = JSONLExporter(str(path), max_bytes=20000, compress="gzip")
+        tracer = Tracer(exporter)
+        for i in range(SPANS):
+            with tracer.trace("tool:step", {"i": i}):
+                pass
+        exporter.shutdown()
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while True:
+        finished = done.is_set()
+        seen.extend(r["attributes"]["i"] for r in follower.poll())
+        if finished:
+            break
+    writer.join()
+    follower.close()
+
+    assert sorted(seen) == list(range(SPANS))
+    assert follower.skipped_segments == 0
+    assert follower.rotations > 1
+
+
+def test_segment_compressed_after_listing(tmp_path, monkeypatch):
+    # The listing still shows the plain segment, which the compressor
+    # has already replaced by its .gz.
+    path = tmp_path / "trace.jsonl"
+    follower = TraceFollower(path, from_start=True)
+
+    plain = segment_path(path, 1)
+    with gzip.open(str(plain) + ".gz", "wb") as f:
+        f.write(json.dumps({"name": "tool:step"}).encode() + b"\n")
+    path.write_bytes(b"")
+
+    real = follow.closed_segments
+    stale = [[(1, plain)]]
+
+    def closed_segments(p: Path):
+        return stale.pop() if stale else real(p)
+
+    monkeypatch.setattr(follow, "closed_segments", closed_segments)
+
+    records = list(follower.poll())
+    follower.close()
+    assert [r["name"] for r in records] == ["tool:step"]
+    assert follower.skipped_segments == 0
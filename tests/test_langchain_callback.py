@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import uuid
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+langchain = pytest.importorskip("agentzen.integrations.langchain")
+
+from agentzen.tracing.tracer import Tracer  # noqa: E402
+
+
+# ---------------------------------------------------------------------
+# Runs are evicted by last activity. An agent that runs for longer
+# than ttl but keeps starting and ending steps must stay one trace;
+# a tree nobody touches any more is ended from the leaves up.
+# ---------------------------------------------------------------------
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans: List[Any] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Any):
+        with self._lock:
+            self.spans.append(span)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(langchain, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_long_running_parent_outlives_ttl(clock):
+    exporter = ListExporter()
+    handler = langchain.AgentZenLangChainCallback(Tracer(exporter), ttl=1.0)
+
+    async def agent():
+        root = uuid.uuid4()
+        await handler.on_chain_start({"name": "agent"}, {}, run_id=root)
+        for _ in range(10):
+            step = uuid.uuid4()
+            clock.now += 0.8
+            await handler.on_chain_start({"name": "step"}, {}, run_id=step, parent_run_id=root)
+            llm = uuid.uuid4()
+            clock.now += 0.8
+            await handler.on_llm_start({}, ["hi"], run_id=llm, parent_run_id=step)
+            clock.now += 0.8
+            await handler.on_llm_end(None, run_id=llm)
+            await handler.on_chain_end({}, run_id=step)
+        await handler.on_chain_end({}, run_id=root)
+
+    asyncio.run(agent())
+
+    assert handler.stats() == {"open_runs": 0, "evicted_runs": 0}
+    assert len(exporter.spans) == 21
+    assert len({s.trace_id for s in exporter.spans}) == 1
+    assert [s.name for s in exporter.spans if s.parent_id is None] == ["chain:agent"]
+    assert all(s.error is None for s in exporter.spans)
+
+
+def test_idle_tree_is_evicted_leaves_first(clock):
+    exporter = ListExporter()
+    handler = langchain.AgentZenLangChainCallback(Tracer(exporter), ttl=1.0)
+
+    async def agent():
+        root, step = uuid.uuid4(), uuid.uuid4()
+        await handler.on_chain_start({"name": "agent"}, {}, run_id=root)
+        await handler.on_chain_start({"name": "step"}, {}, run_id=step, parent_run_id=root)
+        clock.now += 2.0
+        await handler.on_chain_start({"name": "other"}, {}, run_id=uuid.uuid4())
+
+    asyncio.run(agent())
+
+    assert handler.stats() == {"open_runs": 1, "evicted_runs": 2}
+    assert [s.name for s in exporter.spans] == ["chain:step", "chain:agent"]
+    assert all(s.error for s in exporter.spans)
+
+
+def test_max_runs_keeps_open_ancestors(clock):
+    exporter = ListExporter()
+    handler = langchain.AgentZenLangChainCallback(Tracer(exporter), max_runs=3)
+
+    async def agent():
+        root = uuid.uuid4()
+        await handler.on_chain_start({"name": "agent"}, {}, run_id=root)
+        for _ in range(5):
+            await handler.on_tool_start({"name": "search"}, "q", run_id=uuid.uuid4(), parent_run_id=root)
+
+    asyncio.run(agent())
+
+    # The oldest tools go; the agent they run under stays open.
+    assert handler.stats() == {"open_runs": 3, "evicted_runs": 3}
+    assert [s.name for s in exporter.spans] == ["tool:search"] * 3
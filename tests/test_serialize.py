@@ -0,0 +1,79 @@
+import dataclasses
+import datetime
+import enum
+import json
+import math
+import uuid
+
+import pytest
+
+from agentzen.exporters.serialize import SpanSerializer
+
+
+# ---------------------------------------------------------------------
+# The orjson fast path and the stdlib path must agree: registered
+# encoders run on both, and non-finite floats come out the same way.
+# ---------------------------------------------------------------------
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def serializer(request):
+    if request.param:
+        pytest.importorskip("orjson")
+    serializer = SpanSerializer(fast=request.param)
+    assert serializer.fast is request.param
+    return serializer
+
+
+@dataclasses.dataclass
+class Credentials:
+    user: str
+    token: str
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+def loads(serializer, value):
+    return json.loads(serializer.dumps(value))
+
+
+def test_registered_dataclass_encoder(serializer):
+    serializer.register(Credentials, lambda c: {"user": c.user, "token": "***"})
+    assert loads(serializer, {"c": Credentials("ann", "xyz")}) == {"c": {"user": "ann", "token": "***"}}
+
+
+def test_registered_datetime_encoder(serializer):
+    serializer.register(datetime.datetime, lambda d: d.strftime("%Y/%m/%d"))
+    assert loads(serializer, [datetime.datetime(2024, 5, 1, 12, 30)]) == ["2024/05/01"]
+
+
+def test_registered_uuid_and_enum_encoders(serializer):
+    serializer.register(uuid.UUID, lambda u: u.hex[:8])
+    serializer.register(Color, lambda c: c.name)
+    u = uuid.UUID("12345678123456781234567812345678")
+    assert loads(serializer, [u, Color.RED]) == ["12345678", "RED"]
+
+
+def test_builtin_encodings_match(serializer):
+    value = {
+        "when": datetime.datetime(2024, 5, 1, 12, 30, 0, 5, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2024, 5, 1),
+        "id": uuid.UUID(int=1),
+        "color": Color.RED,
+        "creds": Credentials("ann", "xyz"),
+    }
+    assert loads(serializer, value) == {
+        "when": "2024-05-01T12:30:00.000005+00:00",
+        "day": "2024-05-01",
+        "id": "00000000-0000-0000-0000-000000000001",
+        "color": "red",
+        "creds": {"user": "ann", "token": "xyz"},
+    }
+
+
+def test_non_finite_floats_are_null(serializer):
+    data = serializer.dumps({"a": math.nan, "b": [math.inf, -math.inf], "c": 1.5}, newline=True)
+    assert data.endswith(b"\n")
+    assert json.loads(data) == {"a": None, "b": [None, None], "c": 1.5}
@@ -0,0 +1,49 @@
+from agentzen.cli.query import main
+from agentzen.exporters.sqlite import SQLiteExporter
+from agentzen.replay.sqlite import connect, query_spans
+from agentzen.tracing.tracer import Tracer
+
+
+# ---------------------------------------------------------------------
+# --attr values arrive as strings and must match the attribute as the
+# writer stored it: booleans as 1/0, integers wider than 64 bits as
+# their JSON text.
+# ---------------------------------------------------------------------
+
+BIG = 1 << 70
+
+
+def write(path):
+    exporter = SQLiteExporter(str(path))
+    tracer = Tracer(exporter)
+    with tracer.trace("tool:a", {"big": BIG, "flag": True, "n": 5, "s": "x"}):
+        pass
+    with tracer.trace("tool:b", {"flag": False, "n": 6}):
+        pass
+    exporter.shutdown()
+
+
+def names(path, key, value):
+    conn = connect(path, readonly=True)
+    try:
+        return [r["name"] for r in query_spans(conn, attribute=(key, value))]
+    finally:
+        conn.close()
+
+
+def test_attribute_filter(tmp_path):
+    path = tmp_path / "t.db"
+    write(path)
+    assert names(path, "big", str(BIG)) == ["tool:a"]
+    assert names(path, "big", BIG) == ["tool:a"]
+    assert names(path, "flag", "True") == ["tool:a"]
+    assert names(path, "flag", "false") == ["tool:b"]
+    assert names(path, "n", "6") == ["tool:b"]
+    assert names(path, "s", "x") == ["tool:a"]
+
+
+def test_bad_limit(tmp_path, capsys):
+    path = tmp_path / "t.db"
+    write(path)
+    assert main([str(path), "--limit", "ten"]) == 1
+    assert "--limit" in capsys.readouterr().err
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from agentzen.tracing.tracer import Tracer
+
+
+# ---------------------------------------------------------------------
+# One Tracer shared by thousands of concurrent asyncio tasks and by
+# worker threads must still produce one intact tree per agent run:
+# a single root, every parent in the same trace, and no span picking
+# up another task's parent.
+# ---------------------------------------------------------------------
+
+TASKS = 5000
+THREADS = 16
+RUNS_PER_THREAD = 100
+SLACK = 0.01
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans: List[Any] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Any):
+        with self._lock:
+            self.spans.append(span)
+
+
+def check_trees(spans: List[Any], runs: int, spans_per_run: int):
+    traces: Dict[str, List[Any]] = defaultdict(list)
+    for span in spans:
+        traces[span.trace_id].append(span)
+
+    assert len(traces) == runs
+    for trace_id, members in traces.items():
+        assert len(members) == spans_per_run
+        by_id = {s.span_id: s for s in members}
+        assert len(by_id) == spans_per_run
+
+        roots = [s for s in members if s.parent_id is None]
+        assert len(roots) == 1
+        run = roots[0].attributes["run"]
+
+        for span in members:
+            # Every span of a run carries the run's own id, and its
+            # parent is a span of the same trace.
+            assert span.attributes["run"] == run
+            if span.parent_id is not None:
+                parent = by_id[span.parent_id]
+                assert parent.trace_id == trace_id
+                # Start times are wall-clock readings and durations
+                # monotonic ones, so nesting holds up to clock jitter.
+                assert parent.start_time <= span.start_time + SLACK
+                assert span.end_time <= parent.end_time + SLACK
+
+
+def test_concurrent_asyncio_tasks():
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+
+    async def agent(run: int):
+        with tracer.trace("agent:run", {"run": run}):
+            for step in range(2):
+                with tracer.trace("agent:step", {"run": run, "step": step}):
+                    with tracer.trace("llm:call", {"run": run}):
+                        await asyncio.sleep(0)
+                    with tracer.trace("tool:search", {"run": run}):
+                        await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(agent(i) for i in range(TASKS)))
+
+    asyncio.run(main())
+    check_trees(exporter.spans, TASKS, 7)
+
+
+def test_worker_threads():
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+    start = threading.Barrier(THREADS)
+
+    def worker(n: int):
+        start.wait()
+        for i in range(RUNS_PER_THREAD):
+            run = n * RUNS_PER_THREAD + i
+            with tracer.trace("agent:run", {"run": run}):
+                with tracer.trace("llm:call", {"run": run}):
+                    time.sleep(0)
+                with tracer.trace("tool:search", {"run": run}):
+                    time.sleep(0)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    check_trees(exporter.spans, THREADS * RUNS_PER_THREAD, 3)
+
+
+def test_threads_running_event_loops():
+    # Each thread drives its own loop of concurrent tasks.
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+
+    async def agent(run: int):
+        with tracer.trace("agent:run", {"run": run}):
+            with tracer.trace("llm:call", {"run": run}):
+                await asyncio.sleep(0)
+
+    def worker(n: int):
+        async def main():
+            await asyncio.gather(*(agent(n * 200 + i) for i in range(200)))
+
+        asyncio.run(main())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    check_trees(exporter.spans, 8 * 200, 2)
+
+
+def test_per_span_overhead():
+    class NullExporter:
+        def export(self, span: Any):
+            pass
+
+    tracer = Tracer(NullExporter())
+    spans = 20_000
+
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(spans // 2):
+            with tracer.trace("agent:run", {"i": 1}):
+                with tracer.trace("llm:call"):
+                    pass
+        best = min(best, time.perf_counter() - t0)
+
+    # Typically a few microseconds; the bound only catches a
+    # regression to something pathological (locks, per-span I/O).
+    assert best / spans < 100e-6